@@ -0,0 +1,253 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import tempfile
+from typing import List, Dict, Any, Optional, Type, Union
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaType import MediaType
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from kudubot.Bot import Bot
+from kudubot.db.Address import Address as DbAddress
+from kudubot.parsing.Command import Command
+from kudubot.parsing.CommandParser import CommandParser
+from kudubot.test.FakeConnection import FakeConnection
+
+
+class BenchmarkParser(CommandParser):
+    """
+    Parser with a few simple commands
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the parser
+        """
+        return "benchmark"
+
+    @classmethod
+    def commands(cls) -> List[Command]:
+        """
+        :return: The commands of the parser
+        """
+        return [
+            Command("echo", [("text", str)]),
+            Command("add", [("a", int), ("b", int)]),
+            Command("work", [("rounds", int)])
+        ]
+
+
+class BenchmarkBot(Bot):
+    """
+    Bot that answers the commands of the BenchmarkParser
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the bot
+        """
+        return "benchmark-bot"
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        :return: The version of the bot
+        """
+        return "1.0.0"
+
+    @classmethod
+    def parsers(cls) -> List[CommandParser]:
+        """
+        :return: The parsers of the bot
+        """
+        return [BenchmarkParser()]
+
+    def on_echo(self, sender: DbAddress, args: Dict[str, Any], _):
+        """
+        Echoes the text back to the sender
+        :param sender: The sender
+        :param args: The command arguments
+        :return: None
+        """
+        self.send_txt(sender, args["text"])
+
+    def on_add(self, sender: DbAddress, args: Dict[str, Any], _):
+        """
+        Sends the sum of the arguments to the sender
+        :param sender: The sender
+        :param args: The command arguments
+        :return: None
+        """
+        self.send_txt(sender, str(args["a"] + args["b"]))
+
+    def on_work(self, sender: DbAddress, args: Dict[str, Any], _):
+        """
+        Keeps the CPU busy for a while, then sends the result to the sender
+        :param sender: The sender
+        :param args: The command arguments
+        :return: None
+        """
+        result = sum(i * i for i in range(0, args["rounds"]))
+        self.send_txt(sender, str(result))
+
+    def on_media(self, message: MediaMessage, sender: DbAddress, _):
+        """
+        Confirms the reception of a media message
+        :param message: The media message
+        :param sender: The sender
+        :return: None
+        """
+        self.send_txt(sender, "Received {} bytes".format(len(message.data)))
+
+
+class OtherParser(CommandParser):
+    """
+    A second parser, for bots with more than one parser
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the parser
+        """
+        return "other"
+
+    @classmethod
+    def commands(cls) -> List[Command]:
+        """
+        :return: The commands of the parser
+        """
+        return [
+            Command("stats", []),
+            Command("set", [("key", str), ("value", int)])
+        ]
+
+
+class MultiParserBot(BenchmarkBot):
+    """
+    Bot with two parsers. Commands have to be prefixed with the
+    parser name, for example '!other /stats'
+    """
+
+    @classmethod
+    def parsers(cls) -> List[CommandParser]:
+        """
+        :return: The parsers of the bot
+        """
+        return [BenchmarkParser(), OtherParser()]
+
+    def on_stats(self, sender: DbAddress, _, __):
+        """
+        Sends the amount of sent messages
+        :param sender: The sender
+        :return: None
+        """
+        self.send_txt(sender, str(self.connection.sent_count))
+
+    def on_set(self, sender: DbAddress, args: Dict[str, Any], _):
+        """
+        Confirms setting a value
+        :param sender: The sender
+        :param args: The command arguments
+        :return: None
+        """
+        self.send_txt(sender, "{}={}".format(args["key"], args["value"]))
+
+
+def make_messages(
+        amount: int,
+        senders: int = 100,
+        body: Union[str, List[str]] = "/echo hello"
+) -> List[Message]:
+    """
+    Generates text messages from a given amount of senders
+    :param amount: The amount of messages
+    :param senders: The amount of different senders
+    :param body: The body of the messages. If this is a list, the
+                 messages cycle through its entries
+    :return: The messages
+    """
+    bodies = [body] if isinstance(body, str) else body
+    receiver = Address("bot")
+    return [
+        TextMessage(
+            Address("user{}".format(i % senders)),
+            receiver,
+            bodies[i % len(bodies)]
+        )
+        for i in range(0, amount)
+    ]
+
+
+def make_media_messages(
+        amount: int,
+        senders: int = 100,
+        size: int = 1024
+) -> List[Message]:
+    """
+    Generates image messages from a given amount of senders
+    :param amount: The amount of messages
+    :param senders: The amount of different senders
+    :param size: The size of the image data in bytes
+    :return: The messages
+    """
+    receiver = Address("bot")
+    data = bytes(size)
+    return [
+        MediaMessage(
+            Address("user{}".format(i % senders)),
+            receiver,
+            MediaType.IMAGE,
+            data,
+            "caption"
+        )
+        for i in range(0, amount)
+    ]
+
+
+def make_bot(
+        bot_cls: Type[Bot] = BenchmarkBot,
+        connection: Optional[FakeConnection] = None,
+        extras: Optional[Dict[str, Any]] = None,
+        location: Optional[str] = None
+) -> Bot:
+    """
+    Creates a bot in a temporary directory
+    :param bot_cls: The bot class, defaults to BenchmarkBot
+    :param connection: The connection, defaults to an empty FakeConnection
+    :param extras: The contents of the extras.json file
+    :param location: The location of the bot's files, defaults to a new
+                     temporary directory
+    :return: The bot
+    """
+    if connection is None:
+        connection = FakeConnection()
+    if location is None:
+        location = tempfile.mkdtemp(prefix="kudubot-benchmark-")
+    with open(os.path.join(location, "connection.json"), "w") as f:
+        json.dump({}, f)
+    if extras is not None:
+        with open(os.path.join(location, "extras.json"), "w") as f:
+            json.dump(extras, f)
+    return bot_cls(connection, location)
@@ -0,0 +1,141 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Set
+
+LAZY_MODULES = ["pkg_resources", "sentry_sdk", "http.server", "asyncio"]
+"""
+Modules that must not be imported when starting a regular bot
+"""
+
+DEPENDENCIES = [
+    "sqlalchemy.orm", "bokkichat.connection.Connection", "puffotter.init"
+]
+"""
+The dependencies imported by the CLI entry point. The modules they import
+themselves, like asyncio in SQLAlchemy 2.0, are not counted against kudubot
+"""
+
+
+def measure_import(modules: List[str]) -> Dict[str, float]:
+    """
+    Measures the import time of modules in a new interpreter using
+    python -X importtime
+    :param modules: The modules to import
+    :return: The time spent importing every module, not including the
+             modules it imports, in milliseconds
+    """
+    output = subprocess.run(
+        [
+            sys.executable, "-X", "importtime", "-c",
+            "import " + ", ".join(modules)
+        ],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    ).stderr
+
+    times = {}  # type: Dict[str, float]
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_time, _, name = line[12:].split("|")
+            self_us = int(self_time)
+        except ValueError:
+            # The header line
+            continue
+        times[name.strip()] = self_us / 1000
+    return times
+
+
+def loaded_lazy_modules(modules: List[str]) -> Set[str]:
+    """
+    Checks which of the lazily loaded modules are imported anyway
+    :param modules: The modules to import
+    :return: The imported lazy modules
+    """
+    return set(subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys, {}; print(' '.join([x for x in {!r} "
+            "if x in sys.modules]))".format(", ".join(modules), LAZY_MODULES)
+        ],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    ).stdout.split())
+
+
+def main():
+    """
+    Measures the import time of the CLI entry point and fails if it
+    exceeds the budget or imports modules that should be loaded lazily.
+    Both only count modules that the dependencies do not import themselves
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="kudubot.helper")
+    parser.add_argument("--budget", type=float, default=100.0,
+                        help="The import time budget in milliseconds, not "
+                             "counting modules imported by the dependencies")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The fastest run is the least disturbed by other processes
+    dependencies = set(measure_import(DEPENDENCIES))
+    times = min(
+        [measure_import([args.module]) for _ in range(0, args.repeat)],
+        key=lambda x: sum(x.values())
+    )
+    packages = {}  # type: Dict[str, float]
+    for name, duration in times.items():
+        if name not in dependencies:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + duration
+    total = sum(packages.values())
+
+    print("Import time of {}: {:.1f}ms, {:.1f}ms without its dependencies "
+          "(budget {:.1f}ms)".format(
+              args.module, sum(times.values()), total, args.budget
+          ))
+    for package, duration in sorted(
+            packages.items(), key=lambda x: x[1], reverse=True
+    )[0:10]:
+        print("{:>24} {:>8.1f}ms".format(package, duration))
+
+    failed = False
+    lazy = loaded_lazy_modules([args.module]) \
+        - loaded_lazy_modules(DEPENDENCIES)
+    if len(lazy) > 0:
+        print("Imported modules that should be loaded lazily: " +
+              " ".join(sorted(lazy)))
+        failed = True
+    if total > args.budget:
+        print("Import time budget exceeded")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
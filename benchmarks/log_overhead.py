@@ -0,0 +1,114 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import logging
+from typing import Dict, Any, Optional
+from benchmarks.fakes import FakeConnection, make_bot, make_messages
+
+MESSAGES = 5000
+
+
+def slow_down(handler: logging.Handler, write_delay: float):
+    """
+    Simulates slow storage by delaying every write of a handler
+    :param handler: The handler
+    :param write_delay: The delay in seconds
+    :return: None
+    """
+    emit = handler.emit
+
+    def slow_emit(record: logging.LogRecord):
+        time.sleep(write_delay)
+        emit(record)
+
+    setattr(handler, "emit", slow_emit)
+
+
+def measure(
+        extras: Optional[Dict[str, Any]],
+        synchronous: bool = False,
+        write_delay: float = 0.0
+) -> float:
+    """
+    Measures the time it takes a bot to handle messages
+    :param extras: The extras of the bot
+    :param synchronous: Replaces the queue handler with a plain
+                        FileHandler, the way logging worked before
+    :param write_delay: Delays every write to the log file by this
+                        amount of seconds
+    :return: The average time per message in microseconds
+    """
+    connection = FakeConnection(make_messages(MESSAGES))
+    # Removes the handlers of previously measured bots
+    for logger in [logging.getLogger("BenchmarkBot"), connection.logger]:
+        logger.handlers.clear()
+
+    bot = make_bot(connection=connection, extras=extras)
+    handler = bot.log_listener.handlers[0]
+    if synchronous:
+        bot.stop_logging()
+        formatter = handler.formatter
+        handler = logging.FileHandler(bot.logfile)
+        handler.setFormatter(formatter)
+        for logger in [bot.logger, connection.logger]:
+            for queue_handler in list(logger.handlers):
+                logger.removeHandler(queue_handler)
+            logger.addHandler(handler)
+    if write_delay > 0:
+        slow_down(handler, write_delay)
+
+    def callback(_: FakeConnection, message):
+        bot.logger.info("Received message %s", message)
+        bot.on_msg(message)
+
+    start = time.perf_counter()
+    connection.loop(callback)
+    duration = time.perf_counter() - start
+
+    bot.stop_logging()
+    assert len(connection.sent) == MESSAGES
+    return duration / MESSAGES * 1000000
+
+
+def main():
+    """
+    Compares the per-message time of a bot with synchronous file logging,
+    queued file logging and disabled debug/info logging, on regular and
+    on simulated slow storage
+    :return: None
+    """
+    # Warm-up, creates the database tables and imports
+    measure({"log_level": "WARNING"})
+
+    print("{:>12} {:>14} {:>18}".format(
+        "logging", "per msg (us)", "slow disk (us)"
+    ))
+    for name, extras, synchronous in [
+        ("synchronous", None, True),
+        ("queued", None, False),
+        ("off", {"log_level": "WARNING"}, False)
+    ]:
+        fast = min(measure(extras, synchronous) for _ in range(0, 3))
+        slow = measure(extras, synchronous, 0.0005)
+        print("{:>12} {:>14.1f} {:>18.1f}".format(name, fast, slow))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import timeit
+from typing import List, Tuple, Dict, Any, Type
+from kudubot.exceptions import ParseError
+from kudubot.parsing.Command import Command
+from kudubot.parsing.CommandParser import CommandParser
+from kudubot.test.TestCommandParser import legacy_argumentize
+
+
+def make_parser(size: int) -> Type[CommandParser]:
+    """
+    Generates a parser class with a given amount of commands
+    :param size: The amount of commands
+    :return: The parser class
+    """
+    generated = [
+        Command("command{}".format(i), [("a", int), ("b", str)])
+        for i in range(0, size)
+    ]
+
+    class BenchmarkParser(CommandParser):
+
+        @classmethod
+        def name(cls) -> str:
+            return "benchmark{}".format(size)
+
+        @classmethod
+        def commands(cls) -> List[Command]:
+            return generated
+
+    return BenchmarkParser
+
+
+def benchmark_tokenizer():
+    """
+    Measures the throughput of the tokenizer on long message bodies
+    :return: None
+    """
+    print("{:>10} {:>14} {:>14} {:>14}".format(
+        "body (kB)", "legacy (MB/s)", "tokens (MB/s)", "parse (MB/s)"
+    ))
+    parser = make_parser(10)()
+    for words in [100, 1000, 10000]:
+        text = "/command1 " + " ".join(
+            "word{} \"quoted text {}\"".format(i, i) for i in range(words)
+        )
+        size = len(text) / 1000000
+        number = max(1, 20000 // words)
+
+        def throughput(func: Any) -> float:
+            return size * number / min(timeit.repeat(
+                func, number=number, repeat=3
+            ))
+
+        def parse():
+            try:
+                parser.parse(text)
+            except ParseError:
+                pass
+
+        print("{:>10.1f} {:>14.1f} {:>14.1f} {:>14.1f}".format(
+            size * 1000,
+            throughput(lambda: legacy_argumentize(text)),
+            throughput(lambda: CommandParser._argumentize(text)),
+            throughput(parse)
+        ))
+
+
+def linear_parse(parser: CommandParser, text: str) \
+        -> Tuple[str, Dict[str, Any]]:
+    """
+    Parses a command by validating every command of the parser in order.
+    This is how CommandParser.parse worked before the command index existed.
+    :param parser: The parser to use
+    :param text: The text to parse
+    :return: The (command, arguments)
+    """
+    args = parser._argumentize(text)
+    try:
+        command_arg = args.pop(0)
+        if not command_arg.startswith("/"):
+            raise ParseError("Incorrect command symbol")
+        command_arg = command_arg.replace("/", "")
+        for command in parser.commands():
+            if command.validate(command_arg, args):
+                return command_arg.lower(), command.resolve_args(args)
+        raise ParseError("Incorrect command name")
+    except IndexError:
+        raise ParseError("Incorrect amount of arguments")
+
+
+def main():
+    """
+    Compares the linear command lookup with the indexed lookup and
+    measures the tokenizer
+    :return: None
+    """
+    benchmark_tokenizer()
+    print()
+
+    print("{:>8} {:>14} {:>14} {:>8}".format(
+        "commands", "linear (us)", "indexed (us)", "speedup"
+    ))
+    for size in [10, 100, 1000]:
+        parser = make_parser(size)()
+        # Worst case for the linear scan: the last command matches
+        text = "/command{} 42 \"some text\"".format(size - 1)
+        assert linear_parse(parser, text) == parser.parse(text)
+
+        number = 20000 if size < 1000 else 2000
+        linear = min(timeit.repeat(
+            lambda: linear_parse(parser, text), number=number, repeat=3
+        )) / number * 1000000
+        indexed = min(timeit.repeat(
+            lambda: parser.parse(text), number=number, repeat=3
+        )) / number * 1000000
+
+        print("{:>8} {:>14.2f} {:>14.2f} {:>7.1f}x".format(
+            size, linear, indexed, linear / indexed
+        ))
+
+
+if __name__ == "__main__":
+    main()
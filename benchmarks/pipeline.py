@@ -0,0 +1,165 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from typing import List, Dict, Callable, Tuple, Type
+from bokkichat.entities.message.Message import Message
+from kudubot.Bot import Bot
+from benchmarks.fakes import FakeConnection, BenchmarkBot, MultiParserBot, \
+    make_bot, make_messages, make_media_messages
+
+WORKLOADS = {
+    "parse_heavy": (BenchmarkBot, lambda amount: make_messages(
+        amount, 50, [
+            "/echo hello",
+            "/add 12 30",
+            "/echo \"a longer quoted argument with \\\"quotes\\\"\"",
+            "/add one two",
+            "/unknown 1 2 3",
+            "just some text"
+        ]
+    )),
+    "new_senders": (BenchmarkBot, lambda amount: make_messages(
+        amount, amount, "/add 1 2"
+    )),
+    "help_ping": (BenchmarkBot, lambda amount: make_messages(
+        amount, 50, ["/help", "ping", "bg_ping", "/start"]
+    )),
+    "multi_parser": (MultiParserBot, lambda amount: make_messages(
+        amount, 50, [
+            "!benchmark /echo hello",
+            "!other /stats",
+            "!OTHER /set limit 5",
+            "!missing /echo hello",
+            "/echo without parser"
+        ]
+    )),
+    "media": (BenchmarkBot, lambda amount: make_media_messages(amount, 50))
+}  # type: Dict[str, Tuple[Type[Bot], Callable[[int], List[Message]]]]
+"""
+The benchmarked workloads, consisting of the bot class and a function
+that generates a given amount of messages
+"""
+
+
+def run_workload(name: str, amount: int) -> Dict[str, float]:
+    """
+    Replays the messages of a workload through Bot.on_msg of a fresh bot
+    using an SQLite database
+    :param name: The name of the workload
+    :param amount: The amount of messages
+    :return: The messages per second, the peak amount of traced memory
+             and the memory still allocated after the run, per message
+    """
+    bot_cls, generator = WORKLOADS[name]
+    warmup = generator(min(amount, 200))
+    messages = generator(amount)
+    connection = FakeConnection(keep_sent=False)
+    bot = make_bot(bot_cls, connection, {"log_level": "WARNING"})
+
+    for message in warmup:
+        bot.on_msg(message)
+
+    start = time.perf_counter()
+    for message in messages:
+        bot.on_msg(message)
+    duration = time.perf_counter() - start
+
+    # Allocations are measured in a separate run, tracing slows down
+    # the execution considerably
+    messages = generator(amount)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for message in messages:
+        bot.on_msg(message)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    bot.stop_logging()
+    return {
+        "messages_per_second": amount / duration,
+        "peak_kib": (peak - before) / 1024,
+        "retained_bytes_per_message": (after - before) / amount
+    }
+
+
+def main():
+    """
+    Runs the benchmark workloads and optionally compares the results with
+    previously saved results
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=5000,
+                        help="The amount of messages per workload")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS.keys(),
+                        default=list(WORKLOADS.keys()))
+    parser.add_argument("--save", help="Saves the results to this file")
+    parser.add_argument("--compare",
+                        help="Compares the results with a saved file and "
+                             "fails if the throughput of a workload "
+                             "decreased by more than the tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    baseline = {}  # type: Dict[str, Dict[str, float]]
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    print("{:>14} {:>12} {:>12} {:>16} {:>10}".format(
+        "workload", "msgs/s", "peak (KiB)", "retained (B/msg)", "change"
+    ))
+    results = {}
+    regressions = []
+    for name in args.workloads:
+        result = run_workload(name, args.messages)
+        results[name] = result
+
+        change = ""
+        if name in baseline:
+            ratio = result["messages_per_second"] / \
+                baseline[name]["messages_per_second"]
+            change = "{:+.1f}%".format((ratio - 1) * 100)
+            if ratio < 1 - args.tolerance:
+                regressions.append(name)
+
+        print("{:>14} {:>12.0f} {:>12.1f} {:>16.1f} {:>10}".format(
+            name,
+            result["messages_per_second"],
+            result["peak_kib"],
+            result["retained_bytes_per_message"],
+            change
+        ))
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if len(regressions) > 0:
+        print("Throughput regressions: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import sys
+import time
+from typing import List
+from benchmarks.fakes import make_bot, make_messages, FakeConnection
+
+MESSAGES = 400
+SENDERS = 50
+ROUNDS = 20000
+
+
+def measure(processes: int) -> float:
+    """
+    Handles CPU-heavy commands using a given amount of worker processes
+    :param processes: The amount of worker processes, 0 handles the
+                      messages in the bot's process
+    :return: The message throughput
+    """
+    messages = make_messages(
+        MESSAGES, SENDERS, "/work {}".format(ROUNDS)
+    )
+    connection = FakeConnection(messages, keep_sent=False)
+    bot = make_bot(connection=connection, extras={
+        "log_level": "WARNING",
+        "shard_processes": processes
+    })
+
+    start = time.perf_counter()
+    bot.start()
+    duration = time.perf_counter() - start
+
+    bot.stop_logging()
+    assert connection.sent_count == MESSAGES
+    return MESSAGES / duration
+
+
+def main(process_counts: List[int]):
+    """
+    Compares the throughput of CPU-bound handlers for different amounts
+    of worker processes. Includes the time it takes to start the workers
+    :param process_counts: The amounts of worker processes to measure
+    :return: None
+    """
+    print("CPU cores: {}".format(os.cpu_count()))
+    print("{:>10} {:>10} {:>8}".format("processes", "msgs/s", "speedup"))
+    baseline = measure(0)
+    print("{:>10} {:>10.0f} {:>7.2f}x".format(0, baseline, 1))
+    for processes in process_counts:
+        throughput = measure(processes)
+        print("{:>10} {:>10.0f} {:>7.2f}x".format(
+            processes, throughput, throughput / baseline
+        ))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8])
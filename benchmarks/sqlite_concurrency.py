@@ -0,0 +1,139 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import logging
+from threading import Thread, Event
+from typing import List, Dict
+from kudubot.db.Address import Address
+from benchmarks.fakes import make_bot, make_messages, FakeConnection
+
+HANDLER_THREADS = 8
+MESSAGES_PER_THREAD = 300
+
+
+class ErrorCounter(logging.Handler):
+    """
+    Counts the errors logged while handling messages
+    """
+
+    def __init__(self):
+        """
+        Initializes the counter
+        """
+        super().__init__(logging.ERROR)
+        self.errors = 0
+
+    def emit(self, record: logging.LogRecord):
+        """
+        Counts an error
+        :param record: The log record
+        :return: None
+        """
+        self.errors += 1
+
+
+def measure(performance_mode: bool) -> Dict[str, float]:
+    """
+    Handles messages from new senders on several threads while a
+    background thread keeps writing to the database
+    :param performance_mode: Whether or not to enable the SQLite
+                             performance mode
+    :return: The message throughput, background write throughput and
+             the amount of errors
+    """
+    connection = FakeConnection(keep_sent=False)
+    bot = make_bot(connection=connection, extras={
+        "log_level": "WARNING",
+        "sqlite_performance_mode": performance_mode
+    })
+    counter = ErrorCounter()
+    bot.logger.addHandler(counter)
+    errors = []  # type: List[Exception]
+
+    def handle(thread_index: int):
+        messages = make_messages(MESSAGES_PER_THREAD, MESSAGES_PER_THREAD)
+        for message in messages:
+            message.sender.address += "-{}".format(thread_index)
+            try:
+                bot.on_msg(message)
+            except Exception as e:
+                errors.append(e)
+
+    stopped = Event()
+    background_writes = [0]
+
+    def write_in_background():
+        db_session = bot.sessionmaker.session_factory()
+        while not stopped.is_set():
+            try:
+                db_session.add(
+                    Address(address="bg-{}".format(background_writes[0]))
+                )
+                db_session.commit()
+                background_writes[0] += 1
+            except Exception as e:
+                db_session.rollback()
+                errors.append(e)
+        db_session.close()
+
+    background = Thread(target=write_in_background)
+    handlers = [
+        Thread(target=handle, args=(i,)) for i in range(0, HANDLER_THREADS)
+    ]
+
+    start = time.perf_counter()
+    background.start()
+    for thread in handlers:
+        thread.start()
+    for thread in handlers:
+        thread.join()
+    duration = time.perf_counter() - start
+    stopped.set()
+    background.join()
+
+    bot.stop_logging()
+    return {
+        "messages_per_second":
+            HANDLER_THREADS * MESSAGES_PER_THREAD / duration,
+        "background_writes_per_second": background_writes[0] / duration,
+        "errors": len(errors) + counter.errors
+    }
+
+
+def main():
+    """
+    Compares concurrent writes with and without the SQLite performance mode
+    :return: None
+    """
+    print("{:>12} {:>10} {:>14} {:>8}".format(
+        "mode", "msgs/s", "bg writes/s", "errors"
+    ))
+    for name, performance_mode in [("default", False), ("performance", True)]:
+        result = measure(performance_mode)
+        print("{:>12} {:>10.0f} {:>14.0f} {:>8}".format(
+            name,
+            result["messages_per_second"],
+            result["background_writes_per_second"],
+            result["errors"]
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import sys
+import time
+import json
+import resource
+import tempfile
+import subprocess
+from typing import List, Dict
+
+BOTS = 20
+
+
+def load_bots(shared: bool, amount: int, db_uri: str) -> Dict[str, float]:
+    """
+    Loads bots in this process and measures the resources used
+    :param shared: Whether or not to load the bots into a Supervisor
+    :param amount: The amount of bots
+    :param db_uri: The database all bots use
+    :return: The startup time in seconds and the peak memory in KiB
+    """
+    start = time.perf_counter()
+    from kudubot.Supervisor import Supervisor
+    from benchmarks.fakes import BenchmarkBot, FakeConnection
+
+    supervisor = Supervisor()
+    for _ in range(0, amount):
+        location = tempfile.mkdtemp(prefix="kudubot-benchmark-")
+        with open(os.path.join(location, "connection.json"), "w") as f:
+            json.dump({}, f)
+        with open(os.path.join(location, "extras.json"), "w") as f:
+            json.dump({"db_uri": db_uri, "log_level": "WARNING"}, f)
+        if shared:
+            supervisor.add(BenchmarkBot, FakeConnection, location)
+        else:
+            BenchmarkBot.load(FakeConnection, location)
+
+    return {
+        "seconds": time.perf_counter() - start,
+        "kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def measure(shared: bool, db_uri: str) -> Dict[str, float]:
+    """
+    Measures the resources needed to run BOTS bots, either one per
+    process or all of them in one supervisor process
+    :param shared: Whether or not to use a supervisor
+    :param db_uri: The database all bots use
+    :return: The total startup time and memory
+    """
+    processes = 1 if shared else BOTS
+    amount = BOTS if shared else 1
+    results = []  # type: List[Dict[str, float]]
+    for _ in range(0, processes):
+        start = time.perf_counter()
+        output = subprocess.check_output([
+            sys.executable, "-m", "benchmarks.supervisor",
+            "--child", str(int(shared)), str(amount), db_uri
+        ])
+        result = json.loads(output.decode("utf-8"))
+        # Includes the interpreter's startup
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+    return {
+        "seconds": sum(result["seconds"] for result in results),
+        "kib": sum(result["kib"] for result in results)
+    }
+
+
+def main():
+    """
+    Compares running BOTS bots as separate processes with running them
+    in one supervisor process
+    :return: None
+    """
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        print(json.dumps(load_bots(
+            bool(int(sys.argv[2])), int(sys.argv[3]), sys.argv[4]
+        )))
+        return
+
+    db_uri = "sqlite:///" + tempfile.mktemp(prefix="kudubot-", suffix=".db")
+    print("{:>12} {:>12} {:>14}".format("mode", "startup s", "memory MiB"))
+    for name, shared in [("processes", False), ("supervisor", True)]:
+        result = measure(shared, db_uri)
+        print("{:>12} {:>12.2f} {:>14.1f}".format(
+            name, result["seconds"], result["kib"] / 1024
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import asyncio
+from contextvars import copy_context
+from time import perf_counter
+from functools import partial
+from itertools import count
+from inspect import isawaitable, iscoroutinefunction
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.session import Session
+from bokkichat.connection.Connection import Connection
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from kudubot.Bot import Bot
+from kudubot.db.Address import Address
+from kudubot.db.config.DbConfig import DbConfig
+from kudubot.exceptions import ConfigurationError
+from kudubot.execution.Scheduler import Scheduler, Job
+from kudubot.execution.ShardedExecutor import ShardedExecutor
+from kudubot.parsing.CommandParser import CommandParser
+from typing import Optional, Dict, Any, Callable, Union, Coroutine, \
+    Set, cast, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+
+class AsyncBot(Bot):
+    """
+    A Bot whose on_X methods and background iterations are coroutines.
+    Background jobs registered using schedule() may be coroutines as well.
+    Messages are handled concurrently on an asyncio event loop, while the
+    blocking bokkichat connection runs in a separate thread.
+    Messages of the same sender are still handled in the order they were
+    received.
+
+    Every message and coroutine background job gets its own SQLAlchemy
+    asyncio session (AsyncSession), see async_sessions. Objects are not
+    expired when the session is committed, since loading them again
+    requires awaiting. Regular methods, for example is_authorized or
+    on_X methods that are not coroutines, receive the same session.
+    Blocking operations like parsing and sending messages run in a
+    thread pool, handlers may run their own using run_blocking().
+    """
+
+    def __init__(
+            self,
+            connection: Connection,
+            location: str,
+            db_uri: Optional[str] = None,
+            db_config: Optional[DbConfig] = None,
+            engine_factory: Optional[Callable[[DbConfig], Engine]] = None,
+            scheduler: Optional[Scheduler] = None
+    ):
+        """
+        Initializes the bot
+        :param connection: The connection the bot should use
+        :param location: The location of config and DB files
+        :param db_uri: Specifies a custom database URI. Defaults to the
+                       'db_uri' extra if it is set
+        :param db_config: Specifies a custom database configuration,
+                          including options for the database engine.
+                          Takes precedence over db_uri
+        :param engine_factory: Creates the database engine from the
+                               database configuration. Allows sharing
+                               engines between bots
+        :param scheduler: A scheduler shared with other bots. Its jobs are
+                          not executed by the bot's background thread,
+                          the owner of the scheduler has to run it
+        """
+        self.loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self.async_db_engine = None  # type: Optional[AsyncEngine]
+        self.async_sessionmaker = None  # type: Optional[sessionmaker]
+        self._message_slots = None  # type: Optional[asyncio.Semaphore]
+        self._sender_tasks = {}  # type: Dict[str, asyncio.Future]
+        self._detached_tasks = set()  # type: Set[asyncio.Future]
+        self.blocking_executor = ThreadPoolExecutor(
+            max_workers=self.blocking_workers,
+            thread_name_prefix=self.__class__.__name__ + "-blocking"
+        )
+        super().__init__(
+            connection, location, db_uri, db_config, engine_factory, scheduler
+        )
+        if self.async_sessions:
+            self._create_async_engine()
+
+    @property
+    def async_sessions(self) -> bool:
+        """
+        Whether or not handlers and coroutine background jobs receive
+        asyncio database sessions. Requires SQLAlchemy 1.4 or later and
+        the asyncio driver of the database, for example aiosqlite for
+        SQLite. If disabled using the 'async_sessions' extra, they receive
+        blocking sessions, whose database operations block the event loop
+        unless they are run using run_blocking()
+        :return: True if asyncio sessions are used
+        """
+        return bool(self.extras.get("async_sessions", True))
+
+    def _create_async_engine(self):
+        """
+        Creates the asyncio database engine and session factory
+        :return: None
+        """
+        try:
+            from sqlalchemy.ext.asyncio import AsyncSession
+            self.async_db_engine = self.db_config.create_async_engine()
+        except ImportError as e:
+            raise ConfigurationError(
+                "Asyncio database sessions require SQLAlchemy 1.4 or later "
+                "and an asyncio database driver ({}). Set the "
+                "'async_sessions' extra to false to use blocking "
+                "sessions".format(e)
+            )
+        self.async_sessionmaker = sessionmaker(
+            bind=self.async_db_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+
+    def _open_session(self) -> Union[Session, "AsyncSession"]:
+        """
+        :return: A new database session for a message or background job
+        """
+        if self.async_sessionmaker is not None:
+            return self.async_sessionmaker()
+        return self.sessionmaker.session_factory()
+
+    async def _close_session(
+            self,
+            db_session: Union[Session, "AsyncSession"]
+    ):
+        """
+        Closes a session created using _open_session()
+        :param db_session: The session
+        :return: None
+        """
+        if self.async_sessionmaker is not None:
+            await db_session.close()
+        else:
+            db_session.close()
+
+    @property
+    def blocking_workers(self) -> int:
+        """
+        The amount of threads used for blocking operations like database
+        access and sending messages
+        :return: The amount of threads
+        """
+        return 32
+
+    async def run_blocking(self, func: Callable, *args: Any) -> Any:
+        """
+        Runs a blocking function in a separate thread. The function sees
+        the context variables of the caller, for example the connection
+        that replies are sent with
+        :param func: The function to run
+        :param args: The arguments for the function
+        :return: The return value of the function
+        """
+        loop = asyncio.get_event_loop()
+        context = copy_context()
+        return await loop.run_in_executor(
+            self.blocking_executor, partial(context.run, func, *args)
+        )
+
+    async def send_txt_async(
+            self,
+            receiver: Address,
+            body: str,
+            title: Optional[str] = ""
+    ):
+        """
+        Sends a text message without blocking the event loop
+        :param receiver: The receiver of the text message
+        :param body: The body of the text message
+        :param title: The (optional) title of the message
+        :return: None
+        """
+        await self.run_blocking(self.send_txt, receiver, body, title)
+
+    def on_msg(self, message: Message):
+        """
+        Handles a message from outside the event loop.
+        Blocks until the message was handled. If called from a coroutine
+        running on the bot's event loop, the message is handled by a
+        separate task instead, since waiting would block the loop.
+        :param message: The received message
+        :return: None
+        """
+        if self.loop is not None and self.loop.is_running():
+            if self._in_event_loop():
+                task = self.loop.create_task(self.on_msg_async(message))
+                self._detached_tasks.add(task)
+                task.add_done_callback(self._detached_tasks.discard)
+            else:
+                self._run_threadsafe(self.on_msg_async(message))
+        else:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.on_msg_async(message))
+                if self.async_db_engine is not None:
+                    # Pooled connections belong to the event loop
+                    loop.run_until_complete(self.async_db_engine.dispose())
+            finally:
+                loop.close()
+
+    def _in_event_loop(self) -> bool:
+        """
+        :return: Whether or not the calling thread runs the bot's event loop
+        """
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _run_threadsafe(self, coroutine: Coroutine) -> Any:
+        """
+        Runs a coroutine on the bot's event loop from another thread and
+        waits for its result
+        :param coroutine: The coroutine to run
+        :return: The result of the coroutine
+        :raises RuntimeError: If called from the event loop's thread,
+                              where waiting for the result would deadlock
+        """
+        if self._in_event_loop():
+            coroutine.close()
+            raise RuntimeError(
+                "Can't wait for a coroutine on the event loop's thread"
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def on_msg_async(self, message: Message):
+        """
+        The callback coroutine is called for every received message.
+        This automatically delegates message handling to the on_text,
+        on_media and on_command coroutines.
+        :param message: The received message
+        :return: None
+        """
+        if not await self.run_blocking(self._pre_callback_blocking, message):
+            return
+
+        db_session = self._open_session()
+        label = None  # type: Optional[str]
+        started = 0.0
+        try:
+            sender = await self._lookup_sender(
+                db_session, message.sender.address
+            )
+
+            started = perf_counter()
+            if message.is_text():
+                message = cast(TextMessage, message)  # type: TextMessage
+
+                parsed = await self.run_blocking(
+                    self._timed, "parse", "", self.parse, message
+                )
+                started = perf_counter()
+                if parsed is None:
+                    label = "text"
+                    await self.on_text(message, sender, db_session)
+                else:
+                    parser, command, args = parsed
+                    label = command
+                    await self.on_command(
+                        parser,
+                        command,
+                        args,
+                        sender,
+                        db_session
+                    )
+
+            elif message.is_media():
+                message = cast(MediaMessage, message)  # type: MediaMessage
+
+                label = "media"
+                await self.on_media(message, sender, db_session)
+            else:
+                pass
+        except Exception as e:
+            self.error_reporter.report(e, "Exception during Message")
+        finally:
+            if label is not None:
+                self.metrics.observe(
+                    "handler", perf_counter() - started, label
+                )
+            await self._close_session(db_session)
+
+    async def _lookup_sender(
+            self,
+            db_session: Union[Session, "AsyncSession"],
+            address: str
+    ) -> Address:
+        """
+        Retrieves the database entry of a message's sender, creating it if
+        it does not exist yet
+        :param db_session: The database session of the message
+        :param address: The address of the sender
+        :return: The database entry of the sender
+        """
+        if self.async_sessionmaker is None:
+            return await self.run_blocking(
+                self._timed, "sender_lookup", "",
+                self.address_book.get_or_create, db_session, address
+            )
+
+        started = perf_counter()
+        try:
+            return await self.address_book.get_or_create_async(
+                db_session, address
+            )
+        finally:
+            self.metrics.observe("sender_lookup", perf_counter() - started)
+
+    async def on_text(
+            self,
+            message: TextMessage,
+            sender: Address,
+            db_session: Union[Session, "AsyncSession"]
+    ):
+        """
+        Handles text messages that aren't commands. Those are by default simply
+        ignored.
+        :param message: The received message
+        :param sender: The database Address object of the sender
+        :param db_session: A valid database session
+        :return: None
+        """
+        pass
+
+    async def on_media(
+            self,
+            message: MediaMessage,
+            sender: Address,
+            db_session: Union[Session, "AsyncSession"]
+    ):
+        """
+        Handles media messages. Those are by default simply ignored.
+        :param message: The received message
+        :param sender: The database Address object of the sender
+        :param db_session: A valid database session
+        :return: None
+        """
+        pass
+
+    # noinspection PyUnusedLocal
+    async def on_command(
+            self,
+            parser: CommandParser,
+            command: str,
+            args: Dict[str, Any],
+            sender: Address,
+            db_session: Union[Session, "AsyncSession"]
+    ):
+        """
+        Handles text messages that have been parsed as commands.
+        Automatically forwards the parameters to the 'on_X' method of the
+        command if it exists. 'on_X' methods may be coroutines or regular
+        methods, regular methods block the event loop while they run.
+        :param parser: The parser containing the command
+        :param command: The command name
+        :param args: The arguments of the command
+        :param sender: The database address of the sender
+        :param db_session: A valid database session
+        :return: None
+        """
+        handler = self.command_handlers.get(command)
+        if handler is not None:
+            result = handler(sender, args, db_session)
+            if isawaitable(result):
+                await result
+
+    def start(self):
+        """
+        Starts the bot's event loop and runs it until the connection's
+        loop ends
+        :return: None
+        """
+        self.logger.info("Starting Bot")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.start_async())
+        except ConfigurationError as e:
+            print("Invalid Coniguration Detected")
+            raise e
+        finally:
+            if not self.shares_scheduler:
+                self.scheduler.stop()
+            self.loop.close()
+
+    async def start_async(self):
+        """
+        Starts the background thread and runs the blocking loop of every
+        connection in a separate thread
+        :return: None
+        """
+        self.loop = asyncio.get_event_loop()
+        self._message_slots = asyncio.Semaphore(self.max_pending_messages)
+        self._start_send_queue()
+        self._start_metrics_server()
+        if not self.shares_scheduler:
+            self.bg_thread.start()
+
+        sharded_executor = None  # type: Optional[ShardedExecutor]
+        if self.shard_processes > 0:
+            sharded_executor = ShardedExecutor(self, self.shard_processes)
+            sharded_executor.start()
+
+        def dispatch(connection: Connection, message: Message):
+            if sharded_executor is not None:
+                sharded_executor.submit(connection, message)
+                return
+            # Waits until the message was accepted by the event loop,
+            # which limits the amount of pending messages
+            self._run_threadsafe(self._receive(connection, message))
+
+        try:
+            await asyncio.gather(*[
+                self.loop.run_in_executor(None, partial(
+                    connection.loop,
+                    callback=self._receive_callback(connection, dispatch)
+                ))
+                for connection in self.connections
+            ])
+            # Messages of a sender are chained, so waiting for the latest
+            # task of every sender waits for all received messages.
+            # Handlers may start further tasks using on_msg
+            while True:
+                pending = list(self._sender_tasks.values()) + \
+                    list(self._detached_tasks)
+                if len(pending) == 0:
+                    break
+                await asyncio.wait(pending)
+        finally:
+            if sharded_executor is not None:
+                await self.loop.run_in_executor(
+                    None, sharded_executor.shutdown
+                )
+            if self.async_db_engine is not None:
+                await self.async_db_engine.dispose()
+
+    async def _receive(self, connection: Connection, message: Message):
+        """
+        Schedules the handling of a received message once a message slot
+        is free. Messages of a sender are handled after the previous
+        message of that sender.
+        :param connection: The connection the message arrived on
+        :param message: The received message
+        :return: None
+        """
+        await self._message_slots.acquire()
+
+        address = message.sender.address
+        previous = self._sender_tasks.get(address)
+        task = asyncio.ensure_future(
+            self._handle(connection, message, previous)
+        )
+        self._sender_tasks[address] = task
+
+        def cleanup(finished: asyncio.Future):
+            if self._sender_tasks.get(address) is finished:
+                self._sender_tasks.pop(address)
+        task.add_done_callback(cleanup)
+
+    async def _handle(
+            self,
+            connection: Connection,
+            message: Message,
+            previous: Optional[asyncio.Future]
+    ):
+        """
+        Handles a message after the previous message of the sender.
+        Every task has its own context, so messages sent while handling
+        the message use the connection it arrived on
+        :param connection: The connection the message arrived on
+        :param message: The message to handle
+        :param previous: The handling task of the previous message
+        :return: None
+        """
+        self._reply_connection.set(connection)
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            await self.on_msg_async(message)
+        finally:
+            self._message_slots.release()
+
+    def _store_in_address_book(self, message: Message) -> bool:
+        """
+        Stores an address in the bot's address book. With asyncio sessions,
+        this happens during the sender lookup in on_msg_async instead
+        :param message: The received message
+        :return: Whether or not handling the message should continue
+        """
+        if self.async_sessionmaker is not None:
+            return True
+        return super()._store_in_address_book(message)
+
+    def _pre_callback_blocking(self, message: Message) -> bool:
+        """
+        Runs pre_callback in a thread of the blocking executor
+        :param message: The message to check
+        :return: True if the execution continues, False otherwise
+        """
+        try:
+            return self._timed("pre_callback", "", self.pre_callback, message)
+        finally:
+            self.sessionmaker.remove()
+
+    def schedule(
+            self,
+            func: Callable[[Union[Session, "AsyncSession"]], Any],
+            interval: Union[float, Callable[[], float]],
+            jitter: float = 0.0,
+            overlap: str = Job.SKIP,
+            name: Optional[str] = None
+    ) -> Job:
+        """
+        Registers a background job that is executed periodically while the
+        bot is running. Coroutine functions are executed on the bot's
+        event loop, regular functions on the scheduler's threads.
+        :param func: The function to execute. Receives a database session
+        :param interval: The time between executions in seconds, or a
+                         function that returns it
+        :param jitter: Executions are delayed by a random amount of up to
+                       this many seconds
+        :param overlap: What happens if the job is still running when it
+                        is due again. Job.SKIP skips that execution,
+                        Job.QUEUE executes it once the running execution
+                        finished and Job.ALLOW executes it concurrently
+        :param name: The name of the job, defaults to the function's name
+        :return: The job, can be used to remove it from self.scheduler
+        """
+        if not iscoroutinefunction(func):
+            return super().schedule(func, interval, jitter, overlap, name)
+        if name is None:
+            name = func.__name__
+
+        async def run_coroutine():
+            db_session = self._open_session()
+            try:
+                await func(db_session)
+            except Exception as e:
+                self.error_reporter.report(
+                    e, "Exception in background job " + name
+                )
+            finally:
+                await self._close_session(db_session)
+
+        def run_job():
+            if self.loop is None or not self.loop.is_running():
+                return
+            # Blocks the scheduler thread, so overlap policies still apply
+            self._run_threadsafe(run_coroutine())
+
+        return self.scheduler.add_job(run_job, interval, jitter, overlap, name)
+
+    def _schedule_bg_iteration(self):
+        """
+        Registers the bg_iteration coroutine as a background job.
+        Called after init(), bg_pause is read again for every iteration
+        :return: None
+        """
+        iterations = count()
+
+        async def bg_iteration(db_session: Union[Session, "AsyncSession"]):
+            iteration = next(iterations)
+            self.logger.debug(
+                "Starting background iteration " + str(iteration)
+            )
+            await self.bg_iteration(iteration, db_session)
+
+        self.schedule(
+            bg_iteration, lambda: self.bg_pause, overlap=self.bg_overlap
+        )
+
+    # noinspection PyUnusedLocal,PyMethodMayBeStatic
+    async def bg_iteration(
+            self,
+            iteration: int,
+            db_session: Union[Session, "AsyncSession"]
+    ):
+        """
+        Executes a background iteration. By default this does nothing.
+        This is supposed to be overriden by child classes to implement
+        background functionality
+        :param iteration: The iteration count. Useful for differentiating
+                          between actions that have different repetition rates
+        :param db_session: The database session to use
+        :return:
+        """
+        pass
@@ -18,14 +18,20 @@ along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import os
-import time
 import json
+import atexit
 import logging
-import traceback
-from functools import wraps
+import hashlib
+from time import perf_counter
+from queue import SimpleQueue
+from functools import wraps, partial
+from itertools import count
+from inspect import iscoroutinefunction
 from threading import Thread
-from sentry_sdk import capture_exception
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from logging.handlers import QueueListener, RotatingFileHandler, \
+    TimedRotatingFileHandler
+from sqlalchemy.engine import Engine, Connection as DbConnection
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm import sessionmaker, scoped_session
 from bokkichat.exceptions import InvalidSettings
@@ -33,13 +39,30 @@ from bokkichat.connection.Connection import Connection
 from bokkichat.entities.message.Message import Message
 from bokkichat.entities.message.TextMessage import TextMessage
 from bokkichat.entities.message.MediaMessage import MediaMessage
-from kudubot import version as kudubot_version
+import kudubot
+from kudubot.cache.DedupWindow import DedupWindow
+from kudubot.cache.TtlCache import TtlCache
 from kudubot.db import Base
 from kudubot.db.Address import Address as Address
+from kudubot.db.AddressBook import AddressBook
+from kudubot.db.SchemaManager import SchemaManager
+from kudubot.db.config.DbConfig import DbConfig
 from kudubot.db.config.impl.SqlteConfig import SqliteConfig
+from kudubot.db.config.impl.UriConfig import UriConfig
 from kudubot.exceptions import ConfigurationError, ParseError
+from kudubot.execution.OrderedExecutor import OrderedExecutor
+from kudubot.execution.SendQueue import SendQueue
+from kudubot.execution.Scheduler import Scheduler, Job
+from kudubot.execution.ShardedExecutor import ShardedExecutor
+from kudubot.log.LogQueueHandler import LogQueueHandler
+from kudubot.metrics.Metrics import Metrics
+from kudubot.metrics.MetricsServer import MetricsServer
+from kudubot.ratelimit.KeyedTokenBuckets import KeyedTokenBuckets
 from kudubot.parsing.CommandParser import CommandParser
-from typing import Type, Optional, List, Tuple, Dict, Any, cast, Callable
+from kudubot.reporting import capture_exception, capture_message
+from kudubot.ErrorReporter import ErrorReporter
+from typing import Type, Optional, List, Tuple, Dict, Any, cast, Callable, \
+    Hashable, Union
 
 
 class Bot:
@@ -47,16 +70,68 @@ class Bot:
     The Bot class offers an abstraction layer above bokkichat
     """
 
+    _parser_registries = \
+        {}  # type: Dict[type, Tuple[List[CommandParser], Dict[str, Any]]]
+    """
+    Caches the parsers of every bot class, both as a list and keyed
+    by their names. Keyed by the bot class
+    """
+
+    HANDLER_PREFIXES = ["on_", "_on_", "handle_", "_handle_"]
+    """
+    The prefixes of command handler methods, in order of precedence
+    """
+
     # noinspection PyMethodParameters
     def auth_required(func: Callable) -> Callable:
         """
         This is a decorator that makes it possible to restrict a user's access
         to certain commands.
-        To use this, simply decorate an 'on_'-method with this decorator.
+        To use this, simply decorate a command handler method, for example
+        an 'on_'-method, with this decorator.
         The method will then only be called if the is_authorized() method
-        returns True
+        returns True.
+        Coroutine methods of an AsyncBot may be decorated as well.
+        If auth_cache_ttl is set, the decisions are cached by sender and
+        command.
         :return: None
         """
+        command = func.__name__
+        for prefix in Bot.HANDLER_PREFIXES:
+            if command.startswith(prefix):
+                command = command[len(prefix):]
+                break
+
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(
+                    self: Any,
+                    sender: Address,
+                    args: Dict[str, Any],
+                    db_session: Session
+            ):
+                authorized = self.cached_authorization(sender, command)
+                if authorized is None:
+                    if iscoroutinefunction(self.is_authorized):
+                        authorized = await self.is_authorized(
+                            sender, args, db_session
+                        )
+                    else:
+                        # Keeps blocking checks off the event loop
+                        authorized = await self.run_blocking(
+                            self.is_authorized, sender, args, db_session
+                        )
+                    self.cache_authorization(sender, command, authorized)
+                if not authorized:
+                    await self.send_txt_async(
+                        sender,
+                        self.unauthorized_message(),
+                        "Unauthorized"
+                    )
+                else:
+                    await func(self, sender, args, db_session)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(
                 self: Bot,
@@ -64,7 +139,11 @@ class Bot:
                 args: Dict[str, Any],
                 db_session: Session
         ):
-            if not self.is_authorized(sender, args, db_session):
+            authorized = self.cached_authorization(sender, command)
+            if authorized is None:
+                authorized = self.is_authorized(sender, args, db_session)
+                self.cache_authorization(sender, command, authorized)
+            if not authorized:
                 self.send_txt(
                     sender,
                     self.unauthorized_message(),
@@ -78,65 +157,155 @@ class Bot:
             self,
             connection: Connection,
             location: str,
-            db_uri: Optional[str] = None
+            db_uri: Optional[str] = None,
+            db_config: Optional[DbConfig] = None,
+            engine_factory: Optional[Callable[[DbConfig], Engine]] = None,
+            scheduler: Optional[Scheduler] = None
     ):
         """
         Initializes the bot
         :param connection: The connection the bot should use
         :param location: The location of config and DB files
-        :param db_uri: Specifies a custom database URI
+        :param db_uri: Specifies a custom database URI. Defaults to the
+                       'db_uri' extra if it is set
+        :param db_config: Specifies a custom database configuration,
+                          including options for the database engine.
+                          Takes precedence over db_uri
+        :param engine_factory: Creates the database engine from the
+                               database configuration. Allows sharing
+                               engines between bots
+        :param scheduler: A scheduler shared with other bots. Its jobs are
+                          not executed by the bot's background thread,
+                          the owner of the scheduler has to run it
         """
-        self.logger = logging.getLogger(self.__class__.__name__)
+        # Bots of the same class may run in the same process, so the
+        # logger is named after the bot's location as well
+        self.logger = logging.getLogger("{}.{}".format(
+            self.__class__.__name__,
+            os.path.abspath(location).replace(".", "_")
+        ))
         self.logger.info("Initializing Bot")
 
         self.connection = connection
+        self.connections = [connection]  # type: List[Connection]
+        self.connection_labels = {connection: type(connection).__name__}
+        self._reply_connection = ContextVar(
+            "reply_connection", default=None
+        )  # type: ContextVar[Optional[Connection]]
         self.location = location
         if not os.path.isdir(location):
             raise ConfigurationError("Invalid configuration directory")
 
-        self.logfile = os.path.join(location, "kudubot.log")
-        log_file_handler = logging.FileHandler(self.logfile)
-        log_file_handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] - %(name)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        log_file_handler.setFormatter(formatter)
-        self.logger.addHandler(log_file_handler)
-        self.connection.logger.addHandler(log_file_handler)
-        self.logger.setLevel(logging.DEBUG)
-        self.connection.logger.setLevel(logging.DEBUG)
-
         self.connection_file_path = os.path.join(location, "connection.json")
         if not os.path.isfile(self.connection_file_path):
             raise ConfigurationError("Missing connection settings")
 
         self.extras = {}
         self.extras_file_path = os.path.join(location, "extras.json")
-        if len(self.extra_config_args()) > 0:
-            if not os.path.isfile(self.extras_file_path):
-                raise ConfigurationError("Missing extra settings")
-            else:
-                with open(self.extras_file_path, "r") as f:
-                    self.extras = json.load(f)
-                    for arg in self.extra_config_args():
-                        if arg not in self.extras:
-                            raise ConfigurationError(
-                                "Missing extra settings parameter " + arg
-                            )
+        if os.path.isfile(self.extras_file_path):
+            with open(self.extras_file_path, "r") as f:
+                self.extras = json.load(f)
+        elif len(self.extra_config_args()) > 0:
+            raise ConfigurationError("Missing extra settings")
+        for arg in self.extra_config_args():
+            if arg not in self.extras:
+                raise ConfigurationError(
+                    "Missing extra settings parameter " + arg
+                )
+
+        self.logfile = os.path.join(location, "kudubot.log")
+        self.log_listener = self._start_logging()
+        self.error_reporter = ErrorReporter(
+            capture_exception,
+            capture_message,
+            self.error_sample_rate,
+            self.error_rate_limit,
+            self.error_summary_interval,
+            logger=self.logger
+        )
 
         self.sqlite_path = os.path.join(location, "data.db")
         if db_uri is None:
-            db_uri = SqliteConfig(self.sqlite_path).to_uri()
-        self.db_uri = db_uri
+            db_uri = self.extras.get("db_uri")
+        if db_config is None:
+            if db_uri is None:
+                db_config = SqliteConfig(
+                    self.sqlite_path,
+                    performance_mode=bool(
+                        self.extras.get("sqlite_performance_mode", False)
+                    )
+                )
+            else:
+                db_config = UriConfig(db_uri)
+        self.db_config = db_config
+        self.db_uri = db_config.to_uri()
 
-        self.db_engine = create_engine(self.db_uri)
-        Base.metadata.create_all(self.db_engine, checkfirst=True)
+        if engine_factory is None:
+            self.db_engine = db_config.create_engine()
+        else:
+            self.db_engine = engine_factory(db_config)
+        SchemaManager(self.db_engine, Base.metadata)\
+            .ensure(self.name(), self.migrations(), self.db_tables())
 
         self.sessionmaker = scoped_session(sessionmaker(bind=self.db_engine))
+        self.address_book = AddressBook(self.address_cache_size)
 
         self.bg_thread = Thread(target=self.run_in_bg, daemon=True)
+        self.shares_scheduler = scheduler is not None
+        if scheduler is None:
+            scheduler = Scheduler(
+                self.bg_workers, self.__class__.__name__ + "-bg"
+            )
+        self.scheduler = scheduler
+        if db_config.maintenance_interval is not None:
+            self.scheduler.add_job(
+                partial(db_config.maintain, self.db_engine),
+                db_config.maintenance_interval,
+                name="db_maintenance",
+                delay=db_config.maintenance_interval
+            )
+        self.message_executor = None  # type: Optional[OrderedExecutor]
+        self.metrics = Metrics()
+        self.metrics_server = None  # type: Optional[MetricsServer]
+        self.send_queue = None  # type: Optional[SendQueue]
+        self.send_queues = {}  # type: Dict[Connection, SendQueue]
+
+        self.duplicates = None  # type: Optional[DedupWindow]
+        if self.dedup_window > 0:
+            self.duplicates = DedupWindow(self.dedup_size, self.dedup_window)
+            duplicates = self.duplicates
+            self.metrics.gauge("dedup_hit_rate", lambda: duplicates.hit_rate)
+
+        self.auth_cache = None  # type: Optional[TtlCache]
+        self.auth_negative_cache = None  # type: Optional[TtlCache]
+        if self.auth_cache_ttl > 0:
+            self.auth_cache = TtlCache(
+                self.auth_cache_size, self.auth_cache_ttl
+            )
+            self.auth_negative_cache = TtlCache(
+                self.auth_cache_size, self.auth_negative_cache_ttl
+            )
+
+        self.flood_limits = None  # type: Optional[KeyedTokenBuckets]
+        self.flood_replies = None  # type: Optional[KeyedTokenBuckets]
+        sender_rate_limit = self.sender_rate_limit
+        if sender_rate_limit is not None:
+            self.flood_limits = KeyedTokenBuckets(*sender_rate_limit)
+            self.flood_replies = \
+                KeyedTokenBuckets(1 / self.flood_reply_interval, 1)
+
+        self.command_handlers = self._resolve_command_handlers()
+        self._help_pages = None  # type: Optional[List[str]]
+        self._pre_filters = \
+            {}  # type: Dict[str, Callable[[TextMessage, str], bool]]
+        self.register_pre_filter("/help", self._handle_help_command)
+        self.register_pre_filter("/start", self._handle_help_command)
+        self.register_pre_filter("ping", self._handle_ping)
+        self.register_pre_filter("bg_ping", self._handle_ping)
+        if self.metrics_command:
+            self.register_pre_filter("metrics", self._handle_metrics)
         self.init()
+        self._schedule_bg_iteration()
 
     def init(self):
         """
@@ -145,6 +314,71 @@ class Bot:
         """
         pass
 
+    def _start_logging(self) -> QueueListener:
+        """
+        Sets up logging of the bot and its connection to the log file.
+        Log records are handed to a queue and written to the file by a
+        separate thread. The log file is rotated once it reaches a certain
+        size or, if configured, periodically.
+        Can be configured using the following optional extras:
+          - log_level: The log level, defaults to DEBUG
+          - log_max_bytes: The size at which the log file is rotated,
+                           defaults to 10MB
+          - log_backup_count: The amount of rotated log files to keep,
+                              defaults to 5
+          - log_rotation: If set, the log file is rotated at this interval
+                          instead of by size. Uses the 'when' values of
+                          logging.handlers.TimedRotatingFileHandler,
+                          for example "midnight"
+        :return: The listener that writes queued records to the log file
+        """
+        level = logging.getLevelName(
+            str(self.extras.get("log_level", "DEBUG")).upper()
+        )
+        if not isinstance(level, int):
+            raise ConfigurationError("Invalid log level")
+
+        backup_count = int(self.extras.get("log_backup_count", 5))
+        if "log_rotation" in self.extras:
+            file_handler = TimedRotatingFileHandler(
+                self.logfile,
+                when=self.extras["log_rotation"],
+                backupCount=backup_count
+            )  # type: logging.Handler
+        else:
+            file_handler = RotatingFileHandler(
+                self.logfile,
+                maxBytes=int(self.extras.get("log_max_bytes", 10000000)),
+                backupCount=backup_count
+            )
+        file_handler.setFormatter(logging.Formatter(
+            "%(asctime)s [%(levelname)s] - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        ))
+
+        log_queue = SimpleQueue()  # type: SimpleQueue
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+        atexit.register(self.stop_logging)
+
+        self.log_handler = LogQueueHandler(log_queue)
+        self.logger.addHandler(self.log_handler)
+        self.logger.setLevel(level)
+        self._adopt_connection_logger(self.connection)
+
+        return listener
+
+    def stop_logging(self):
+        """
+        Writes the remaining queued log records to the log file and stops
+        the thread that writes them.
+        Called automatically when the interpreter exits
+        :return: None
+        """
+        listener, self.log_listener = self.log_listener, None
+        if listener is not None:
+            listener.stop()
+
     def send_txt(
             self,
             receiver: Address,
@@ -158,15 +392,183 @@ class Bot:
         :param title: The (optional) title of the message
         :return: None
         """
-        self.connection.send(
+        self.send_msg(
             TextMessage(
-                self.connection.address,
+                self.reply_connection().address,
                 receiver,
                 body,
                 title
             )
         )
 
+    def send_msg(
+            self,
+            message: Message,
+            connection: Optional[Connection] = None
+    ):
+        """
+        Sends a message. While a message is handled, this uses the
+        connection that message arrived on by default. If the send queue
+        is enabled, the message is queued and sent by the send queue's
+        thread.
+        :param message: The message to send
+        :param connection: The connection to use, one of the bot's
+                           connections. Defaults to reply_connection()
+        :return: None
+        """
+        if connection is None:
+            connection = self.reply_connection()
+        send_queue = self.send_queues.get(connection)
+        if send_queue is None:
+            self._timed(
+                "send", self.connection_labels[connection],
+                connection.send, message
+            )
+        else:
+            send_queue.put(message)
+
+    def add_connection(self, connection: Connection):
+        """
+        Adds another connection that the bot receives messages from.
+        Must be called before the bot is started. Every connection runs
+        its loop on its own thread, and replies are sent using the
+        connection that the handled message arrived on.
+        :param connection: The connection
+        :return: None
+        """
+        label = type(connection).__name__
+        if label in self.connection_labels.values():
+            label += "-{}".format(len(self.connections))
+        self.connections.append(connection)
+        self.connection_labels[connection] = label
+        self._adopt_connection_logger(connection)
+
+    def _adopt_connection_logger(self, connection: Connection):
+        """
+        Replaces the logger of a connection, which bokkichat shares between
+        all connections of a class, with a child of the bot's logger.
+        Its records are therefore written to this bot's log file only
+        :param connection: The connection
+        :return: None
+        """
+        connection.logger = self.logger.getChild(
+            self.connection_labels[connection]
+        )
+
+    def reply_connection(self) -> Connection:
+        """
+        Determines the connection used to send messages
+        :return: The connection the message that is currently handled
+                 arrived on, the bot's first connection outside of
+                 message handling
+        """
+        connection = self._reply_connection.get()
+        return self.connection if connection is None else connection
+
+    def connection_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Calculates the throughput of every connection since the bot's
+        metrics were last reset
+        :return: The amount of received and sent messages and the
+                 received messages per second, by connection label
+        """
+        elapsed = max(self.metrics.elapsed(), 1e-9)
+        counts = {}  # type: Dict[Tuple[str, str], int]
+        for stage, label, histogram in self.metrics.histograms():
+            counts[(stage, label)] = histogram.count
+        stats = {}  # type: Dict[str, Dict[str, float]]
+        for label in self.connection_labels.values():
+            received = counts.get(("receive", label), 0)
+            stats[label] = {
+                "received": received,
+                "sent": counts.get(("send", label), 0),
+                "received_per_second": received / elapsed
+            }
+        return stats
+
+    def _receive_callback(
+            self,
+            connection: Connection,
+            dispatch: Callable[[Connection, Message], None]
+    ) -> Callable[[Connection, Message], None]:
+        """
+        Creates the callback for a connection's loop. It drops duplicate
+        messages and messages of flooding senders, then hands the message
+        to the pipeline together with the connection it arrived on.
+        Records the time this takes.
+        Dropping messages before they are dispatched keeps them from
+        occupying the message workers, shard workers or event loop
+        :param connection: The connection
+        :param dispatch: Hands a message and its connection to the
+                         handling pipeline
+        :return: The callback
+        """
+        label = self.connection_labels[connection]
+
+        def accept(message: Message):
+            if self._check_duplicate(message) \
+                    and self._check_flood(connection, message):
+                dispatch(connection, message)
+
+        def callback(_: Connection, message: Message):
+            # Only immutable fields are logged, so the log thread can
+            # format the record instead of the receiving thread
+            self.logger.info(
+                "Received %s from %s on %s",
+                message.__class__.__name__, message.sender.address, label
+            )
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Received message %s", str(message))
+            self._timed("receive", label, accept, message)
+        return callback
+
+    def _loop_connections(
+            self,
+            dispatch: Callable[[Connection, Message], None]
+    ):
+        """
+        Runs the loops of all connections until they end. The loop of the
+        first connection runs on the calling thread, the others on
+        separate threads
+        :param dispatch: Hands a message and its connection to the
+                         handling pipeline
+        :return: None
+        """
+        threads = []
+        for connection in self.connections[1:]:
+            thread = Thread(
+                target=connection.loop,
+                kwargs={
+                    "callback": self._receive_callback(connection, dispatch)
+                },
+                name="{}-{}".format(
+                    self.__class__.__name__,
+                    self.connection_labels[connection]
+                ),
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        self.connection.loop(
+            callback=self._receive_callback(self.connection, dispatch)
+        )
+        for thread in threads:
+            thread.join()
+
+    def _on_msg_from(self, connection: Connection, message: Message):
+        """
+        Handles a message that arrived on a connection. Messages sent
+        while handling it are sent using the same connection
+        :param connection: The connection the message arrived on
+        :param message: The received message
+        :return: None
+        """
+        token = self._reply_connection.set(connection)
+        try:
+            self.on_msg(message)
+        finally:
+            self._reply_connection.reset(token)
+
     def on_msg(self, message: Message):
         """
         The callback method is called for every received message.
@@ -177,47 +579,64 @@ class Bot:
         :param message: The received message
         :return: None
         """
-        if not self.pre_callback(message):
+        if not self._timed("pre_callback", "", self.pre_callback, message):
             return
 
         try:
             db_session = self.sessionmaker()
-            sender = db_session.query(Address)\
-                .filter_by(address=message.sender.address).first()
+            sender = self._timed(
+                "sender_lookup", "",
+                self.address_book.get_or_create,
+                db_session, message.sender.address
+            )
 
             if message.is_text():
                 message = cast(TextMessage, message)  # type: TextMessage
 
-                parsed = self.parse(message)
+                parsed = self._timed("parse", "", self.parse, message)
                 if parsed is None:
-                    self.on_text(message, sender, db_session)
+                    self._timed(
+                        "handler", "text",
+                        self.on_text, message, sender, db_session
+                    )
                 else:
                     parser, command, args = parsed
-                    self.on_command(
-                        parser,
-                        command,
-                        args,
-                        sender,
-                        db_session
+                    self._timed(
+                        "handler", command,
+                        self.on_command,
+                        parser, command, args, sender, db_session
                     )
 
             elif message.is_media():
                 message = cast(MediaMessage, message)  # type: MediaMessage
 
-                self.on_media(message, sender, db_session)
+                self._timed(
+                    "handler", "media",
+                    self.on_media, message, sender, db_session
+                )
             else:
                 pass
         except Exception as e:
-            self.logger.error(
-                "Exception during Message: {}\n{}".format(
-                    e,
-                    "\n".join(traceback.format_tb(e.__traceback__))
-                )
-            )
-            capture_exception(e)
+            self.error_reporter.report(e, "Exception during Message")
         finally:
             self.sessionmaker.remove()
 
+    def _timed(self, stage: str, label: str, func: Callable, *args: Any) \
+            -> Any:
+        """
+        Calls a function and records the time it took in the bot's metrics
+        :param stage: The stage of message handling the function belongs to
+        :param label: The label of the stage, for example a command name
+        :param func: The function to call
+        :param args: The arguments for the function
+        :return: The return value of the function
+        """
+        started = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.observe(stage, perf_counter() - started, label)
+
     def on_text(
             self,
             message: TextMessage,
@@ -260,8 +679,9 @@ class Bot:
     ):
         """
         Handles text messages that have been parsed as commands.
-        Automatically searches for 'on_X' methods in the bot and
-        forwards the parameters to those methods if they exist.
+        Automatically forwards the parameters to the 'on_X' method of the
+        command if it exists. Those methods are looked up once when the
+        bot is initialized.
         This mechanism can be used for simple bots that don't need more logic
         than a simple if "command" elif "other_command"... .
         :param parser: The parser containing the command
@@ -271,14 +691,41 @@ class Bot:
         :param db_session: A valid database session
         :return: None
         """
-        for prefix in ["on_", "_on_", "handle_", "_handle_"]:
-            try:
-                method = getattr(self, prefix + command)
-                method(sender, args, db_session)
-                return
-            except AttributeError:
-                pass
-        self.logger.warning("No method for command " + command)
+        handler = self.command_handlers.get(command)
+        if handler is not None:
+            handler(sender, args, db_session)
+
+    def _resolve_command_handlers(self) -> Dict[str, Callable]:
+        """
+        Looks up the 'on_X' methods for all commands of the bot's parsers.
+        Handler methods may be prefixed with 'on_', '_on_', 'handle_' or
+        '_handle_', in that order of precedence.
+        Commands without a handler method are logged once.
+        :return: The handler methods, keyed by their command name
+        """
+        handlers = {}  # type: Dict[str, Callable]
+        missing = []  # type: List[str]
+
+        for parser in self.cached_parsers():
+            for command in parser.commands():
+                name = command.keyword.lower()
+                if name in handlers or name in missing:
+                    continue
+
+                for prefix in self.HANDLER_PREFIXES:
+                    method = getattr(self, prefix + name, None)
+                    if method is not None:
+                        handlers[name] = method
+                        break
+                else:
+                    missing.append(name)
+
+        # Bots that override on_command may handle commands themselves
+        if type(self).on_command is Bot.on_command:
+            for name in missing:
+                self.logger.warning("No method for command " + name)
+
+        return handlers
 
     @classmethod
     def name(cls) -> str:
@@ -301,6 +748,47 @@ class Bot:
         """
         raise NotImplementedError()
 
+    @classmethod
+    def cached_parsers(cls) -> List[CommandParser]:
+        """
+        Provides the parsers of the bot. Unlike parsers(), this only
+        generates the parsers once per bot class.
+        :return: A list of parser the bot supports for commands
+        """
+        return cls._load_parsers()[0]
+
+    @classmethod
+    def _load_parsers(cls) \
+            -> Tuple[List[CommandParser], Dict[str, CommandParser]]:
+        """
+        Loads the cached parsers of this bot class, generating them if
+        they do not exist yet
+        :return: The parsers as a list and keyed by their lower-case names
+        """
+        cached = cls._parser_registries.get(cls)
+        if cached is None:
+            parsers = cls.parsers()
+            parsers_by_name = {
+                parser.name().lower(): parser for parser in parsers
+            }
+            cached = (parsers, parsers_by_name)
+            cls._parser_registries[cls] = cached
+        return cached
+
+    def invalidate_parsers(self):
+        """
+        Discards all cached information about the bot's parsers and their
+        commands, including the help message. Needs to be called if the
+        parsers or commands of a bot change at runtime.
+        :return: None
+        """
+        cached = self._parser_registries.pop(type(self), None)
+        if cached is not None:
+            for parser in cached[0]:
+                parser.invalidate_index()
+        self.command_handlers = self._resolve_command_handlers()
+        self._help_pages = None
+
     @classmethod
     def extra_config_args(cls) -> List[str]:
         """
@@ -309,6 +797,33 @@ class Bot:
         """
         return []
 
+    @classmethod
+    def migrations(cls) -> List[Callable[[DbConnection], None]]:
+        """
+        The migrations of this bot's database tables, in the order they
+        have to be applied. Every migration receives a database connection
+        inside a transaction. Only migrations that were not applied yet are
+        executed when the bot starts.
+        New tables are created automatically and don't need a migration.
+        Databases created before kudubot stored schema versions run all
+        migrations, so migrations should tolerate changes that are already
+        present.
+        :return: The migrations
+        """
+        return []
+
+    @classmethod
+    def db_tables(cls) -> Optional[List[str]]:
+        """
+        The names of this bot's database tables. If none of them exist
+        yet when the bot starts for the first time, the tables are created
+        using the current definitions and no migrations are applied.
+        If None, this is the case if any table did not exist yet, which
+        may be wrong if several bots share a database
+        :return: The table names, or None if they are not known
+        """
+        return None
+
     @property
     def bg_pause(self) -> int:
         """
@@ -317,6 +832,196 @@ class Bot:
         """
         return 60
 
+    @property
+    def bg_overlap(self) -> str:
+        """
+        What happens if a background iteration is still running when the
+        next one is due. By default, the next iteration starts as soon as
+        the running one finishes, so no iteration is skipped
+        :return: The overlap policy, Job.SKIP, Job.QUEUE or Job.ALLOW
+        """
+        return Job.QUEUE
+
+    @property
+    def bg_workers(self) -> int:
+        """
+        The amount of threads that execute background jobs
+        :return: The amount of background threads
+        """
+        return 2
+
+    @property
+    def message_workers(self) -> int:
+        """
+        The amount of threads that handle received messages concurrently.
+        Messages of the same sender are always handled in the order they
+        were received. If this is 0, messages are handled one after another
+        on the connection's thread.
+        :return: The amount of message handling threads
+        """
+        return 0
+
+    @property
+    def max_pending_messages(self) -> int:
+        """
+        The maximum amount of received messages that are queued or being
+        handled while using message worker threads.
+        Receiving messages blocks while this limit is reached.
+        :return: The maximum amount of pending messages
+        """
+        return 1000
+
+    @property
+    def shard_processes(self) -> int:
+        """
+        The amount of processes that handle received messages. Messages
+        are assigned to processes by their sender, so messages of the same
+        sender are handled in the order they were received.
+        If this is 0, messages are handled in the bot's process.
+        Can be set using the 'shard_processes' extra. The bot's class must
+        be importable by the worker processes.
+        :return: The amount of message handling processes
+        """
+        return int(self.extras.get("shard_processes", 0))
+
+    @property
+    def send_queue_size(self) -> int:
+        """
+        The maximum amount of outgoing messages in the send queue.
+        If this is larger than 0, outgoing messages are queued and sent by
+        a separate thread while the bot is running. Otherwise, messages
+        are sent immediately by the thread that sends them.
+        :return: The send queue size
+        """
+        return 0
+
+    @property
+    def send_rate_limit(self) -> Tuple[float, float]:
+        """
+        The rate limit for all messages sent using the send queue
+        :return: The allowed messages per second and burst size
+        """
+        return 30, 30
+
+    @property
+    def receiver_send_rate_limit(self) -> Tuple[float, float]:
+        """
+        The rate limit for messages sent to a single receiver using the
+        send queue
+        :return: The allowed messages per second and burst size
+        """
+        return 1, 5
+
+    @property
+    def dedup_window(self) -> float:
+        """
+        The time in seconds for which received messages are remembered to
+        detect messages that were delivered twice, for example after a
+        connection was reestablished. 0 disables this.
+        Can be set using the 'dedup_window' extra
+        :return: The time window in seconds
+        """
+        return float(self.extras.get("dedup_window", 600))
+
+    @property
+    def dedup_size(self) -> int:
+        """
+        :return: The maximum amount of messages remembered to detect
+                 messages that were delivered twice
+        """
+        return 10000
+
+    @property
+    def sender_rate_limit(self) -> Optional[Tuple[float, float]]:
+        """
+        The rate limit for messages received from a single sender.
+        Messages exceeding it are dropped before they reach the database.
+        Can be set using the 'sender_rate_limit' extra as a list of the
+        rate and the burst size, disabled by default
+        :return: The allowed messages per second and burst size,
+                 None if received messages are not rate limited
+        """
+        limit = self.extras.get("sender_rate_limit")
+        if limit is None:
+            return None
+        rate, burst = limit
+        return float(rate), float(burst)
+
+    @property
+    def flood_reply(self) -> Optional[str]:
+        """
+        The reply sent to senders whose messages are dropped because they
+        exceeded the sender rate limit. Sent at most once per
+        flood_reply_interval seconds per sender.
+        Can be set using the 'flood_reply' extra
+        :return: The reply, None if no reply is sent
+        """
+        return self.extras.get("flood_reply")
+
+    @property
+    def flood_reply_interval(self) -> float:
+        """
+        :return: The minimum time in seconds between two flood replies to
+                 the same sender
+        """
+        return 60
+
+    @property
+    def coalesce_length(self) -> int:
+        """
+        If larger than 0, the send queue combines consecutive text messages
+        with the same title to the same receiver into a single message of
+        up to this many characters.
+        Should only be enabled if the connection supports long messages.
+        :return: The maximum length of combined messages
+        """
+        return 0
+
+    @property
+    def address_cache_size(self) -> int:
+        """
+        The maximum amount of addresses kept in the address book's cache
+        :return: The cache size
+        """
+        return 10000
+
+    @property
+    def error_sample_rate(self) -> float:
+        """
+        Repeated exceptions are only logged and reported to sentry once
+        per summary interval, afterwards they are counted. This fraction
+        of the repetitions is logged and reported anyway
+        :return: The sample rate between 0 and 1
+        """
+        return 0.0
+
+    @property
+    def error_rate_limit(self) -> Tuple[float, float]:
+        """
+        The rate limit for reporting exceptions to sentry
+        :return: The rate per second and the burst size
+        """
+        return 1, 10
+
+    @property
+    def error_summary_interval(self) -> float:
+        """
+        The interval in seconds at which the amount of repeated exceptions
+        is logged and reported to sentry
+        :return: The interval
+        """
+        return 300.0
+
+    @property
+    def help_page_length(self) -> int:
+        """
+        The maximum length of a help message. Longer help messages are
+        split into pages, which can be requested using '/help <page>'.
+        0 disables this
+        :return: The maximum length in characters
+        """
+        return 0
+
     # noinspection PyMethodMayBeStatic,PyUnusedLocal
     def is_authorized(
             self,
@@ -333,6 +1038,142 @@ class Bot:
         """
         return True
 
+    @property
+    def metrics_command(self) -> bool:
+        """
+        Whether or not the bot replies to 'metrics' messages with its
+        recorded metrics. Can be enabled using the 'metrics_command' extra
+        :return: True if the metrics command is enabled
+        """
+        return bool(self.extras.get("metrics_command", False))
+
+    @property
+    def metrics_users(self) -> List[str]:
+        """
+        The addresses of the users that may request the bot's metrics.
+        Can be set using the 'metrics_users' extra
+        :return: The addresses
+        """
+        return list(self.extras.get("metrics_users", []))
+
+    def is_metrics_authorized(
+            self,
+            address: Address,
+            db_session: Session
+    ) -> bool:
+        """
+        Checks if a user may request the bot's metrics.
+        Unlike is_authorized, access is denied unless the user's address
+        is one of the metrics_users
+        :param address: The user to check
+        :param db_session: The database session to use
+        :return: True if authorized, False otherwise
+        """
+        return address.address in self.metrics_users
+
+    @property
+    def auth_cache_ttl(self) -> float:
+        """
+        The time in seconds for which the authorization decisions of
+        auth_required methods are cached, by sender and command.
+        Should only be enabled if is_authorized does not depend on the
+        command arguments. Changed permissions take effect once the cached
+        decisions expire or are removed using invalidate_authorization().
+        0 disables caching
+        :return: The time in seconds
+        """
+        return 0
+
+    @property
+    def auth_negative_cache_ttl(self) -> float:
+        """
+        :return: The time in seconds for which denied authorizations are
+                 cached. They are cached separately from granted
+                 authorizations
+        """
+        return self.auth_cache_ttl
+
+    @property
+    def auth_cache_size(self) -> int:
+        """
+        :return: The maximum amount of cached granted authorizations,
+                 and of cached denied authorizations
+        """
+        return 10000
+
+    def cached_authorization(
+            self,
+            address: Address,
+            command: str
+    ) -> Optional[bool]:
+        """
+        Looks up a cached authorization decision.
+        Hits are counted as 'auth_cache_hit' in the metrics, labelled
+        'granted' or 'denied', misses as 'auth_cache_miss'
+        :param address: The user
+        :param command: The command
+        :return: The cached decision, None if there is none
+        """
+        if self.auth_cache is None:
+            return None
+
+        key = (address.address, command)
+        if self.auth_cache.get(key, False):
+            self.metrics.increment("auth_cache_hit", "granted")
+            return True
+        elif self.auth_negative_cache.get(key, False):
+            self.metrics.increment("auth_cache_hit", "denied")
+            return False
+        else:
+            self.metrics.increment("auth_cache_miss")
+            return None
+
+    def cache_authorization(
+            self,
+            address: Address,
+            command: str,
+            authorized: bool
+    ):
+        """
+        Caches an authorization decision if caching is enabled
+        :param address: The user
+        :param command: The command
+        :param authorized: Whether or not the user is authorized
+        :return: None
+        """
+        if self.auth_cache is None:
+            return
+
+        key = (address.address, command)
+        if authorized:
+            self.auth_cache.put(key, True)
+            self.auth_negative_cache.remove(key)
+        else:
+            self.auth_negative_cache.put(key, True)
+            self.auth_cache.remove(key)
+
+    def invalidate_authorization(
+            self,
+            address: Optional[str] = None,
+            command: Optional[str] = None
+    ):
+        """
+        Removes cached authorization decisions, for example after the
+        permissions of a user changed
+        :param address: Only removes the decisions for this address
+        :param command: Only removes the decisions for this command
+        :return: None
+        """
+        if self.auth_cache is None:
+            return
+
+        def matches(key: Tuple[str, str]) -> bool:
+            return (address is None or key[0] == address) \
+                and (command is None or key[1] == command)
+
+        self.auth_cache.remove_matching(matches)
+        self.auth_negative_cache.remove_matching(matches)
+
     @classmethod
     def unauthorized_message(cls) -> str:
         """
@@ -345,28 +1186,79 @@ class Bot:
     def run_in_bg(self):
         """
         Method that is started when the bot is started.
-        This executes the bg_iteration method every bg_pause seconds
+        This executes the scheduled background jobs, including the
+        bg_iteration method every bg_pause seconds
         :return: None
         """
         self.logger.info("Starting background thread")
-        counter = 0
-        while True:
-            self.logger.debug("Starting background iteration " + str(counter))
+        self.scheduler.run()
+
+    def schedule(
+            self,
+            func: Callable[[Session], None],
+            interval: Union[float, Callable[[], float]],
+            jitter: float = 0.0,
+            overlap: str = Job.SKIP,
+            name: Optional[str] = None
+    ) -> Job:
+        """
+        Registers a background job that is executed periodically while the
+        bot is running. Jobs run on a small pool of threads, so a slow job
+        does not delay other jobs.
+        :param func: The function to execute. Receives a database session
+        :param interval: The time between executions in seconds, or a
+                         function that returns it
+        :param jitter: Executions are delayed by a random amount of up to
+                       this many seconds
+        :param overlap: What happens if the job is still running when it
+                        is due again. Job.SKIP skips that execution,
+                        Job.QUEUE executes it once the running execution
+                        finished and Job.ALLOW executes it concurrently
+        :param name: The name of the job, defaults to the function's name
+        :return: The job, can be used to remove it from self.scheduler
+        """
+        if name is None:
+            name = getattr(func, "__name__", "job")
+
+        def run_job():
             try:
                 db_session = self.sessionmaker()
-                self.bg_iteration(counter, db_session)
+                func(db_session)
             except BaseException as e:
-                self.logger.error(
-                    "Exception in background thread: {}\n{}".format(
-                        e,
-                        "\n".join(traceback.format_tb(e.__traceback__))
-                    )
+                self.error_reporter.report(
+                    e, "Exception in background job " + name
                 )
-                capture_exception(e)
             finally:
                 self.sessionmaker.remove()
-                counter += 1
-                time.sleep(self.bg_pause)
+
+        return self.scheduler.add_job(run_job, interval, jitter, overlap, name)
+
+    def _schedule_bg_iteration(self):
+        """
+        Registers the bg_iteration method as a background job.
+        Called after init(), bg_pause is read again for every iteration
+        :return: None
+        """
+        iterations = count()
+
+        def bg_iteration(db_session: Session):
+            iteration = next(iterations)
+            self.logger.debug(
+                "Starting background iteration " + str(iteration)
+            )
+            self.bg_iteration(iteration, db_session)
+
+        self.schedule(
+            bg_iteration, lambda: self.bg_pause, overlap=self.bg_overlap
+        )
+
+    def bg_alive(self) -> bool:
+        """
+        :return: Whether or not the background thread is running
+        """
+        if self.shares_scheduler:
+            return self.scheduler.is_running()
+        return self.bg_thread.is_alive()
 
     # noinspection PyUnusedLocal,PyMethodMayBeStatic
     def bg_iteration(self, iteration: int, db_session: Session):
@@ -375,7 +1267,9 @@ class Bot:
         This is supposed to be overriden by child classes to implement
         background functionality
         :param iteration: The iteration count. Useful for differentiating
-                          between actions that have different repetition rates
+                          between actions that have different repetition
+                          rates, although separate jobs registered using
+                          schedule() are preferable for that
         :param db_session: The database session to use
         :return:
         """
@@ -388,34 +1282,125 @@ class Bot:
         :param message: The message to check
         :return: True if the execution continues, False otherwise
         """
-        _continue = True
-        _continue = _continue and self._store_in_address_book(message)
+        _continue = self._store_in_address_book(message)
 
-        if message.is_text():
+        if _continue and message.is_text():
             message = cast(TextMessage, message)  # type: TextMessage
-            _continue = _continue and self._handle_help_command(message)
-            _continue = _continue and self._handle_ping(message)
+            normalized = message.body.lower().strip()
+            pre_filter = self._pre_filters.get(normalized.partition(" ")[0])
+            if pre_filter is not None:
+                _continue = pre_filter(message, normalized)
 
         return _continue
 
+    def register_pre_filter(
+            self,
+            keyword: str,
+            pre_filter: Callable[[TextMessage, str], bool]
+    ):
+        """
+        Registers a function that handles text messages whose first word
+        is a keyword before they are parsed. Replaces any function
+        previously registered for the keyword, including the built-in ones
+        for /help, /start, ping, bg_ping and metrics.
+        :param keyword: The keyword, case-insensitive
+        :param pre_filter: The function. Receives the message and its body
+                           in lower case without surrounding whitespace.
+                           Returns whether or not handling the message
+                           should continue
+        :return: None
+        """
+        self._pre_filters[keyword.lower()] = pre_filter
+
     def start(self):
         """
-        Starts the bot using the implemented callback function
+        Starts the bot using the implemented callback function.
+        Runs until the loops of all connections ended and all received
+        messages were handled
         :return: None
         """
         self.logger.info("Starting Bot")
 
-        def loop_callback(_: Connection, message: Message):
-            self.logger.info("Received message {}".format(message))
-            self.on_msg(message)
+        sharded_executor = None  # type: Optional[ShardedExecutor]
+        if self.shard_processes > 0:
+            sharded_executor = ShardedExecutor(self, self.shard_processes)
+            sharded_executor.start()
+        elif self.message_workers > 0:
+            self.message_executor = OrderedExecutor(
+                self.message_workers,
+                self.max_pending_messages,
+                self.__class__.__name__ + "-worker"
+            )
 
-        self.bg_thread.start()
+        def dispatch(connection: Connection, message: Message):
+            if sharded_executor is not None:
+                sharded_executor.submit(connection, message)
+            elif self.message_executor is None:
+                self._on_msg_from(connection, message)
+            else:
+                # Messages of the same sender are handled in order
+                self.message_executor.submit(
+                    message.sender.address,
+                    self._on_msg_from, connection, message
+                )
+
+        self._start_send_queue()
+        self._start_metrics_server()
+        if not self.shares_scheduler:
+            self.bg_thread.start()
 
         try:
-            self.connection.loop(callback=loop_callback)
+            self._loop_connections(dispatch)
         except ConfigurationError as e:
             print("Invalid Coniguration Detected")
             raise e
+        finally:
+            if sharded_executor is not None:
+                sharded_executor.shutdown()
+            if self.message_executor is not None:
+                # Handles the messages that are still queued
+                self.message_executor.shutdown(wait=True)
+            if not self.shares_scheduler:
+                self.scheduler.stop()
+
+    def _start_send_queue(self):
+        """
+        Starts a send queue for every connection if send queues are enabled
+        :return: None
+        """
+        if self.send_queue_size > 0:
+            for connection in self.connections:
+                send_queue = SendQueue(
+                    connection,
+                    self.send_queue_size,
+                    self.send_rate_limit,
+                    self.receiver_send_rate_limit,
+                    self.coalesce_length,
+                    self.metrics,
+                    self.error_reporter,
+                    self.connection_labels[connection]
+                )
+                send_queue.start()
+                self.send_queues[connection] = send_queue
+            self.send_queue = self.send_queues[self.connection]
+
+    def _start_metrics_server(self):
+        """
+        Starts serving the bot's metrics over HTTP if the 'metrics_port'
+        extra is set. Listens on localhost unless the 'metrics_host' extra
+        specifies otherwise
+        :return: None
+        """
+        if "metrics_port" in self.extras:
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                self.extras.get("metrics_host", "127.0.0.1"),
+                int(self.extras["metrics_port"])
+            )
+            self.metrics_server.start()
+            self.logger.info(
+                "Serving metrics on port %d", self.metrics_server.port
+            )
 
     def parse(self, message: Message) \
             -> Optional[Tuple[CommandParser, str, Dict[str, Any]]]:
@@ -431,18 +1416,17 @@ class Bot:
         body = message.body.strip()
         lower_body = body.lower()
 
+        parsers, parsers_by_name = self._load_parsers()
+
         selected_parser = None
-        if len(self.parsers()) > 1:
+        if len(parsers) > 1:
             if not lower_body.startswith("!"):
                 return None
             else:
-                parser_name = lower_body.split("!", 1)[1].split(" ", 1)[0]
-                for parser in self.parsers():
-                    if parser_name == parser.name():
-                        selected_parser = parser
-                        body = body.split(" ", 1)[1]
-        elif len(self.parsers()) == 1:
-            selected_parser = self.parsers()[0]
+                parser_name, _, body = body.partition(" ")
+                selected_parser = parsers_by_name.get(parser_name[1:].lower())
+        elif len(parsers) == 1:
+            selected_parser = parsers[0]
 
         if selected_parser is None:
             return None
@@ -466,11 +1450,18 @@ class Bot:
             json.dump(self.extras, f)
 
     @classmethod
-    def load(cls, connection_cls: Type[Connection], location: str):
+    def load(
+            cls,
+            connection_cls: Type[Connection],
+            location: str,
+            **kwargs: Any
+    ):
         """
         Generates a Bot from the location.
         :param connection_cls: The class of the connection
         :param location: The location of the bot configuration directory
+        :param kwargs: Additional keyword arguments for the bot's
+                       constructor
         :return: The generated bot
         """
         connection_file = os.path.join(location, "connection.json")
@@ -485,7 +1476,7 @@ class Bot:
         except InvalidSettings:
             raise ConfigurationError("Invalid settings for connection")
 
-        return cls(connection, location)
+        return cls(connection, location, **kwargs)
 
     @classmethod
     def create_config(cls, connection_cls: Type[Connection], path: str):
@@ -517,6 +1508,91 @@ class Bot:
         with open(extras_path, "w") as f:
             json.dump(extras, f)
 
+    def message_identity(self, message: Message) -> Optional[Hashable]:
+        """
+        Identifies a message to detect messages that were delivered twice.
+        Uses the ID the messaging service assigned to the message if the
+        connection provides one, otherwise the sender, the content and the
+        time the message was sent if the connection provides that time.
+        The content is represented by a digest of the text or media data,
+        so the dedup window does not keep the content of messages.
+        Messages without either are never considered duplicates, since
+        identical messages may be sent on purpose.
+        Can be overridden for connections that identify messages
+        differently
+        :param message: The message
+        :return: The identity of the message, None if it has none
+        """
+        sender = message.sender.address
+        for attribute in ["message_id", "id"]:
+            message_id = getattr(message, attribute, None)
+            if message_id is not None:
+                return sender, message_id
+
+        timestamp = getattr(message, "timestamp", None)
+        if timestamp is None:
+            return None
+        if message.is_text():
+            content = hashlib.sha256(
+                cast(TextMessage, message).body.encode("utf-8")
+            ).digest()  # type: Optional[bytes]
+        elif message.is_media():
+            content = hashlib.sha256(
+                cast(MediaMessage, message).data
+            ).digest()
+        else:
+            content = None
+        return sender, content, timestamp
+
+    def _check_duplicate(self, message: Message) -> bool:
+        """
+        Drops messages that were already received within the dedup window.
+        Dropped messages are counted as 'duplicate_dropped' in the metrics
+        :param message: The message to check
+        :return: Whether or not handling the message should continue
+        """
+        if self.duplicates is None:
+            return True
+
+        identity = self.message_identity(message)
+        if identity is None or not self.duplicates.check(identity):
+            return True
+
+        self.logger.info(
+            "Dropping duplicate %s from %s",
+            message.__class__.__name__, message.sender.address
+        )
+        self.metrics.increment("duplicate_dropped")
+        return False
+
+    def _check_flood(self, connection: Connection, message: Message) \
+            -> bool:
+        """
+        Drops messages of senders that exceed the sender rate limit.
+        Dropped messages are counted as 'flood_dropped' in the metrics
+        :param connection: The connection the message arrived on, used
+                           for the flood reply
+        :param message: The message to check
+        :return: Whether or not handling the message should continue
+        """
+        if self.flood_limits is None:
+            return True
+
+        address = message.sender.address
+        if self.flood_limits.consume(address):
+            return True
+
+        self.metrics.increment("flood_dropped")
+        reply = self.flood_reply
+        if reply is not None and self.flood_replies.consume(address):
+            self.send_msg(TextMessage(
+                connection.address,
+                message.sender,
+                reply,
+                "Slow down"
+            ), connection)
+        return False
+
     def _store_in_address_book(self, message: Message) -> bool:
         """
         Stores an address in the bot's address book
@@ -524,52 +1600,133 @@ class Bot:
         :return: Whether or not handling the message should continue
         """
         db_session = self.sessionmaker()
-        exists = db_session.query(Address) \
-            .filter_by(address=message.sender.address).first()
-
-        if exists is None:
-            entry = Address(address=message.sender.address)
-            db_session.add(entry)
-            db_session.commit()
+        self.address_book.get_or_create(db_session, message.sender.address)
         return True
 
-    def _handle_help_command(self, message: TextMessage) -> bool:
+    def _handle_help_command(self, message: TextMessage, normalized: str) \
+            -> bool:
         """
-        Handles the /help command.
+        Handles the /help command. '/help <page>' requests a specific page
+        if the help message is split into pages.
         :param message: The message to check for a /help command
+        :param normalized: The message body in lower case
         :return: Whether or not handling the message should continue
         """
-        if message.body.lower().strip() in ["/help", "/start"]:
+        page = 1
+        if normalized != "/help" and normalized != "/start":
+            keyword, _, argument = normalized.partition(" ")
+            if keyword != "/help" or not argument.isdigit():
+                return True
+            page = int(argument)
+
+        pages = self.help_pages()
+        if page > 1 and len(pages) == 1:
+            # /help <argument> may be a command of the bot
+            return True
 
-            help_message = "Help message for:\n{} V{}\n(kudubot V{})\n\n"\
-                .format(self.name(), self.version(), kudubot_version)
+        reply = message.make_reply(
+            title="Help Message",
+            body=pages[min(max(page, 1), len(pages)) - 1]
+        )
+        self.send_msg(reply)
+        return False
 
-            include_titles = len(self.parsers()) > 1
-            for parser in self.parsers():
-                help_message += parser.help_text(include_titles) + "\n\n"
+    def help_pages(self) -> List[str]:
+        """
+        The help message is only generated once and cached until the
+        parsers are invalidated
+        :return: The pages of the help message
+        """
+        pages = self._help_pages
+        if pages is None:
+            pages = self._render_help_pages()
+            self._help_pages = pages
+        return pages
 
-            reply = message.make_reply(
-                title="Help Message", body=help_message
+    def _render_help_pages(self) -> List[str]:
+        """
+        Generates the help message and splits it into pages
+        :return: The pages of the help message
+        """
+        header = "Help message for:\n{} V{}\n(kudubot V{})".format(
+            self.name(), self.version(), kudubot.version
+        )
+        parsers = self.cached_parsers()
+        include_titles = len(parsers) > 1
+        blocks = [header] + [
+            parser.help_text(include_titles) for parser in parsers
+        ]
+
+        if self.help_page_length <= 0:
+            return ["\n\n".join(blocks) + "\n\n"]
+
+        # Leaves room for the page numbers
+        length = max(self.help_page_length - 40, 1)
+        contents = []  # type: List[List[str]]
+        size = length
+        for block in blocks:
+            for index, line in enumerate(block.split("\n")):
+                separator = "\n\n" if index == 0 else "\n"
+                if size + len(separator) + len(line) > length:
+                    contents.append([line])
+                    size = len(line)
+                else:
+                    contents[-1].append(separator + line)
+                    size += len(separator) + len(line)
+
+        if len(contents) == 1:
+            return ["".join(contents[0]) + "\n\n"]
+        return [
+            "{}\n\n(Page {}/{}{})".format(
+                "".join(content),
+                number,
+                len(contents),
+                ", /help {} for more".format(number + 1)
+                if number < len(contents) else ""
             )
-            self.connection.send(reply)
-            return False
-        else:
-            return True
+            for number, content in enumerate(contents, 1)
+        ]
 
-    def _handle_ping(self, message: TextMessage) -> bool:
+    def _handle_ping(self, message: TextMessage, normalized: str) -> bool:
         """
         Handles PING messages
         :param message: The message to analyze
+        :param normalized: The message body in lower case
         :return: Whether or not handling the message should continue
         """
-        if message.body.lower().strip() == "ping":
+        if normalized == "ping":
             self.send_txt(message.sender, "Pong", "Pong")
-            if not self.bg_thread.is_alive():
+            if not self.bg_alive():
                 self.send_txt(message.sender, "BG Thread is dead", "BG Thread")
             return False
-        elif message.body.lower().strip() == "bg_ping":
-            reply = "👍" if self.bg_thread.is_alive() else "👎"
+        elif normalized == "bg_ping":
+            reply = "👍" if self.bg_alive() else "👎"
             self.send_txt(message.sender, reply, "Pong")
             return False
         else:
             return True
+
+    def _handle_metrics(self, message: TextMessage, normalized: str) \
+            -> bool:
+        """
+        Handles METRICS messages by sending the recorded latencies of the
+        message handling stages to users for which is_metrics_authorized
+        returns True
+        :param message: The message to analyze
+        :param normalized: The message body in lower case
+        :return: Whether or not handling the message should continue
+        """
+        if normalized == "metrics":
+            db_session = self.sessionmaker()
+            sender = self.address_book.get_or_create(
+                db_session, message.sender.address
+            )
+            if self.is_metrics_authorized(sender, db_session):
+                self.send_txt(
+                    message.sender, self.metrics.summary(), "Metrics"
+                )
+            else:
+                self.send_txt(message.sender, self.unauthorized_message())
+            return False
+        else:
+            return True
@@ -0,0 +1,218 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import random
+import logging
+import traceback
+from threading import Thread, Lock
+from queue import Queue, Full, Empty
+from typing import Callable, Dict, Optional, Tuple, List
+from kudubot.ratelimit.TokenBucket import TokenBucket
+
+
+class ErrorReporter:
+    """
+    Logs exceptions and reports them to an error tracker like sentry.
+    Exceptions are aggregated by their type, the frames of their traceback
+    and a description of where they occurred. Only the first occurrence of
+    an exception in every summary interval is logged and reported, further
+    occurrences are counted and summarized at the end of the interval,
+    unless they are sampled. Reports are rate limited.
+    Formatting, logging and reporting happen on a separate thread, the
+    thread that reports an exception only calculates its fingerprint.
+    """
+
+    def __init__(
+            self,
+            transport: Callable[[BaseException], None],
+            summary_transport: Optional[Callable[[str], None]] = None,
+            sample_rate: float = 0.0,
+            rate_limit: Tuple[float, float] = (1, 10),
+            summary_interval: float = 300.0,
+            max_pending: int = 1000,
+            logger: Optional[logging.Logger] = None
+    ):
+        """
+        Initializes the error reporter and starts its thread
+        :param transport: Sends an exception to the error tracker
+        :param summary_transport: Sends the summary of repeated exceptions
+                                  to the error tracker. Summaries are only
+                                  logged if this is None
+        :param sample_rate: The fraction of repeated occurrences that are
+                            logged and reported anyway
+        :param rate_limit: The (rate, burst) of reports per second
+        :param summary_interval: The interval in seconds at which repeated
+                                 occurrences are summarized
+        :param max_pending: The maximum amount of exceptions waiting to be
+                            reported. Further exceptions are dropped
+        :param logger: The logger to use
+        """
+        self.logger = logger if logger is not None \
+            else logging.getLogger(self.__class__.__name__)
+        self.transport = transport
+        self.summary_transport = summary_transport
+        self.sample_rate = sample_rate
+        self.rate_limit = TokenBucket(*rate_limit)
+        self.summary_interval = summary_interval
+
+        self.occurred = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.sent = 0
+        self.rate_limited = 0
+
+        # Fingerprint -> [description, first exception text, occurrences]
+        self._window = {}  # type: Dict[int, List]
+        self._lock = Lock()
+        self._queue = Queue(max_pending)  # type: Queue
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def report(self, exception: BaseException, description: str):
+        """
+        Reports an exception
+        :param exception: The exception
+        :param description: Where the exception occurred,
+                            for example "Exception during Message"
+        :return: None
+        """
+        fingerprint = self.fingerprint(exception, description)
+        with self._lock:
+            self.occurred += 1
+            entry = self._window.get(fingerprint)
+            if entry is None:
+                self._window[fingerprint] = [
+                    description,
+                    "{}: {}".format(type(exception).__name__, exception),
+                    1
+                ]
+            else:
+                entry[2] += 1
+                if self.sample_rate <= 0.0 \
+                        or random.random() >= self.sample_rate:
+                    self.suppressed += 1
+                    return
+
+        try:
+            self._queue.put_nowait((exception, description))
+        except Full:
+            with self._lock:
+                self.dropped += 1
+
+    @staticmethod
+    def fingerprint(exception: BaseException, description: str) -> int:
+        """
+        Calculates a fingerprint of an exception without formatting its
+        traceback
+        :param exception: The exception
+        :param description: Where the exception occurred
+        :return: The fingerprint
+        """
+        frames = []
+        tb = exception.__traceback__
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append((code.co_filename, code.co_name, tb.tb_lineno))
+            tb = tb.tb_next
+        return hash((description, type(exception), tuple(frames)))
+
+    def flush(self):
+        """
+        Waits until all pending exceptions were logged and reported
+        :return: None
+        """
+        self._queue.join()
+
+    def summarize(self) -> List[str]:
+        """
+        Summarizes the exceptions that occurred repeatedly since the last
+        summary and starts a new summary interval
+        :return: The summary, one line for every repeated exception
+        """
+        with self._lock:
+            window, self._window = self._window, {}
+        return [
+            "{}x {}: {}".format(occurrences, description, text)
+            for description, text, occurrences in window.values()
+            if occurrences > 1
+        ]
+
+    def _run(self):
+        """
+        Logs and reports queued exceptions and periodically summarizes
+        repeated exceptions
+        :return: None
+        """
+        next_summary = time.monotonic() + self.summary_interval
+        while True:
+            try:
+                timeout = max(next_summary - time.monotonic(), 0.0)
+                exception, description = self._queue.get(timeout=timeout)
+                try:
+                    self._send(exception, description)
+                finally:
+                    self._queue.task_done()
+            except Empty:
+                pass
+
+            if time.monotonic() >= next_summary:
+                next_summary = time.monotonic() + self.summary_interval
+                self._send_summary()
+
+    def _send(self, exception: BaseException, description: str):
+        """
+        Logs an exception and reports it if the rate limit allows it
+        :param exception: The exception
+        :param description: Where the exception occurred
+        :return: None
+        """
+        self.logger.error("{}: {}\n{}".format(
+            description,
+            exception,
+            "\n".join(traceback.format_tb(exception.__traceback__))
+        ))
+        if not self.rate_limit.consume():
+            self.rate_limited += 1
+            return
+        try:
+            self.transport(exception)
+            self.sent += 1
+        except Exception as e:
+            self.logger.warning("Failed to report exception: {}".format(e))
+
+    def _send_summary(self):
+        """
+        Logs and reports the summary of repeated exceptions
+        :return: None
+        """
+        lines = self.summarize()
+        if len(lines) == 0:
+            return
+        summary = "Repeated exceptions in the last {:g}s:\n{}".format(
+            self.summary_interval, "\n".join(lines)
+        )
+        self.logger.warning(summary)
+        if self.summary_transport is not None:
+            try:
+                self.summary_transport(summary)
+            except Exception as e:
+                self.logger.warning(
+                    "Failed to report exception summary: {}".format(e)
+                )
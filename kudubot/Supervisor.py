@@ -0,0 +1,147 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import logging
+import traceback
+from threading import Thread, Lock
+from sqlalchemy.engine import Engine
+from bokkichat.connection.Connection import Connection
+from kudubot.Bot import Bot
+from kudubot.db.config.DbConfig import DbConfig
+from kudubot.execution.Scheduler import Scheduler, Job
+from typing import Type, List, Dict
+
+
+class Supervisor:
+    """
+    Runs several bots in one process.
+    The bots may be of different classes. Bots whose database
+    configurations are identical share a database engine and its
+    connection pool, and the background jobs of all bots are executed
+    by one shared scheduler.
+    Each bot still has its own connection, which is looped on a
+    separate thread.
+    """
+
+    def __init__(self, bg_workers: int = 4):
+        """
+        Initializes the supervisor
+        :param bg_workers: The amount of threads that execute the
+                           background jobs of all bots
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.scheduler = Scheduler(bg_workers, "supervisor-bg")
+        self.bots = []  # type: List[Bot]
+        self.engines = {}  # type: Dict[str, Engine]
+        self._jobs = {}  # type: Dict[int, List[Job]]
+        self._lock = Lock()
+
+    def engine(self, db_config: DbConfig) -> Engine:
+        """
+        Creates an engine for a database configuration, or returns the
+        engine of an identical configuration created earlier
+        :param db_config: The database configuration
+        :return: The engine
+        """
+        key = db_config.engine_key()
+        with self._lock:
+            engine = self.engines.get(key)
+            if engine is None:
+                engine = db_config.create_engine()
+                self.engines[key] = engine
+            return engine
+
+    def add(
+            self,
+            bot_cls: Type[Bot],
+            connection_cls: Type[Connection],
+            location: str
+    ) -> Bot:
+        """
+        Loads a bot from its configuration directory
+        :param bot_cls: The class of the bot
+        :param connection_cls: The class of the bot's connection
+        :param location: The configuration directory of the bot
+        :return: The bot
+        :raises ConfigurationError: If the configuration is invalid
+        """
+        existing_jobs = list(self.scheduler.jobs)
+        bot = bot_cls.load(
+            connection_cls,
+            location,
+            engine_factory=self.engine,
+            scheduler=self.scheduler
+        )
+        self.bots.append(bot)
+        self._jobs[id(bot)] = [
+            job for job in self.scheduler.jobs if job not in existing_jobs
+        ]
+        return bot
+
+    def run(self):
+        """
+        Starts all bots and runs the shared scheduler until all bots
+        have stopped
+        :return: None
+        """
+        scheduler_thread = Thread(
+            target=self.scheduler.run, name="supervisor-scheduler"
+        )
+        scheduler_thread.start()
+
+        try:
+            threads = []
+            for bot in self.bots:
+                thread = Thread(
+                    target=self._run_bot,
+                    args=(bot,),
+                    name=bot.__class__.__name__,
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+            for thread in threads:
+                while thread.is_alive():
+                    # Joining with a timeout keeps KeyboardInterrupts working
+                    thread.join(1.0)
+        finally:
+            self.scheduler.stop()
+            scheduler_thread.join()
+
+    def _run_bot(self, bot: Bot):
+        """
+        Runs a bot until its connection's loop ends, then removes its
+        background jobs from the shared scheduler
+        :param bot: The bot to run
+        :return: None
+        """
+        try:
+            bot.start()
+        except BaseException as e:
+            bot.logger.error(
+                "Fatal Exception: {}\n{}".format(
+                    e,
+                    "\n".join(traceback.format_tb(e.__traceback__))
+                )
+            )
+        finally:
+            for job in self._jobs.pop(id(bot), []):
+                self.scheduler.remove_job(job)
+            self.logger.info("Stopped " + bot.name())
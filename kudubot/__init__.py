@@ -17,16 +17,30 @@ You should have received a copy of the GNU General Public License
 along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import pkg_resources
-
-
 sentry_dsn = "https://cc8787586ec047858ecff38befd67018@sentry.namibsun.net/4"
 """
 The sentry DSN for this project
 """
 
 
-version = pkg_resources.get_distribution("kudubot").version
-"""
-The current version of the package
-"""
+def __getattr__(name: str) -> str:
+    """
+    Provides kudubot.version, the current version of the package.
+    Reading the package metadata is slow, so it is only read once the
+    version is accessed for the first time.
+    :param name: The name of the module attribute
+    :return: The value of the attribute
+    """
+    if name != "version":
+        raise AttributeError("module 'kudubot' has no attribute " + name)
+
+    try:
+        from importlib.metadata import version as distribution_version
+        package_version = distribution_version("kudubot")
+    except ImportError:  # pragma: no cover
+        # Python < 3.8
+        import pkg_resources
+        package_version = pkg_resources.get_distribution("kudubot").version
+
+    globals()["version"] = package_version
+    return package_version
@@ -0,0 +1,84 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from collections import OrderedDict
+from typing import Hashable
+
+
+class DedupWindow:
+    """
+    Remembers keys for a limited time to detect duplicates.
+    Holds at most a fixed amount of keys, the oldest keys are forgotten
+    first once it is full, even if they are still within the time window.
+    Keeps track of how many checks found a duplicate.
+    """
+
+    def __init__(self, max_size: int, window: float):
+        """
+        Initializes the window
+        :param max_size: The maximum amount of remembered keys
+        :param window: The time in seconds for which keys are remembered
+        """
+        self.max_size = max_size
+        self.window = window
+        self.hits = 0
+        self.misses = 0
+        self._seen = OrderedDict()  # type: OrderedDict
+        self._lock = Lock()
+
+    def check(self, key: Hashable) -> bool:
+        """
+        Checks whether a key was seen within the time window and
+        remembers it
+        :param key: The key
+        :return: True if the key is a duplicate, False otherwise
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Keys are ordered by the time they were first seen
+            while len(self._seen) > 0:
+                if now - next(iter(self._seen.values())) < self.window:
+                    break
+                self._seen.popitem(last=False)
+
+            if key in self._seen:
+                self.hits += 1
+                return True
+
+            self.misses += 1
+            self._seen[key] = now
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+            return False
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: The fraction of checks that found a duplicate
+        """
+        checks = self.hits + self.misses
+        return self.hits / checks if checks > 0 else 0.0
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of remembered keys
+        """
+        return len(self._seen)
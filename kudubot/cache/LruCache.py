@@ -0,0 +1,103 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Optional, Hashable
+
+
+class LruCache:
+    """
+    A thread-safe cache that holds a limited amount of entries and evicts
+    the least recently used entry once it is full.
+    Keeps track of how many lookups were hits or misses.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initializes the cache
+        :param max_size: The maximum amount of entries in the cache
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Retrieves an entry from the cache
+        :param key: The key of the entry
+        :param default: Returned if the entry is not cached
+        :return: The cached value or the default value
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Stores an entry in the cache, evicting the least recently used
+        entry if the cache is full
+        :param key: The key of the entry
+        :param value: The value to store
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def remove(self, key: Hashable):
+        """
+        Removes an entry from the cache if it exists
+        :param key: The key of the entry
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries from the cache
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: The fraction of lookups that were hits
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of cached entries
+        """
+        return len(self._entries)
@@ -0,0 +1,124 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Optional, Hashable, Callable
+
+
+class TtlCache:
+    """
+    A thread-safe cache whose entries expire after a fixed amount of time.
+    Holds a limited amount of entries and evicts the least recently used
+    entry once it is full.
+    Keeps track of how many lookups were hits or misses.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initializes the cache
+        :param max_size: The maximum amount of entries in the cache
+        :param ttl: The time in seconds after which entries expire
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Retrieves an entry from the cache
+        :param key: The key of the entry
+        :param default: Returned if the entry is not cached or expired
+        :return: The cached value or the default value
+        """
+        now = time.monotonic()
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if now >= expires_at:
+                self._entries.pop(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Stores an entry in the cache, evicting the least recently used
+        entry if the cache is full
+        :param key: The key of the entry
+        :param value: The value to store
+        :return: None
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def remove(self, key: Hashable):
+        """
+        Removes an entry from the cache if it exists
+        :param key: The key of the entry
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def remove_matching(self, predicate: Callable[[Hashable], bool]):
+        """
+        Removes all entries whose keys match a predicate
+        :param predicate: Returns True for the keys to remove
+        :return: None
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._entries.pop(key)
+
+    def clear(self):
+        """
+        Removes all entries from the cache
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: The fraction of lookups that were hits
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of cached entries, including expired entries
+                 that were not removed yet
+        """
+        return len(self._entries)
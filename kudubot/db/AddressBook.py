@@ -0,0 +1,125 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.session import Session, make_transient_to_detached
+from kudubot.cache.LruCache import LruCache
+from kudubot.db.Address import Address
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AddressBook:
+    """
+    Provides access to the addressbook table, caching the IDs of
+    recently used addresses in memory.
+    New addresses are written to the database and the cache at once.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initializes the address book
+        :param max_size: The maximum amount of cached addresses
+        """
+        self.cache = LruCache(max_size)
+
+    def get_or_create(self, db_session: Session, address: str) -> Address:
+        """
+        Retrieves the database entry of an address, creating it if it does
+        not exist yet. Cached addresses are attached to the database session
+        without querying the database.
+        New addresses are committed together with the pending changes of
+        the session, an address that was created concurrently is loaded
+        instead.
+        :param db_session: The database session to use
+        :param address: The address to retrieve
+        :return: The database entry of the address
+        """
+        address_id = self.cache.get(address)
+        if address_id is not None:
+            entry = Address(id=address_id, address=address)
+            make_transient_to_detached(entry)
+            return db_session.merge(entry, load=False)
+
+        entry = db_session.query(Address).filter_by(address=address).first()
+        if entry is None:
+            try:
+                # A savepoint keeps the caller's pending changes if the
+                # insert fails
+                with db_session.begin_nested():
+                    entry = Address(address=address)
+                    db_session.add(entry)
+            except IntegrityError:
+                # Another thread or process added the address in the meantime
+                entry = db_session.query(Address)\
+                    .filter_by(address=address).one()
+            address_id = entry.id
+            db_session.commit()
+        else:
+            address_id = entry.id
+
+        self.cache.put(address, address_id)
+        return entry
+
+    async def get_or_create_async(
+            self,
+            db_session: "AsyncSession",
+            address: str
+    ) -> Address:
+        """
+        Works like get_or_create, using an asyncio database session.
+        Requires SQLAlchemy 1.4 or later
+        :param db_session: The asyncio database session to use
+        :param address: The address to retrieve
+        :return: The database entry of the address
+        """
+        address_id = self.cache.get(address)
+        if address_id is not None:
+            entry = Address(id=address_id, address=address)
+            make_transient_to_detached(entry)
+            return await db_session.merge(entry, load=False)
+
+        query = select(Address).filter_by(address=address)
+        entry = (await db_session.execute(query)).scalars().first()
+        if entry is None:
+            try:
+                async with db_session.begin_nested():
+                    entry = Address(address=address)
+                    db_session.add(entry)
+            except IntegrityError:
+                entry = (await db_session.execute(query)).scalars().one()
+            address_id = entry.id
+            await db_session.commit()
+        else:
+            address_id = entry.id
+
+        self.cache.put(address, address_id)
+        return entry
+
+    def forget(self, address: str):
+        """
+        Removes an address from the cache.
+        Needs to be called when an address is deleted from the database.
+        :param address: The address to remove
+        :return: None
+        """
+        self.cache.remove(address)
@@ -0,0 +1,226 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import logging
+from hashlib import sha256
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.exc import DatabaseError
+from typing import Callable, List, Dict, Tuple, Optional, Set
+from kudubot.db.SchemaVersion import SchemaVersion
+
+
+class SchemaManager:
+    """
+    Keeps the database schema up to date.
+    The schema version of every component is stamped in the kudubot_schema
+    table, together with a fingerprint of the table definitions.
+    If both are current, checking the schema on startup only takes a
+    single query. Otherwise missing tables are created and pending
+    migrations are applied in order.
+    Components without a stamp whose tables did not exist before this
+    process started are stamped at their latest version, since their
+    tables are created using the current table definitions. This includes
+    tables created while the schema of another bot sharing the database
+    was checked.
+    """
+
+    FRAMEWORK_COMPONENT = "kudubot"
+    """
+    The component name of kudubot's own tables
+    """
+
+    FRAMEWORK_MIGRATIONS = []  # type: List[Callable[[Connection], None]]
+    """
+    The migrations of kudubot's own tables like the address book
+    """
+
+    FRAMEWORK_TABLES = ["addressbook"]
+    """
+    The names of kudubot's own tables, except for the version stamps
+    """
+
+    _created_tables = {}  # type: Dict[str, Set[str]]
+    """
+    The tables created by this process, keyed by the database URL
+    """
+
+    def __init__(self, engine: Engine, metadata: MetaData):
+        """
+        Initializes the schema manager
+        :param engine: The database engine
+        :param metadata: The metadata containing all table definitions
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.engine = engine
+        self.metadata = metadata
+
+    def fingerprint(self) -> str:
+        """
+        Calculates a hash of the table definitions in the metadata
+        :return: The hash
+        """
+        definition = []
+        for table in sorted(self.metadata.tables.values(),
+                            key=lambda x: x.name):
+            definition.append(table.name)
+            for column in table.columns:
+                definition.append("{} {!r} {} {}".format(
+                    column.name,
+                    column.type,
+                    column.primary_key,
+                    column.nullable
+                ))
+        return sha256("\n".join(definition).encode("utf-8")).hexdigest()
+
+    def ensure(
+            self,
+            component: str,
+            migrations: List[Callable[[Connection], None]],
+            tables: Optional[List[str]] = None
+    ):
+        """
+        Makes sure that the schema is up to date
+        :param component: The name of the component, usually the bot
+        :param migrations: The migrations of the component's tables in the
+                           order they have to be applied. A migration
+                           receives a database connection inside a
+                           transaction
+        :param tables: The names of the component's tables. If None, the
+                       component counts as new if any table did not exist
+                       before this process started
+        :return: None
+        """
+        fingerprint = self.fingerprint()
+        targets = {
+            self.FRAMEWORK_COMPONENT:
+                (self.FRAMEWORK_MIGRATIONS, "", self.FRAMEWORK_TABLES),
+            component: (migrations, fingerprint, tables)
+        }  # type: Dict[str, Tuple[List[Callable], str, Optional[List[str]]]]
+
+        try:
+            with self.engine.connect() as connection:
+                stamps = {
+                    row[0]: (row[1], row[2])
+                    for row in connection.execute(
+                        SchemaVersion.__table__.select()
+                    )
+                }
+        except DatabaseError:
+            stamps = None
+
+        if stamps is not None and all(
+                stamps.get(name) == (len(target_migrations), target_fp)
+                for name, (target_migrations, target_fp, _) in targets.items()
+        ):
+            return
+
+        self.logger.info("Updating database schema")
+        if stamps is None:
+            stamps = self._initialize(targets)
+
+        with self.engine.begin() as connection:
+            created = self._created_tables.setdefault(
+                str(self.engine.url), set()
+            )
+            existing = set(inspect(connection).get_table_names())
+            missing = set(self.metadata.tables.keys()) - existing
+            existing -= created
+            # Creates tables that were added without a migration
+            self.metadata.create_all(connection, checkfirst=True)
+
+            for name, (target_migrations, target_fp, target_tables) \
+                    in targets.items():
+                if name in stamps:
+                    version = stamps[name][0]
+                elif self._is_new(target_tables, existing):
+                    version = len(target_migrations)
+                else:
+                    version = 0
+                for index in range(version, len(target_migrations)):
+                    self.logger.info(
+                        "Applying migration {} of {}".format(index + 1, name)
+                    )
+                    target_migrations[index](connection)
+                self._stamp(
+                    connection, name, len(target_migrations), target_fp
+                )
+        created.update(missing)
+
+    def _initialize(
+            self,
+            targets: Dict[str, Tuple[List[Callable], str, Optional[List[str]]]]
+    ) -> Dict[str, Tuple[int, str]]:
+        """
+        Determines the schema versions of a database without version stamps.
+        The tables of a new database are created using the current table
+        definitions, so no migrations need to be applied. Databases created
+        before schema versions existed are at version 0.
+        :param targets: The migrations and fingerprint of every component
+        :return: The schema versions to assume
+        """
+        existing = set(inspect(self.engine).get_table_names())
+        legacy = len(existing.intersection(self.metadata.tables.keys())) > 0
+        return {
+            name: (0 if legacy else len(target_migrations), "")
+            for name, (target_migrations, _, _) in targets.items()
+        }
+
+    def _is_new(self, tables: Optional[List[str]], existing: Set[str]) \
+            -> bool:
+        """
+        Checks whether a component's tables were created by this process
+        :param tables: The names of the component's tables. If None, all
+                       tables in the metadata are considered
+        :param existing: The names of the tables that existed before this
+                         process created any
+        :return: True if none of the component's tables existed, or, if
+                 the tables are not known, if any table did not exist
+        """
+        if tables is None:
+            known = set(self.metadata.tables.keys())
+            known.discard(SchemaVersion.__tablename__)
+            return not known.issubset(existing)
+        return len(existing.intersection(tables)) == 0
+
+    @staticmethod
+    def _stamp(
+            connection: Connection,
+            component: str,
+            version: int,
+            fingerprint: str
+    ):
+        """
+        Stores the schema version of a component
+        :param connection: The database connection
+        :param component: The component
+        :param version: The schema version
+        :param fingerprint: The fingerprint of the table definitions
+        :return: None
+        """
+        table = SchemaVersion.__table__
+        updated = connection.execute(
+            table.update()
+            .where(table.c.component == component)
+            .values(version=version, fingerprint=fingerprint)
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(
+                component=component, version=version, fingerprint=fingerprint
+            ))
@@ -0,0 +1,49 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from kudubot.db import Base
+from sqlalchemy import Column, String, Integer
+
+
+class SchemaVersion(Base):
+    """
+    SQLAlchemy table that stores the schema version of every component
+    using the database, for example kudubot itself and the bot
+    """
+
+    __tablename__ = "kudubot_schema"
+    """
+    The table's name
+    """
+
+    component = Column(String(255), primary_key=True, nullable=False)
+    """
+    The name of the component
+    """
+
+    version = Column(Integer, nullable=False)
+    """
+    The amount of migrations of the component that have been applied
+    """
+
+    fingerprint = Column(String(64), nullable=False)
+    """
+    A hash of the table definitions known to the component when the
+    version was stored
+    """
@@ -17,15 +17,196 @@ You should have received a copy of the GNU General Public License
 along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url, URL
+from kudubot.exceptions import ConfigurationError
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
 
 class DbConfig:
     """
-    Class that defines common methods of database configurations
+    Class that defines common methods of database configurations.
+    Besides the database URI, a configuration holds options for the
+    SQLAlchemy engine like the connection pool settings.
+    """
+
+    DEFAULT_ENGINE_OPTIONS = {
+        "mysql": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_pre_ping": True,
+            "pool_recycle": 3600
+        },
+        "postgresql": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_pre_ping": True
+        }
+    }  # type: Dict[str, Dict[str, Any]]
+    """
+    The default engine options of database backends.
+    MySQL closes idle connections after a while, so connections are checked
+    before they are used and recycled after an hour.
+    SQLite has no defaults: file databases don't use a connection pool
+    unless a pool size is configured.
     """
 
+    ASYNC_DRIVERS = {
+        "sqlite": "aiosqlite",
+        "mysql": "aiomysql",
+        "postgresql": "asyncpg"
+    }
+    """
+    The asyncio drivers used for asyncio engines, by database backend
+    """
+
+    def __init__(
+            self,
+            pool_size: Optional[int] = None,
+            max_overflow: Optional[int] = None,
+            pool_timeout: Optional[float] = None,
+            pool_pre_ping: Optional[bool] = None,
+            pool_recycle: Optional[int] = None,
+            isolation_level: Optional[str] = None
+    ):
+        """
+        Initializes the engine options. Options that are None use the
+        default of the database backend.
+        :param pool_size: The amount of connections kept in the pool
+        :param max_overflow: The amount of connections that may be opened
+                             in addition to the pool size
+        :param pool_timeout: The time in seconds to wait for a connection
+                             from the pool
+        :param pool_pre_ping: Whether or not connections are tested before
+                              they are used
+        :param pool_recycle: Connections are replaced after this many
+                             seconds
+        :param isolation_level: The transaction isolation level,
+                                for example "READ COMMITTED"
+        """
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
+        self.isolation_level = isolation_level
+
     def to_uri(self) -> str:
         """
         Turns the configuration into an URI that SQLAlchemy can use
         :return: The URI
         """
         raise NotImplementedError()
+
+    def engine_options(self) -> Dict[str, Any]:
+        """
+        Combines the configured engine options with the defaults of the
+        database backend
+        :return: The keyword arguments for sqlalchemy.create_engine
+        """
+        backend = make_url(self.to_uri()).get_backend_name()
+        options = dict(self.DEFAULT_ENGINE_OPTIONS.get(backend, {}))
+
+        configured = {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+            "isolation_level": self.isolation_level
+        }
+        for key, value in configured.items():
+            if value is not None:
+                options[key] = value
+
+        if backend == "sqlite" and (
+                "pool_size" in options or "max_overflow" in options
+        ):
+            # Depending on the SQLAlchemy version, SQLite file databases
+            # use a NullPool or a QueuePool by default. Only a QueuePool
+            # accepts pool size options, so it is selected explicitly.
+            # Pooled connections are handed to one thread at a time, but
+            # not necessarily to the thread that opened them
+            options["poolclass"] = QueuePool
+            connect_args = dict(options.get("connect_args", {}))
+            connect_args["check_same_thread"] = False
+            options["connect_args"] = connect_args
+
+        return options
+
+    def engine_key(self) -> str:
+        """
+        Identifies the engine created by this configuration.
+        Configurations with the same key may share an engine
+        :return: The key
+        """
+        return "{}:{}".format(
+            self.__class__.__name__, sorted(vars(self).items())
+        )
+
+    def create_engine(self) -> Engine:
+        """
+        Creates an SQLAlchemy engine using the configuration
+        :return: The engine
+        """
+        return create_engine(self.to_uri(), **self.engine_options())
+
+    def to_async_url(self) -> URL:
+        """
+        Turns the configuration into an URL that uses an asyncio driver
+        :return: The URL
+        """
+        url = make_url(self.to_uri())
+        backend = url.get_backend_name()
+        driver = self.ASYNC_DRIVERS.get(backend)
+        if driver is None:
+            raise ConfigurationError(
+                "No asyncio driver known for database " + backend
+            )
+        return url.set(drivername="{}+{}".format(backend, driver))
+
+    def async_engine_options(self) -> Dict[str, Any]:
+        """
+        :return: The keyword arguments for
+                 sqlalchemy.ext.asyncio.create_async_engine
+        """
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+        options = self.engine_options()
+        if options.get("poolclass") is QueuePool:
+            options["poolclass"] = AsyncAdaptedQueuePool
+        return options
+
+    def create_async_engine(self) -> "AsyncEngine":
+        """
+        Creates an SQLAlchemy asyncio engine using the configuration.
+        Requires SQLAlchemy 1.4 or later and the asyncio driver of the
+        database, see ASYNC_DRIVERS
+        :return: The engine
+        """
+        from sqlalchemy.ext.asyncio import create_async_engine
+        return create_async_engine(
+            self.to_async_url(), **self.async_engine_options()
+        )
+
+    @property
+    def maintenance_interval(self) -> Optional[float]:
+        """
+        :return: The interval in seconds at which maintain() should be
+                 called, None if no maintenance is necessary
+        """
+        return None
+
+    def maintain(self, engine: Engine):
+        """
+        Performs periodic maintenance of the database
+        :param engine: The engine of the database
+        :return: None
+        """
+        pass
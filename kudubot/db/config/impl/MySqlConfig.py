@@ -17,6 +17,7 @@ You should have received a copy of the GNU General Public License
 along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from typing import Any
 from kudubot.db.config.DbConfig import DbConfig
 
 
@@ -32,6 +33,7 @@ class MySqlConfig(DbConfig):
             name: str,
             user: str,
             password: str,
+            **engine_options: Any
     ):
         """
         Initializes the database configuration
@@ -40,7 +42,10 @@ class MySqlConfig(DbConfig):
         :param name: The database name
         :param user: The database user
         :param password: The database password
+        :param engine_options: Options for the SQLAlchemy engine,
+                               see DbConfig
         """
+        super().__init__(**engine_options)
         self.address = address
         self.port = port
         self.name = name
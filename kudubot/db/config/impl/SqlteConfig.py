@@ -17,20 +17,67 @@ You should have received a copy of the GNU General Public License
 along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 from kudubot.db.config.DbConfig import DbConfig
 
+if TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
 
 class SqliteConfig(DbConfig):
     """
     Database configuration for SQLite
     """
 
-    def __init__(self, path: str):
+    def __init__(
+            self,
+            path: str,
+            performance_mode: bool = False,
+            busy_timeout: int = 5000,
+            cache_size: int = 16000,
+            mmap_size: int = 268435456,
+            checkpoint_pages: int = 1000,
+            checkpoint_interval: Optional[float] = 300.0,
+            **engine_options: Any
+    ):
         """
         Initializes the database configuration
         :param path: The path to the SQLite database file
+        :param performance_mode: Enables the settings for concurrent
+                                 access. Uses a write-ahead log instead of
+                                 a rollback journal, so that readers and a
+                                 writer don't block each other, and only
+                                 syncs to disk at checkpoints. Transactions
+                                 stay atomic, but the latest transactions
+                                 may be lost on power failure.
+                                 Connections are pooled in this mode.
+        :param busy_timeout: The time in milliseconds to wait for a lock
+                             in performance mode
+        :param cache_size: The page cache size of every connection in KiB
+                           in performance mode
+        :param mmap_size: The amount of bytes of the database file that
+                          are memory-mapped in performance mode
+        :param checkpoint_pages: The size of the write-ahead log in pages
+                                 at which it is written back to the database
+                                 automatically
+        :param checkpoint_interval: The interval in seconds at which the
+                                    write-ahead log is written back to the
+                                    database and truncated. None disables
+                                    this
+        :param engine_options: Options for the SQLAlchemy engine,
+                               see DbConfig
         """
+        super().__init__(**engine_options)
         self.path = path
+        self.performance_mode = performance_mode
+        self.busy_timeout = busy_timeout
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.checkpoint_pages = checkpoint_pages
+        self.checkpoint_interval = checkpoint_interval
 
     def to_uri(self) -> str:
         """
@@ -38,3 +85,89 @@ class SqliteConfig(DbConfig):
         :return: The URI
         """
         return "sqlite:///{}".format(self.path)
+
+    def pragmas(self) -> List[str]:
+        """
+        :return: The PRAGMA statements executed for every new connection
+        """
+        if not self.performance_mode:
+            return []
+        return [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            "PRAGMA busy_timeout={}".format(int(self.busy_timeout)),
+            "PRAGMA cache_size=-{}".format(int(self.cache_size)),
+            "PRAGMA mmap_size={}".format(int(self.mmap_size)),
+            "PRAGMA wal_autocheckpoint={}".format(int(self.checkpoint_pages))
+        ]
+
+    def engine_options(self) -> Dict[str, Any]:
+        """
+        Uses a connection pool in performance mode, so that the PRAGMA
+        statements are not executed for every session
+        :return: The keyword arguments for sqlalchemy.create_engine
+        """
+        options = super().engine_options()
+        if self.performance_mode:
+            options.setdefault("poolclass", QueuePool)
+            options.setdefault("pool_size", 5)
+            options.setdefault("max_overflow", 10)
+            # Pooled connections are handed to one thread at a time
+            connect_args = dict(options.get("connect_args", {}))
+            connect_args["check_same_thread"] = False
+            options["connect_args"] = connect_args
+        return options
+
+    def create_engine(self) -> Engine:
+        """
+        Creates an SQLAlchemy engine that executes the PRAGMA statements
+        for every new connection
+        :return: The engine
+        """
+        engine = super().create_engine()
+        self._execute_pragmas_on_connect(engine)
+        return engine
+
+    def create_async_engine(self) -> "AsyncEngine":
+        """
+        Creates an SQLAlchemy asyncio engine that executes the PRAGMA
+        statements for every new connection
+        :return: The engine
+        """
+        engine = super().create_async_engine()
+        self._execute_pragmas_on_connect(engine.sync_engine)
+        return engine
+
+    def _execute_pragmas_on_connect(self, engine: Engine):
+        """
+        Executes the PRAGMA statements for every new connection of an engine
+        :param engine: The engine
+        :return: None
+        """
+        pragmas = self.pragmas()
+
+        if len(pragmas) > 0:
+            def configure_connection(dbapi_connection: Any, _: Any):
+                cursor = dbapi_connection.cursor()
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+                cursor.close()
+
+            event.listen(engine, "connect", configure_connection)
+
+    @property
+    def maintenance_interval(self) -> Optional[float]:
+        """
+        :return: The checkpoint interval in performance mode
+        """
+        return self.checkpoint_interval if self.performance_mode else None
+
+    def maintain(self, engine: Engine):
+        """
+        Writes the write-ahead log back to the database and truncates it.
+        The automatic checkpoints never shrink the log file
+        :param engine: The engine of the database
+        :return: None
+        """
+        with engine.connect() as connection:
+            connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
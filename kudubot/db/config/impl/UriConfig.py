@@ -0,0 +1,43 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import Any
+from kudubot.db.config.DbConfig import DbConfig
+
+
+class UriConfig(DbConfig):
+    """
+    Database configuration for an arbitrary database URI
+    """
+
+    def __init__(self, uri: str, **engine_options: Any):
+        """
+        Initializes the database configuration
+        :param uri: The database URI
+        :param engine_options: Options for the SQLAlchemy engine,
+                               see DbConfig
+        """
+        super().__init__(**engine_options)
+        self.uri = uri
+
+    def to_uri(self) -> str:
+        """
+        :return: The database URI
+        """
+        return self.uri
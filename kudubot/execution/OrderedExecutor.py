@@ -0,0 +1,108 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import logging
+import traceback
+from collections import deque
+from threading import Lock, BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Any
+
+
+class OrderedExecutor:
+    """
+    Executes tasks on a pool of worker threads.
+    Tasks that share a key are executed one after another in the order
+    they were submitted, while tasks with different keys run concurrently.
+    The amount of queued and running tasks is limited, submitting a task
+    blocks while that limit is reached.
+    """
+
+    def __init__(self, workers: int, max_pending: int, name: str):
+        """
+        Initializes the executor
+        :param workers: The amount of worker threads
+        :param max_pending: The maximum amount of queued and running tasks
+        :param name: The name of the executor, used for thread names
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=name
+        )
+        self._slots = BoundedSemaphore(max_pending)
+        self._queues = {}  # type: Dict[Hashable, deque]
+        self._lock = Lock()
+
+    def submit(self, key: Hashable, func: Callable, *args: Any):
+        """
+        Submits a task. Blocks until the amount of pending tasks is
+        below the limit.
+        :param key: Tasks with the same key are executed in order
+        :param func: The function to execute
+        :param args: The arguments for the function
+        :return: None
+        """
+        self._slots.acquire()
+        with self._lock:
+            self.pending += 1
+            queue = self._queues.get(key)
+            if queue is not None:
+                # A worker is already processing tasks with this key
+                queue.append((func, args))
+                return
+            self._queues[key] = deque([(func, args)])
+        self._pool.submit(self._drain, key)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the worker threads once all pending tasks are done
+        :param wait: Whether or not to wait for the pending tasks
+        :return: None
+        """
+        self._pool.shutdown(wait=wait)
+
+    def _drain(self, key: Hashable):
+        """
+        Executes the tasks of a key until none are left
+        :param key: The key of the tasks
+        :return: None
+        """
+        while True:
+            with self._lock:
+                queue = self._queues[key]
+                if len(queue) == 0:
+                    self._queues.pop(key)
+                    return
+                func, args = queue.popleft()
+
+            try:
+                func(*args)
+            except BaseException as e:
+                self.logger.error(
+                    "Exception in worker thread: {}\n{}".format(
+                        e,
+                        "\n".join(traceback.format_tb(e.__traceback__))
+                    )
+                )
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                self._slots.release()
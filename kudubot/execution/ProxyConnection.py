@@ -0,0 +1,96 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Any, Callable
+from bokkichat.entities.Address import Address
+from bokkichat.connection.Connection import Connection
+from bokkichat.entities.message.Message import Message
+
+
+class ProxyConnection(Connection):
+    """
+    Stands in for a connection in another process.
+    Sent messages are put into a queue together with the label of the real
+    connection, from which the process owning the real connection sends
+    them. Messages are not received through this connection, they are
+    handed to the bot directly.
+    """
+
+    def __init__(
+            self,
+            address: Address,
+            settings: Any,
+            outbox: Any,
+            label: str
+    ):
+        """
+        Initializes the connection
+        :param address: The address of the real connection
+        :param settings: The settings of the real connection
+        :param outbox: The queue that sent messages are put into
+        :param label: The label of the real connection in its bot
+        """
+        super().__init__(settings)
+        self._address = address
+        self.outbox = outbox
+        self.label = label
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the connection class
+        """
+        return "proxy"
+
+    @property
+    def address(self) -> Address:
+        """
+        :return: The address of the real connection
+        """
+        return self._address
+
+    def send(self, message: Message):
+        """
+        Hands a message to the process owning the real connection
+        :param message: The message to send
+        :return: None
+        """
+        self.outbox.put((self.label, message))
+
+    def receive(self) -> List[Message]:
+        """
+        Messages are not received through this connection
+        :return: An empty list
+        """
+        return []
+
+    def loop(self, callback: Callable, sleep_time: int = 1):
+        """
+        Messages are not received through this connection
+        :param callback: Ignored
+        :param sleep_time: Ignored
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        :return: None
+        """
+        pass
@@ -0,0 +1,335 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import heapq
+import random
+import logging
+import traceback
+from itertools import count
+from queue import Queue
+from threading import Condition, Thread
+from typing import Callable, List, Tuple, Optional, Union
+
+
+class Job:
+    """
+    A job that is executed periodically by a Scheduler
+    """
+
+    SKIP = "skip"
+    """
+    Overlap policy: If the job is still running when it is due again,
+    that execution is skipped
+    """
+
+    QUEUE = "queue"
+    """
+    Overlap policy: If the job is still running when it is due again,
+    it is executed once more as soon as the running execution finishes
+    """
+
+    ALLOW = "allow"
+    """
+    Overlap policy: The job is executed whenever it is due, even if it is
+    still running
+    """
+
+    def __init__(
+            self,
+            name: str,
+            func: Callable[[], None],
+            interval: Union[float, Callable[[], float]],
+            jitter: float,
+            overlap: str
+    ):
+        """
+        Initializes the job
+        :param name: The name of the job
+        :param func: The function to execute
+        :param interval: The time between executions in seconds, or a
+                         function that returns it. The function is called
+                         again for every execution
+        :param jitter: Executions are delayed by a random amount of up to
+                       this many seconds
+        :param overlap: The overlap policy, Job.SKIP, Job.QUEUE or Job.ALLOW
+        """
+        if overlap not in [Job.SKIP, Job.QUEUE, Job.ALLOW]:
+            raise ValueError("Invalid overlap policy " + overlap)
+        self.interval = interval
+        self.period = 0.0
+        if self.next_interval() <= 0:
+            raise ValueError("Job intervals must be positive")
+
+        self.name = name
+        self.func = func
+        self.jitter = jitter
+        self.overlap = overlap
+        self.scheduled_at = 0.0
+        self.running = 0
+        self.queued = False
+        self.executions = 0
+        self.skipped = 0
+        self.cancelled = False
+
+    def next_interval(self) -> float:
+        """
+        Determines the time until the next execution. If the interval is
+        a function that fails or returns an invalid interval, the previous
+        interval is used
+        :return: The interval in seconds
+        """
+        if not callable(self.interval):
+            self.period = self.interval
+        else:
+            try:
+                period = float(self.interval())
+            except Exception:
+                period = 0.0
+            if period > 0:
+                self.period = period
+        return self.period
+
+
+class Scheduler:
+    """
+    Executes periodic jobs on a small pool of threads.
+    Due times are kept in a heap. They are based on the previous due time
+    instead of the time an execution finished, so the time a job takes
+    does not delay its following executions, and a slow job does not
+    delay other jobs.
+    The threads are daemon threads, so a running job does not keep the
+    interpreter from exiting.
+    """
+
+    def __init__(self, workers: int, name: str):
+        """
+        Initializes the scheduler
+        :param workers: The amount of threads that execute jobs
+        :param name: The name of the scheduler, used for thread names
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.jobs = []  # type: List[Job]
+        self._heap = []  # type: List[Tuple[float, int, Job]]
+        self._sequence = count()
+        self._condition = Condition()
+        self._stopped = False
+        self._running = False
+        self._name = name
+        self._workers = workers
+        self._threads = []  # type: List[Thread]
+        self._tasks = Queue()  # type: Queue
+
+    def add_job(
+            self,
+            func: Callable[[], None],
+            interval: Union[float, Callable[[], float]],
+            jitter: float = 0.0,
+            overlap: str = Job.SKIP,
+            name: Optional[str] = None,
+            delay: float = 0.0
+    ) -> Job:
+        """
+        Adds a periodic job
+        :param func: The function to execute
+        :param interval: The time between executions in seconds, or a
+                         function that returns it
+        :param jitter: Executions are delayed by a random amount of up to
+                       this many seconds
+        :param overlap: The overlap policy, Job.SKIP, Job.QUEUE or Job.ALLOW
+        :param name: The name of the job, defaults to the function's name
+        :param delay: The delay of the first execution in seconds
+        :return: The job
+        """
+        if name is None:
+            name = getattr(func, "__name__", "job")
+        job = Job(name, func, interval, jitter, overlap)
+        job.scheduled_at = time.monotonic() + delay
+
+        with self._condition:
+            self.jobs.append(job)
+            self._push(job)
+            self._condition.notify()
+        return job
+
+    def remove_job(self, job: Job):
+        """
+        Removes a job. Running executions of the job are not interrupted
+        :param job: The job to remove
+        :return: None
+        """
+        with self._condition:
+            job.cancelled = True
+            if job in self.jobs:
+                self.jobs.remove(job)
+
+    def run(self):
+        """
+        Executes the jobs when they are due until stop() is called.
+        Blocks the calling thread.
+        :return: None
+        """
+        self._running = True
+        try:
+            self._run()
+        finally:
+            self._running = False
+
+    def is_running(self) -> bool:
+        """
+        :return: Whether or not run() is executing jobs
+        """
+        return self._running
+
+    def _run(self):
+        """
+        Executes the jobs when they are due until stop() is called
+        :return: None
+        """
+        while True:
+            with self._condition:
+                job = None
+                while job is None:
+                    if self._stopped:
+                        return
+
+                    timeout = None  # type: Optional[float]
+                    if len(self._heap) > 0:
+                        timeout = self._heap[0][0] - time.monotonic()
+
+                    if timeout is not None and timeout <= 0:
+                        job = heapq.heappop(self._heap)[2]
+                        if job.cancelled:
+                            job = None
+                    else:
+                        self._condition.wait(timeout)
+
+                self._dispatch(job)
+                self._reschedule(job)
+
+    def stop(self, wait: bool = False):
+        """
+        Stops executing jobs
+        :param wait: Whether or not to wait for running jobs to finish
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        for _ in threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _dispatch(self, job: Job):
+        """
+        Starts an execution of a job according to its overlap policy.
+        Must be called while holding the condition's lock
+        :param job: The job to execute
+        :return: None
+        """
+        if job.running > 0 and job.overlap == Job.SKIP:
+            job.skipped += 1
+            self.logger.debug("Skipping running job " + job.name)
+        elif job.running > 0 and job.overlap == Job.QUEUE:
+            job.queued = True
+        else:
+            job.running += 1
+            self._tasks.put(job)
+            if len(self._threads) < self._workers:
+                thread = Thread(
+                    target=self._work,
+                    name="{}_{}".format(self._name, len(self._threads)),
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def _work(self):
+        """
+        Executes dispatched jobs on a worker thread until the scheduler
+        is stopped
+        :return: None
+        """
+        while True:
+            job = self._tasks.get()
+            if job is None:
+                return
+            if self._stopped:
+                with self._condition:
+                    job.running -= 1
+            else:
+                self._execute(job)
+
+    def _execute(self, job: Job):
+        """
+        Executes a job, executing it again if an execution was queued
+        in the meantime
+        :param job: The job to execute
+        :return: None
+        """
+        while True:
+            try:
+                job.func()
+            except BaseException as e:
+                self.logger.error(
+                    "Exception in job {}: {}\n{}".format(
+                        job.name,
+                        e,
+                        "\n".join(traceback.format_tb(e.__traceback__))
+                    )
+                )
+
+            with self._condition:
+                job.executions += 1
+                if job.queued and not job.cancelled:
+                    job.queued = False
+                else:
+                    job.running -= 1
+                    return
+
+    def _reschedule(self, job: Job):
+        """
+        Calculates the next due time of a job, skipping due times that
+        have already passed.
+        Must be called while holding the condition's lock
+        :param job: The job to reschedule
+        :return: None
+        """
+        now = time.monotonic()
+        interval = job.next_interval()
+        job.scheduled_at += interval
+        if job.scheduled_at <= now:
+            missed = int((now - job.scheduled_at) // interval) + 1
+            job.scheduled_at += missed * interval
+        self._push(job)
+
+    def _push(self, job: Job):
+        """
+        Adds the next execution of a job to the heap.
+        Must be called while holding the condition's lock
+        :param job: The job
+        :return: None
+        """
+        due = job.scheduled_at
+        if job.jitter > 0:
+            due += random.uniform(0, job.jitter)
+        heapq.heappush(self._heap, (due, next(self._sequence), job))
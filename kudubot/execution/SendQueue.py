@@ -0,0 +1,247 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import logging
+import traceback
+from collections import deque
+from threading import Thread, Condition
+from bokkichat.connection.Connection import Connection
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from kudubot.ErrorReporter import ErrorReporter
+from kudubot.metrics.Metrics import Metrics
+from kudubot.ratelimit.TokenBucket import TokenBucket
+from kudubot.ratelimit.KeyedTokenBuckets import KeyedTokenBuckets
+from kudubot.reporting import capture_exception
+from typing import Tuple, Optional, Set, List
+
+
+class SendQueue:
+    """
+    Queues outgoing messages and sends them on a dedicated thread.
+    Sending is rate limited globally and per receiver using token buckets.
+    Messages to the same receiver are always sent in the order they were
+    queued, a throttled receiver does not hold up messages to others.
+    """
+
+    def __init__(
+            self,
+            connection: Connection,
+            max_size: int,
+            rate_limit: Tuple[float, float],
+            receiver_rate_limit: Tuple[float, float],
+            coalesce_length: int = 0,
+            metrics: Optional[Metrics] = None,
+            error_reporter: Optional[ErrorReporter] = None,
+            metrics_label: str = ""
+    ):
+        """
+        Initializes the send queue
+        :param connection: The connection used for sending
+        :param max_size: The maximum amount of queued messages.
+                         Queueing a message blocks while the queue is full
+        :param rate_limit: The (rate, burst) of the global rate limit
+        :param receiver_rate_limit: The (rate, burst) of the rate limit
+                                    for every receiver
+        :param coalesce_length: Consecutive text messages with the same
+                                title to the same receiver are combined
+                                into a single message of up to this many
+                                characters. 0 disables this
+        :param metrics: If provided, the time sending a message takes
+                        is recorded in these metrics, and the queue depth
+                        and average latency are reported as the gauges
+                        'send_queue_depth' and 'send_queue_latency'
+        :param error_reporter: If provided, exceptions while sending are
+                               reported using this error reporter instead
+                               of being logged and sent to sentry directly
+        :param metrics_label: The label of the send times in the metrics,
+                              for example the name of the connection
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.connection = connection
+        self.max_size = max_size
+        self.coalesce_length = coalesce_length
+        self.metrics = metrics
+        self.error_reporter = error_reporter
+        self.metrics_label = metrics_label
+        self.rate_limit = TokenBucket(*rate_limit)
+        self.receiver_rate_limits = KeyedTokenBuckets(*receiver_rate_limit)
+
+        self.sent = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self._messages = deque()  # type: deque
+        self._condition = Condition()
+        self._thread = Thread(target=self._run, daemon=True)
+
+        if metrics is not None:
+            metrics.gauge(
+                "send_queue_depth", lambda: self.depth, metrics_label
+            )
+            metrics.gauge(
+                "send_queue_latency", lambda: self.average_latency,
+                metrics_label
+            )
+
+    @property
+    def depth(self) -> int:
+        """
+        :return: The amount of queued messages
+        """
+        return len(self._messages)
+
+    @property
+    def average_latency(self) -> float:
+        """
+        :return: The average time in seconds between queueing and sending
+                 a message
+        """
+        return self.total_latency / self.sent if self.sent > 0 else 0.0
+
+    def start(self):
+        """
+        Starts the sender thread
+        :return: None
+        """
+        self._thread.start()
+
+    def put(self, message: Message):
+        """
+        Queues a message for sending. Blocks while the queue is full
+        :param message: The message to send
+        :return: None
+        """
+        with self._condition:
+            while len(self._messages) >= self.max_size:
+                self._condition.wait()
+            self._messages.append((message, time.monotonic()))
+            self._condition.notify_all()
+
+    def _run(self):
+        """
+        Sends queued messages as the rate limits allow
+        :return: None
+        """
+        while True:
+            message, queued_at = self._next()
+            started = time.perf_counter()
+            try:
+                self.connection.send(message)
+            except Exception as e:
+                if self.error_reporter is not None:
+                    self.error_reporter.report(
+                        e, "Exception while sending message"
+                    )
+                else:
+                    self.logger.error(
+                        "Exception while sending message: {}\n{}".format(
+                            e,
+                            "\n".join(traceback.format_tb(e.__traceback__))
+                        )
+                    )
+                    capture_exception(e)
+            finally:
+                if self.metrics is not None:
+                    self.metrics.observe(
+                        "send",
+                        time.perf_counter() - started,
+                        self.metrics_label
+                    )
+                latency = time.monotonic() - queued_at
+                self.sent += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def _next(self) -> Tuple[Message, float]:
+        """
+        Waits until a queued message may be sent according to the
+        rate limits and removes it from the queue
+        :return: The message and the time it was queued at
+        """
+        with self._condition:
+            while True:
+                timeout = None  # type: Optional[float]
+                now = time.monotonic()
+
+                if len(self._messages) > 0:
+                    timeout = self.rate_limit.delay(now=now)
+
+                if timeout == 0:
+                    throttled = set()  # type: Set[str]
+                    for index, (message, queued_at) in \
+                            enumerate(self._messages):
+                        receiver = message.receiver.address
+                        if receiver in throttled:
+                            continue
+
+                        delay = self.receiver_rate_limits.delay(receiver)
+                        if delay == 0:
+                            message = self._take(index)
+                            self.rate_limit.consume(now=now)
+                            self.receiver_rate_limits.consume(receiver)
+                            self._condition.notify_all()
+                            return message, queued_at
+
+                        throttled.add(receiver)
+                        timeout = delay if timeout == 0 \
+                            else min(timeout, delay)
+
+                self._condition.wait(timeout)
+
+    def _take(self, index: int) -> Message:
+        """
+        Removes a message from the queue. If enabled, the following text
+        messages to the same receiver are combined with it.
+        :param index: The index of the message in the queue
+        :return: The message to send
+        """
+        message = self._messages[index][0]
+        del self._messages[index]
+
+        if self.coalesce_length <= 0 or not message.is_text():
+            return message
+
+        receiver = message.receiver.address
+        bodies = [message.body]
+        length = len(message.body)
+        combined = []  # type: List[int]
+
+        for following in range(index, len(self._messages)):
+            other = self._messages[following][0]
+            if other.receiver.address != receiver:
+                continue
+            # Only consecutive messages to the receiver are combined
+            if not other.is_text() or other.title != message.title \
+                    or length + 2 + len(other.body) > self.coalesce_length:
+                break
+            bodies.append(other.body)
+            length += 2 + len(other.body)
+            combined.append(following)
+
+        if len(combined) == 0:
+            return message
+
+        for following in reversed(combined):
+            del self._messages[following]
+        return TextMessage(
+            message.sender, message.receiver, "\n\n".join(bodies),
+            message.title
+        )
@@ -0,0 +1,263 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import multiprocessing
+from zlib import crc32
+from queue import Empty
+from threading import Thread
+from logging.handlers import QueueHandler, QueueListener
+from bokkichat.connection.Connection import Connection
+from bokkichat.entities.message.Message import Message
+from kudubot.db.config.DbConfig import DbConfig
+from kudubot.execution.ProxyConnection import ProxyConnection
+from kudubot.metrics.Metrics import Metrics
+from typing import List, Any, Optional, Type, Tuple, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from kudubot.Bot import Bot
+
+
+class ShardedExecutor:
+    """
+    Handles the messages of a bot on several processes to use more than
+    one CPU core.
+    Each worker process runs its own instance of the bot with its own
+    database engine. Messages are assigned to the workers by a hash of
+    the sender's address, so messages of the same sender are handled in
+    the order they were received.
+    Messages are handed to the workers with the label of the connection
+    they arrived on. The messages sent, the log records written and the
+    metrics recorded by the workers are handed back to the bot's process,
+    which sends them using that connection, writes them and adds them to
+    its metrics.
+    Background jobs and the send queue keep running in the bot's process.
+    """
+
+    METRICS_INTERVAL = 1.0
+    """
+    The interval in seconds at which workers hand their metrics to the
+    bot's process
+    """
+
+    def __init__(self, bot: "Bot", processes: int, context: str = "spawn"):
+        """
+        Initializes the executor
+        :param bot: The bot whose messages are handled
+        :param processes: The amount of worker processes
+        :param context: The multiprocessing start method. 'spawn' starts
+                        fresh interpreters, which avoids copying the
+                        locks of the bot's threads. The bot's class must
+                        be importable by the worker processes
+        """
+        self.bot = bot
+        self.processes = processes
+        self.context = multiprocessing.get_context(context)
+        self.outbox = self.context.Queue()
+        self.log_queue = self.context.Queue()
+        # Lets the workers answer bg_ping using the bot's background thread
+        self.bg_alive = self.context.Value("b", 0)
+        self.inboxes = [
+            self.context.Queue(max(bot.max_pending_messages // processes, 1))
+            for _ in range(0, processes)
+        ]
+        self.workers = []  # type: List[Any]
+        self.connections = {
+            label: connection
+            for connection, label in bot.connection_labels.items()
+        }  # type: Dict[str, Connection]
+        self._log_listener = None  # type: Optional[QueueListener]
+        self._reply_thread = None  # type: Optional[Thread]
+
+    def start(self):
+        """
+        Starts the worker processes and the thread that sends their
+        messages
+        :return: None
+        """
+        for index in range(0, self.processes):
+            self.workers.append(self._start_worker(index))
+
+        bot = self.bot
+        handlers = []  # type: List[Any]
+        if bot.log_listener is not None:
+            handlers = list(bot.log_listener.handlers)
+        self._log_listener = QueueListener(self.log_queue, *handlers)
+        self._log_listener.start()
+        self._reply_thread = Thread(
+            target=self._forward_replies,
+            name=bot.__class__.__name__ + "-shard-replies",
+            daemon=True
+        )
+        self._reply_thread.start()
+
+    def submit(self, connection: Connection, message: Message):
+        """
+        Hands a message to its worker process. Blocks while the worker's
+        queue is full
+        :param connection: The connection the message arrived on
+        :param message: The message
+        :return: None
+        """
+        index = self.shard(message)
+        if not self.workers[index].is_alive():
+            # Messages that were queued for the worker are kept
+            self.bot.logger.error(
+                "Restarting shard %d, exit code %s",
+                index, self.workers[index].exitcode
+            )
+            self.workers[index] = self._start_worker(index)
+        self.bg_alive.value = self.bot.bg_alive()
+        self.inboxes[index].put(
+            (self.bot.connection_labels[connection], message)
+        )
+
+    def _start_worker(self, index: int) -> Any:
+        """
+        Starts a worker process
+        :param index: The index of the worker
+        :return: The process
+        """
+        bot = self.bot
+        connections = [
+            (label, connection.address, connection.settings)
+            for label, connection in self.connections.items()
+        ]
+        worker = self.context.Process(
+            target=ShardedExecutor._run_worker,
+            args=(
+                type(bot), bot.location, bot.db_config, connections,
+                self.inboxes[index], self.outbox,
+                self.log_queue, self.bg_alive
+            ),
+            name="{}-shard-{}".format(bot.__class__.__name__, index),
+            daemon=True
+        )
+        worker.start()
+        return worker
+
+    def shard(self, message: Message) -> int:
+        """
+        Determines the worker process of a message
+        :param message: The message
+        :return: The index of the worker process
+        """
+        address = str(message.sender.address).encode("utf-8")
+        return crc32(address) % self.processes
+
+    def shutdown(self):
+        """
+        Waits for the workers to handle the submitted messages, then stops
+        them and sends their remaining messages
+        :return: None
+        """
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.outbox.put(None)
+        if self._reply_thread is not None:
+            self._reply_thread.join()
+        if self._log_listener is not None:
+            self._log_listener.stop()
+
+    def _forward_replies(self):
+        """
+        Sends the messages of the workers using the connections the
+        handled messages arrived on and merges their metrics
+        :return: None
+        """
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                return
+            if isinstance(item, Metrics):
+                # The workers' messages are sent and timed by this process
+                self.bot.metrics.merge(item, skip_stages=["send"])
+                continue
+            label, message = item
+            self.bot.send_msg(message, self.connections[label])
+
+    @staticmethod
+    def _run_worker(
+            bot_cls: Type["Bot"],
+            location: str,
+            db_config: DbConfig,
+            connections: List[Tuple[str, Any, Any]],
+            inbox: Any,
+            outbox: Any,
+            log_queue: Any,
+            bg_alive: Any
+    ):
+        """
+        Handles messages in a worker process until None is received
+        :param bot_cls: The class of the bot
+        :param location: The location of the bot's config and DB files
+        :param db_config: The database configuration
+        :param connections: The label, address and settings of each of
+                            the bot's connections
+        :param inbox: The queue of messages to handle
+        :param outbox: The queue of messages to send
+        :param log_queue: The queue of log records
+        :param bg_alive: Whether or not the bot's background thread is alive
+        :return: None
+        """
+        proxies = [
+            ProxyConnection(address, settings, outbox, label)
+            for label, address, settings in connections
+        ]
+        bot = bot_cls(proxies[0], location, db_config=db_config)
+        for proxy in proxies[1:]:
+            bot.add_connection(proxy)
+        # Metrics are labelled like the connections of the bot's process
+        bot.connection_labels = {proxy: proxy.label for proxy in proxies}
+        by_label = {proxy.label: proxy for proxy in proxies}
+
+        # The log file is written by the bot's process only
+        file_handlers = bot.log_listener.handlers
+        bot.stop_logging()
+        for handler in file_handlers:
+            handler.close()
+        # The connection's logger is a child of the bot's logger
+        bot.logger.handlers = [QueueHandler(log_queue)]
+        setattr(bot, "bg_alive", lambda: bool(bg_alive.value))
+
+        def report_metrics():
+            metrics = bot.metrics.drain()
+            if len(metrics.histograms()) > 0 or len(metrics.counters()) > 0:
+                outbox.put(metrics)
+
+        interval = ShardedExecutor.METRICS_INTERVAL
+        next_report = time.monotonic() + interval
+        while True:
+            try:
+                item = inbox.get(timeout=interval)
+            except Empty:
+                item = ()
+            if item is None:
+                break
+            if len(item) > 0:
+                label, message = item
+                bot._on_msg_from(by_label[label], message)
+            if time.monotonic() >= next_report:
+                next_report = time.monotonic() + interval
+                report_metrics()
+
+        bot.error_reporter.flush()
+        report_metrics()
@@ -18,12 +18,15 @@ along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import os
+import json
 import argparse
 import logging
 import traceback
-from typing import Type, Optional
+from importlib import import_module
+from typing import Type, Optional, Any
 from bokkichat.connection.Connection import Connection
 from kudubot.Bot import Bot
+from kudubot.Supervisor import Supervisor
 from kudubot.exceptions import ConfigurationError
 from puffotter.init import cli_start, argparse_add_verbosity
 
@@ -95,3 +98,85 @@ def cli_bot_start(
         sentry_dsn=sentry_dsn,
         release_name=release_name
     )
+
+
+def load_class(path: str) -> Any:
+    """
+    Imports a class using its path
+    :param path: The module and the name of the class, separated by a
+                 colon, for example 'kudubot.Bot:Bot'
+    :return: The class
+    :raises ConfigurationError: If the class could not be imported
+    """
+    module_name, _, class_name = path.partition(":")
+    try:
+        return getattr(import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError):
+        raise ConfigurationError("Can't import class " + path)
+
+
+def cli_supervisor_start(
+        sentry_dsn: Optional[str] = None,
+        package_name: Optional[str] = None,
+        release_name: Optional[str] = None
+):
+    """
+    Implements a CLI interface that runs several bots in one process.
+    The bots are listed in a JSON file like this:
+    {
+        "bg_workers": 4,
+        "bots": [
+            {
+                "bot": "football_bot.FootballBot:FootballBot",
+                "connection":
+                    "bokkichat.connection.impl.CliConnection:CliConnection",
+                "config_dir": "~/.config/football-bot"
+            }
+        ]
+    }
+    The bots have to be initialized using their own CLI beforehand.
+    :param sentry_dsn: Optional sentry DSN for exception logging
+    :param package_name: The name of the package
+    :param release_name: Specifies a custom release name for sentry
+    :return: None
+    """
+    def main(args: argparse.Namespace, logger: logging.Logger):
+        try:
+            with open(args.config, "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Invalid supervisor configuration: {}".format(e))
+            return
+
+        supervisor = Supervisor(int(config.get("bg_workers", 4)))
+        for entry in config.get("bots", []):
+            location = os.path.expanduser(entry.get("config_dir", ""))
+            try:
+                supervisor.add(
+                    load_class(entry.get("bot", "")),
+                    load_class(entry.get("connection", "")),
+                    location
+                )
+            except ConfigurationError as e:
+                logger.warning(
+                    "Invalid Configuration in {}: {}".format(location, e)
+                )
+
+        if len(supervisor.bots) == 0:
+            logger.warning("No bots to start")
+        else:
+            supervisor.run()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config",
+                        help="The JSON file that lists the bots to start")
+    argparse_add_verbosity(parser)
+
+    cli_start(
+        main,
+        parser,
+        "Thanks for using kudubot!",
+        package_name=package_name,
+        sentry_dsn=sentry_dsn,
+        release_name=release_name
+    )
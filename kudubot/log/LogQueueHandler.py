@@ -0,0 +1,64 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from logging import LogRecord
+from logging.handlers import QueueHandler
+
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+"""
+Message arguments of these types can't change after a record was queued
+"""
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Hands log records to a queue, so that a QueueListener can write them
+    on a separate thread.
+    Unlike QueueHandler, records are not copied and formatted on the
+    logging thread. Messages whose arguments are immutable are formatted
+    by the listener thread. Other arguments may change after the record
+    was queued, so they are merged into the message on the logging thread.
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        """
+        Prepares a record for queueing
+        :param record: The record
+        :return: The record to queue
+        """
+        if not self.is_immutable(record):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    @staticmethod
+    def is_immutable(record: LogRecord) -> bool:
+        """
+        Checks whether the message of a record can be formatted later
+        :param record: The record
+        :return: True if the message and its arguments are immutable
+        """
+        if not isinstance(record.msg, str):
+            return False
+        args = record.args
+        if not args:
+            return True
+        if isinstance(args, dict):
+            args = tuple(args.values())
+        return all(isinstance(arg, IMMUTABLE_TYPES) for arg in args)
@@ -0,0 +1,119 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from bisect import bisect_left
+from threading import Lock
+from typing import List, Tuple, Dict, Any
+
+
+class Histogram:
+    """
+    A thread-safe latency histogram with exponentially growing buckets.
+    Every bucket is about 19% larger than the previous one, so quantiles
+    are accurate to within that amount. Recording a value takes constant
+    time and memory does not grow with the amount of recorded values.
+    """
+
+    BOUNDS = tuple(
+        0.000001 * 2 ** (i / 4) for i in range(0, 109)
+    )  # type: Tuple[float, ...]
+    """
+    The upper bounds of the buckets in seconds, from 1us to about 2 minutes
+    """
+
+    def __init__(self):
+        """
+        Initializes the histogram
+        """
+        self.counts = [0] * (len(self.BOUNDS) + 1)  # type: List[int]
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self._lock = Lock()
+
+    def record(self, seconds: float):
+        """
+        Records a value
+        :param seconds: The value in seconds
+        :return: None
+        """
+        index = bisect_left(self.BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            if self.count == 0 or seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.count += 1
+            self.sum += seconds
+
+    def merge(self, other: "Histogram"):
+        """
+        Adds the values recorded by another histogram
+        :param other: The other histogram
+        :return: None
+        """
+        with self._lock:
+            for index, bucket_count in enumerate(other.counts):
+                self.counts[index] += bucket_count
+            if other.count > 0:
+                if self.count == 0 or other.min < self.min:
+                    self.min = other.min
+                if other.max > self.max:
+                    self.max = other.max
+            self.count += other.count
+            self.sum += other.sum
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Excludes the lock when the histogram is pickled
+        :return: The state of the histogram
+        """
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """
+        Restores a pickled histogram
+        :param state: The state of the histogram
+        :return: None
+        """
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the recorded values
+        :param q: The quantile, between 0 and 1
+        :return: The estimated value in seconds, 0 if nothing was recorded
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank and bucket_count > 0:
+                    break
+            upper = self.BOUNDS[index] if index < len(self.BOUNDS) \
+                else self.max
+            return max(self.min, min(self.max, upper))
@@ -0,0 +1,292 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from typing import Dict, List, Tuple, Any, Iterable, Callable
+from kudubot.metrics.Histogram import Histogram
+
+
+class Metrics:
+    """
+    Collects latency histograms for the stages of message handling.
+    Every stage may be split up further using a label, for example the
+    name of the handled command.
+    Also counts events like dropped messages, which may be labelled
+    as well, and reports gauges like cache hit rates.
+    """
+
+    QUANTILES = [0.5, 0.95, 0.99]
+    """
+    The quantiles that are reported
+    """
+
+    def __init__(self):
+        """
+        Initializes the metrics
+        """
+        self._histograms = {}  # type: Dict[Tuple[str, str], Histogram]
+        self._counters = {}  # type: Dict[Tuple[str, str], int]
+        self._gauges = \
+            {}  # type: Dict[Tuple[str, str], Callable[[], float]]
+        self._lock = Lock()
+        self._since = time.monotonic()
+
+    def observe(self, stage: str, seconds: float, label: str = ""):
+        """
+        Records the time a stage took
+        :param stage: The stage
+        :param seconds: The time in seconds
+        :param label: The label of the stage, for example a command name
+        :return: None
+        """
+        key = (stage, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        histogram.record(seconds)
+
+    def increment(self, event: str, label: str = "", amount: int = 1):
+        """
+        Counts an event
+        :param event: The event
+        :param label: The label of the event
+        :param amount: The amount of events
+        :return: None
+        """
+        key = (event, label)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(
+            self,
+            name: str,
+            func: Callable[[], float],
+            label: str = ""
+    ):
+        """
+        Registers a gauge, a value that is read whenever the metrics are
+        reported. Gauges are not affected by reset() and are not drained
+        :param name: The name of the gauge
+        :param func: Returns the current value
+        :param label: The label of the gauge, for example a connection name
+        :return: None
+        """
+        with self._lock:
+            self._gauges[(name, label)] = func
+
+    def gauges(self) -> List[Tuple[str, str, float]]:
+        """
+        :return: The name, label and current value of every gauge,
+                 sorted by name and label
+        """
+        with self._lock:
+            gauges = sorted(self._gauges.items())
+        return [(name, label, func()) for (name, label), func in gauges]
+
+    def count(self, event: str, label: str = "") -> int:
+        """
+        :param event: The event
+        :param label: The label of the event
+        :return: How often the event was counted
+        """
+        return self._counters.get((event, label), 0)
+
+    def counters(self) -> List[Tuple[str, str, int]]:
+        """
+        :return: The event, label and count of every counted event,
+                 sorted by event and label
+        """
+        with self._lock:
+            return [
+                (event, label, value)
+                for (event, label), value in sorted(self._counters.items())
+            ]
+
+    def histograms(self) -> List[Tuple[str, str, Histogram]]:
+        """
+        :return: The stage, label and histogram of every recorded stage,
+                 sorted by stage and label
+        """
+        with self._lock:
+            return [
+                (stage, label, histogram)
+                for (stage, label), histogram
+                in sorted(self._histograms.items())
+            ]
+
+    def reset(self):
+        """
+        Discards all recorded values
+        :return: None
+        """
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self._since = time.monotonic()
+
+    def drain(self) -> "Metrics":
+        """
+        Moves the recorded values into a new Metrics object, for example
+        to hand them to another process. The values are discarded here
+        :return: The recorded values
+        """
+        drained = Metrics()
+        with self._lock:
+            drained._histograms, self._histograms = self._histograms, {}
+            drained._counters, self._counters = self._counters, {}
+        return drained
+
+    def merge(self, other: "Metrics", skip_stages: Iterable[str] = ()):
+        """
+        Adds the values recorded by another Metrics object
+        :param other: The other metrics
+        :param skip_stages: Stages whose latencies are not added
+        :return: None
+        """
+        for stage, label, histogram in other.histograms():
+            if stage in skip_stages:
+                continue
+            with self._lock:
+                target = self._histograms.setdefault(
+                    (stage, label), Histogram()
+                )
+            target.merge(histogram)
+        for event, label, value in other.counters():
+            self.increment(event, label, value)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Excludes the lock when the metrics are pickled
+        :return: The state of the metrics
+        """
+        state = dict(self.__dict__)
+        del state["_lock"]
+        del state["_gauges"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """
+        Restores pickled metrics, without gauges
+        :param state: The state of the metrics
+        :return: None
+        """
+        self.__dict__.update(state)
+        self._gauges = {}
+        self._lock = Lock()
+
+    def elapsed(self) -> float:
+        """
+        :return: The time in seconds since the metrics were created or
+                 last reset
+        """
+        return time.monotonic() - self._since
+
+    def summary(self) -> str:
+        """
+        :return: A human readable summary of the recorded latencies,
+                 counted events and gauges
+        """
+        lines = []
+        for stage, label, histogram in self.histograms():
+            name = stage if label == "" else "{} {}".format(stage, label)
+            lines.append("{}: {}x, {}".format(
+                name,
+                histogram.count,
+                ", ".join([
+                    "p{}={:.2f}ms".format(
+                        int(q * 100), histogram.quantile(q) * 1000
+                    )
+                    for q in self.QUANTILES
+                ])
+            ))
+        for event, label, value in self.counters():
+            name = event if label == "" else "{} {}".format(event, label)
+            lines.append("{}: {}".format(name, value))
+        for gauge, label, value in self.gauges():
+            name = gauge if label == "" else "{} {}".format(gauge, label)
+            lines.append("{}: {:g}".format(name, value))
+        return "\n".join(lines) if len(lines) > 0 else "No metrics recorded"
+
+    def openmetrics(self) -> str:
+        """
+        :return: The recorded latencies, counted events and gauges in
+                 the OpenMetrics text format
+        """
+        name = "kudubot_stage_seconds"
+        lines = [
+            "# TYPE {} summary".format(name),
+            "# UNIT {} seconds".format(name),
+            "# HELP {} Time spent in a stage of message handling"
+            .format(name)
+        ]
+        for stage, label, histogram in self.histograms():
+            labels = "stage=\"{}\"".format(self._escape(stage))
+            if label != "":
+                labels += ",label=\"{}\"".format(self._escape(label))
+            for q in self.QUANTILES:
+                lines.append("{}{{{},quantile=\"{}\"}} {}".format(
+                    name, labels, q, histogram.quantile(q)
+                ))
+            lines.append("{}_count{{{}}} {}".format(
+                name, labels, histogram.count
+            ))
+            lines.append("{}_sum{{{}}} {}".format(
+                name, labels, histogram.sum
+            ))
+
+        counters = self.counters()
+        if len(counters) > 0:
+            name = "kudubot_events"
+            lines += [
+                "# TYPE {} counter".format(name),
+                "# HELP {} Events during message handling".format(name)
+            ]
+        for event, label, value in counters:
+            labels = "event=\"{}\"".format(self._escape(event))
+            if label != "":
+                labels += ",label=\"{}\"".format(self._escape(label))
+            lines.append("{}_total{{{}}} {}".format(name, labels, value))
+
+        gauges = self.gauges()
+        if len(gauges) > 0:
+            name = "kudubot_gauge"
+            lines += [
+                "# TYPE {} gauge".format(name),
+                "# HELP {} Current values like cache hit rates".format(name)
+            ]
+        for gauge, label, value in gauges:
+            labels = "gauge=\"{}\"".format(self._escape(gauge))
+            if label != "":
+                labels += ",label=\"{}\"".format(self._escape(label))
+            lines.append("{}{{{}}} {}".format(name, labels, value))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        """
+        Escapes a label value for the OpenMetrics text format
+        :param value: The label value
+        :return: The escaped label value
+        """
+        return value.replace("\\", "\\\\")\
+            .replace("\"", "\\\"")\
+            .replace("\n", "\\n")
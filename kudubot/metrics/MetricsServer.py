@@ -0,0 +1,90 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import logging
+from threading import Thread
+from kudubot.metrics.Metrics import Metrics
+
+
+class MetricsServer:
+    """
+    Serves metrics in the OpenMetrics text format at /metrics
+    """
+
+    CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; " \
+                   "charset=utf-8"
+    """
+    The content type of the OpenMetrics text format
+    """
+
+    def __init__(self, metrics: Metrics, host: str, port: int):
+        """
+        Initializes the server. The port is bound immediately
+        :param metrics: The metrics to serve
+        :param host: The host to listen on
+        :param port: The port to listen on
+        """
+        # Only imported when metrics are served, to keep startup fast
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        logger = logging.getLogger(self.__class__.__name__)
+        content_type = self.CONTENT_TYPE
+
+        class Handler(BaseHTTPRequestHandler):
+
+            # noinspection PyPep8Naming
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.openmetrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, message_format: str, *args):
+                logger.debug(message_format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        """
+        :return: The port the server listens on
+        """
+        return self.server.server_address[1]
+
+    def start(self):
+        """
+        Starts serving requests on a separate thread
+        :return: None
+        """
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the server
+        :return: None
+        """
+        self.server.shutdown()
+        self.server.server_close()
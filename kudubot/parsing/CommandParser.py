@@ -17,7 +17,9 @@ You should have received a copy of the GNU General Public License
 along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import List, Tuple, Dict, Any
+import re
+from itertools import islice
+from typing import List, Tuple, Dict, Any, Iterator
 from kudubot.parsing.Command import Command
 from kudubot.exceptions import ParseError
 
@@ -27,71 +29,154 @@ class CommandParser:
     A parser for bot commands
     """
 
+    _command_indexes = {}  # type: Dict[type, Tuple[Dict, Dict[str, int]]]
+    """
+    Caches the command index and keyword arities of every parser class.
+    Keyed by the parser class
+    """
+
+    TOKEN_PATTERN = re.compile(
+        r'"([^"]*(?:(?<=\\)"[^"]*)*)"?|([^ "]+(?:(?<=\\)"[^ "]*)*)'
+    )
+    """
+    Matches quoted text or an argument outside of quotes. Quotes preceded
+    by a backslash are part of the text
+    """
+
+    WHITESPACE_PATTERN = re.compile(r"\s*")
+
     def parse(self, text: str) -> Tuple[str, Dict[str, Any]]:
         """
         Parses a command
         :param text: The text to parse
         :return: The (command, arguments)
         """
+        tokens = self._tokenize(text)
 
-        args = self._argumentize(text)
-
-        try:
-            command_arg = args.pop(0)
-            if not command_arg.startswith("/"):
-                raise ParseError("Incorrect command symbol")
-            command_arg = command_arg.replace("/", "")
-
-            valid_command = None
-            for command in self.commands():
-                if command.validate(command_arg, args):
-                    valid_command = command
-                    break
+        command_arg = next(tokens, None)
+        if command_arg is None:
+            raise ParseError("Incorrect amount of arguments")
+        if not command_arg.startswith("/"):
+            raise ParseError("Incorrect command symbol")
+        command_arg = command_arg.replace("/", "")
+
+        keyword = command_arg.upper()
+        max_arity = self.keyword_arities().get(keyword)
+        if max_arity is None:
+            raise ParseError("Incorrect command name")
+
+        # Stops tokenizing as soon as no command could match anymore
+        args = list(islice(tokens, max_arity + 1))
+        if len(args) > max_arity:
+            raise ParseError("Incorrect amount of arguments")
 
-            if valid_command is None:
-                raise ParseError("Incorrect command name")
+        # Only commands with a matching keyword and argument count
+        # can be valid, the first one whose arguments convert wins
+        for command in self.command_index().get((keyword, len(args)), []):
+            try:
+                return command_arg.lower(), command.resolve_args(args)
+            except (ValueError, TypeError, IndexError):
+                pass
 
-            else:
-                return command_arg.lower(), valid_command.resolve_args(args)
+        raise ParseError("Incorrect command name")
 
-        except IndexError:
-            raise ParseError("Incorrect amount of arguments")
+    @staticmethod
+    def _tokenize(text: str) -> Iterator[str]:
+        """
+        Lazily splits text into arguments.
+        Arguments are separated by spaces, text in double quotes forms a
+        single argument. Quotes can be escaped using a backslash.
+        Empty arguments are skipped, as is whitespace at the start and end
+        of the text outside of quotes.
+        The text is scanned incrementally, every argument only costs as
+        much as its own length.
+        :param text: The text to tokenize
+        :return: A generator for the arguments
+        """
+        leading = True
+        content = 0  # The next non-whitespace character after an argument
+        for match in CommandParser.TOKEN_PATTERN.finditer(text):
+            quoted, token = match.groups()
+            if token is None:
+                if quoted != "":
+                    yield quoted.replace("\\\"", "\"")
+                leading = True
+                continue
+
+            # Outside of quotes, whitespace next to quotes is stripped
+            if leading:
+                token = token.lstrip()
+                leading = token == ""
+                if leading:
+                    continue
+            if token[-1].isspace():
+                if content < match.end():
+                    content = CommandParser.WHITESPACE_PATTERN.match(
+                        text, match.end()
+                    ).end()
+                if content == len(text) or text[content] == "\"":
+                    token = token.rstrip()
+                    if token == "":
+                        continue
+            yield token.replace("\\\"", "\"")
 
     @staticmethod
-    def _argumentize(text: str):
+    def _argumentize(text: str) -> List[str]:
         """
         Turns text into a list of arguments
         :param text: The text to
         :return: The list of arguments
         """
-        splitted = text.split("\"")
-
-        first_quote = False
-        if splitted[0] == "":
-            first_quote = True
-
-        raw_args = []
-
-        for i, arg in enumerate(splitted):
+        return list(CommandParser._tokenize(text))
 
-            is_quote = False
-            if first_quote and (i % 2) == 0:
-                is_quote = True
-            if not first_quote and (i % 2) == 1:
-                is_quote = True
-
-            if is_quote:
-                raw_args.append(arg)
-            else:
-                raw_args += arg.strip().split(" ")
+    @classmethod
+    def command_index(cls) -> Dict[Tuple[str, int], List[Command]]:
+        """
+        Generates an index of the parser's commands, keyed by the upper-case
+        keyword and the amount of arguments of the commands.
+        The index is only generated once per parser class.
+        :return: The command index
+        """
+        return cls._load_index()[0]
 
-        args = []
+    @classmethod
+    def keyword_arities(cls) -> Dict[str, int]:
+        """
+        :return: The highest amount of arguments any of the parser's
+                 commands accepts, keyed by the upper-case keyword
+        """
+        return cls._load_index()[1]
 
-        for arg in raw_args:
-            if arg != "":
-                args.append(arg)
+    @classmethod
+    def _load_index(cls) \
+            -> Tuple[Dict[Tuple[str, int], List[Command]], Dict[str, int]]:
+        """
+        Loads the cached command index and keyword arities of this parser
+        class, generating them if they do not exist yet
+        :return: The command index and the keyword arities
+        """
+        cached = cls._command_indexes.get(cls)
+        if cached is None:
+            index = {}  # type: Dict[Tuple[str, int], List[Command]]
+            arities = {}  # type: Dict[str, int]
+            for command in cls.commands():
+                keyword = command.keyword.upper()
+                arity = len(command.arg_info)
+                index.setdefault((keyword, arity), []).append(command)
+                arities[keyword] = max(arity, arities.get(keyword, 0))
+            cached = (index, arities)
+            cls._command_indexes[cls] = cached
+        return cached
 
-        return args
+    @classmethod
+    def invalidate_index(cls):
+        """
+        Discards the cached command index and keyword arities of
+        this parser class.
+        Needs to be called if the commands of a parser change at runtime
+        :return: None
+        """
+        cls._command_indexes.pop(cls, None)
 
     @classmethod
     def help_text(cls, include_title: bool = False) -> str:
@@ -100,16 +185,11 @@ class CommandParser:
         :param include_title: Whether or not to include a title
         :return: The help text for this parser
         """
-        if include_title:
-            help_text = "!{}\n".format(cls.name())
-        else:
-            help_text = ""
-
         divider = "  " if include_title else ""
-
-        for command in cls.commands():
-            help_text += divider + str(command) + "\n"
-        return help_text.strip()
+        lines = [divider + str(command) for command in cls.commands()]
+        if include_title:
+            lines.insert(0, "!{}".format(cls.name()))
+        return "\n".join(lines).strip()
 
     @classmethod
     def name(cls) -> str:
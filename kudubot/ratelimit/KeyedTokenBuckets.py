@@ -0,0 +1,100 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from typing import Dict, Hashable
+from kudubot.ratelimit.TokenBucket import TokenBucket
+
+
+class KeyedTokenBuckets:
+    """
+    Manages a separate token bucket for every key, for example for every
+    sender or receiver.
+    Buckets that have been refilled completely are discarded, since they
+    behave like new buckets. Memory usage therefore only depends on the
+    amount of recently active keys.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initializes the token buckets
+        :param rate: The amount of tokens added to a bucket per second
+        :param burst: The maximum amount of tokens in a bucket
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # type: Dict[Hashable, TokenBucket]
+        self._lock = Lock()
+        self._last_eviction = time.monotonic()
+        # A bucket is guaranteed to be full after this amount of time
+        self._refill_time = burst / rate
+
+    def consume(self, key: Hashable, amount: float = 1) -> bool:
+        """
+        Consumes tokens from the bucket of a key if enough are available
+        :param key: The key of the bucket
+        :param amount: The amount of tokens to consume
+        :return: True if the tokens were consumed, False otherwise
+        """
+        now = time.monotonic()
+        return self._bucket(key, now).consume(amount, now)
+
+    def delay(self, key: Hashable, amount: float = 1) -> float:
+        """
+        Calculates how long it takes until tokens are available in the
+        bucket of a key
+        :param key: The key of the bucket
+        :param amount: The amount of tokens
+        :return: The delay in seconds, 0 if the tokens are available
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+        return 0.0 if bucket is None else bucket.delay(amount, now)
+
+    def _bucket(self, key: Hashable, now: float) -> TokenBucket:
+        """
+        Retrieves the bucket of a key, creating it if necessary.
+        Periodically discards full buckets.
+        :param key: The key of the bucket
+        :param now: The current monotonic time
+        :return: The bucket
+        """
+        with self._lock:
+            if now - self._last_eviction > self._refill_time:
+                self._last_eviction = now
+                for idle in [
+                    bucket_key
+                    for bucket_key, bucket in self._buckets.items()
+                    if bucket.is_full(now)
+                ]:
+                    self._buckets.pop(idle)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[key] = bucket
+            return bucket
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of buckets currently held in memory
+        """
+        return len(self._buckets)
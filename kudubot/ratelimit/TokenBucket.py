@@ -0,0 +1,93 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+    The bucket holds up to 'burst' tokens and is refilled with 'rate'
+    tokens per second. Every rate-limited action consumes a token.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initializes the token bucket. The bucket starts out full.
+        :param rate: The amount of tokens added per second
+        :param burst: The maximum amount of tokens in the bucket
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def consume(self, amount: float = 1, now: Optional[float] = None) \
+            -> bool:
+        """
+        Consumes tokens if enough of them are available
+        :param amount: The amount of tokens to consume
+        :param now: The current monotonic time, if already known
+        :return: True if the tokens were consumed, False otherwise
+        """
+        with self._lock:
+            self._refill(now)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True
+            return False
+
+    def delay(self, amount: float = 1, now: Optional[float] = None) \
+            -> float:
+        """
+        Calculates how long it takes until tokens are available
+        :param amount: The amount of tokens
+        :param now: The current monotonic time, if already known
+        :return: The delay in seconds, 0 if the tokens are available
+        """
+        with self._lock:
+            self._refill(now)
+            missing = amount - self.tokens
+            return max(0.0, missing / self.rate)
+
+    def is_full(self, now: Optional[float] = None) -> bool:
+        """
+        A full bucket behaves exactly like a newly created one
+        :param now: The current monotonic time, if already known
+        :return: Whether or not the bucket is full
+        """
+        with self._lock:
+            self._refill(now)
+            return self.tokens >= self.burst
+
+    def _refill(self, now: Optional[float]):
+        """
+        Adds the tokens that accumulated since the last update
+        :param now: The current monotonic time, if already known
+        :return: None
+        """
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
@@ -0,0 +1,45 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+
+
+def capture_exception(exception: BaseException):
+    """
+    Reports an exception to sentry.
+    sentry_sdk is slow to import and only used if it was initialized, for
+    example by puffotter's cli_start. If it was never imported, it can't
+    have been initialized, so importing it can be skipped.
+    :param exception: The exception to report
+    :return: None
+    """
+    sentry_sdk = sys.modules.get("sentry_sdk")
+    if sentry_sdk is not None:
+        sentry_sdk.capture_exception(exception)
+
+
+def capture_message(message: str):
+    """
+    Sends a message to sentry if sentry_sdk was imported
+    :param message: The message
+    :return: None
+    """
+    sentry_sdk = sys.modules.get("sentry_sdk")
+    if sentry_sdk is not None:
+        sentry_sdk.capture_message(message)
@@ -0,0 +1,104 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from typing import List, Optional, Callable
+from bokkichat.connection.Connection import Connection
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+
+
+class FakeConnection(Connection):
+    """
+    A connection that delivers a fixed list of messages and records
+    everything that is sent, without any network access
+    """
+
+    def __init__(
+            self,
+            messages: Optional[List[Message]] = None,
+            keep_sent: bool = True
+    ):
+        """
+        Initializes the connection
+        :param messages: The messages that the loop delivers
+        :param keep_sent: Whether or not sent messages are kept in memory.
+                          If False, they are only counted
+        """
+        super().__init__(None)
+        self.messages = messages if messages is not None else []
+        self.keep_sent = keep_sent
+        self.sent = []  # type: List[Message]
+        self.sent_count = 0
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the connection class
+        """
+        return "fake"
+
+    @classmethod
+    def from_serialized_settings(cls, serialized: str) -> "FakeConnection":
+        """
+        Creates a connection without messages, allows loading bots using
+        Bot.load
+        :param serialized: Ignored
+        :return: The connection
+        """
+        return cls()
+
+    @property
+    def address(self) -> Address:
+        """
+        :return: The address of the connection
+        """
+        return Address("bot")
+
+    def send(self, message: Message):
+        """
+        Records a sent message
+        :param message: The message
+        :return: None
+        """
+        self.sent_count += 1
+        if self.keep_sent:
+            self.sent.append(message)
+
+    def receive(self) -> List[Message]:
+        """
+        :return: The messages to deliver
+        """
+        return self.messages
+
+    def loop(self, callback: Callable, sleep_time: int = 1):
+        """
+        Delivers every message once, then returns
+        :param callback: The callback function
+        :param sleep_time: Ignored
+        :return: None
+        """
+        for message in self.receive():
+            callback(self, message)
+
+    def close(self):
+        """
+        :return: None
+        """
+        pass
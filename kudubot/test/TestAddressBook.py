@@ -0,0 +1,129 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Query
+from kudubot.db import Base
+from kudubot.db.Address import Address
+from kudubot.db.AddressBook import AddressBook
+
+
+class TestAddressBook(TestCase):
+    """
+    Tests the AddressBook class
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary database
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.engine = create_engine(
+            "sqlite:///" + os.path.join(self.tempdir, "data.db")
+        )
+        Base.metadata.create_all(self.engine)
+        self.sessionmaker = sessionmaker(bind=self.engine)
+        self.address_book = AddressBook(10)
+
+    def tearDown(self):
+        """
+        Disposes the database engine and deletes the database
+        :return: None
+        """
+        self.engine.dispose()
+        shutil.rmtree(self.tempdir)
+
+    def addresses(self):
+        """
+        :return: The committed addresses, keyed by their IDs
+        """
+        session = self.sessionmaker()
+        try:
+            return {
+                entry.id: entry.address
+                for entry in session.query(Address).all()
+            }
+        finally:
+            session.close()
+
+    def test_creates_and_caches(self):
+        """
+        Tests that new addresses are committed and that cached addresses
+        are returned without querying the database
+        :return: None
+        """
+        session = self.sessionmaker()
+        entry = self.address_book.get_or_create(session, "alice")
+        self.assertEqual(self.addresses(), {entry.id: "alice"})
+        session.close()
+
+        session = self.sessionmaker()
+        with patch.object(Query, "first") as first:
+            cached = self.address_book.get_or_create(session, "alice")
+        first.assert_not_called()
+        self.assertEqual(cached.id, entry.id)
+        self.assertEqual(cached.address, "alice")
+        self.assertEqual(self.address_book.cache.hits, 1)
+        session.close()
+
+    def test_concurrent_insert(self):
+        """
+        Tests that an address added by someone else between the lookup
+        and the insert is loaded, and that the pending changes of the
+        session are kept
+        :return: None
+        """
+        other = self.sessionmaker()
+        existing = AddressBook(10).get_or_create(other, "alice").id
+        other.close()
+
+        session = self.sessionmaker()
+        session.add(Address(address="pending"))
+        # The lookup misses the address, as if it was added concurrently
+        with patch.object(Query, "first", return_value=None):
+            entry = self.address_book.get_or_create(session, "alice")
+        self.assertEqual(entry.id, existing)
+        self.assertEqual(self.address_book.cache.get("alice"), existing)
+        session.close()
+
+        self.assertEqual(
+            sorted(self.addresses().values()), ["alice", "pending"]
+        )
+
+    def test_forget(self):
+        """
+        Tests that forgotten addresses are looked up again
+        :return: None
+        """
+        session = self.sessionmaker()
+        self.address_book.get_or_create(session, "alice")
+        self.address_book.forget("alice")
+        self.assertIsNone(self.address_book.cache.get("alice"))
+        self.assertEqual(
+            self.address_book.get_or_create(session, "alice").address,
+            "alice"
+        )
+        session.close()
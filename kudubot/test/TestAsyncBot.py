@@ -0,0 +1,248 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import random
+import asyncio
+from unittest import skipIf, skipUnless
+from typing import List, Dict, Any
+from sqlalchemy import func, select
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from kudubot.AsyncBot import AsyncBot
+from kudubot.db.Address import Address as DbAddress
+from kudubot.exceptions import ConfigurationError
+from kudubot.parsing.CommandParser import CommandParser
+from kudubot.test.TestBot import BotTestCase, EchoParser, make_messages
+
+try:
+    import aiosqlite
+    from sqlalchemy.ext.asyncio import AsyncSession
+    ASYNC_SESSIONS = True
+except ImportError:  # pragma: no cover
+    ASYNC_SESSIONS = False
+
+
+class AsyncEchoBot(AsyncBot):
+    """
+    AsyncBot that echoes the text of echo commands back to the sender
+    after a random delay
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the bot
+        """
+        return "async-echo-bot"
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        :return: The version of the bot
+        """
+        return "1.0.0"
+
+    @classmethod
+    def parsers(cls) -> List[CommandParser]:
+        """
+        :return: The parsers of the bot
+        """
+        return [EchoParser()]
+
+    @property
+    def max_pending_messages(self) -> int:
+        """
+        :return: The maximum amount of pending messages
+        """
+        return 4
+
+    def init(self):
+        """
+        Initializes the counters of concurrently handled messages
+        :return: None
+        """
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sessions = []  # type: List[Any]
+        self.address_counts = []  # type: List[int]
+
+    async def on_echo(
+            self,
+            sender: DbAddress,
+            args: Dict[str, Any],
+            db_session: Any
+    ):
+        """
+        Echoes the text back to the sender after a random delay.
+        'spawn' handles another message using on_msg, 'count' replies
+        with the amount of stored addresses
+        :param sender: The sender
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: None
+        """
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.sessions.append(db_session)
+        try:
+            await asyncio.sleep(random.random() / 100)
+            text = args["text"]
+            if text == "spawn":
+                self.on_msg(TextMessage(
+                    Address(sender.address), Address("bot"), "/echo spawned"
+                ))
+            elif text == "count" and ASYNC_SESSIONS:
+                result = await db_session.execute(
+                    select(func.count(DbAddress.id))
+                )
+                text = str(result.scalar())
+            await self.send_txt_async(sender, text)
+        finally:
+            self.in_flight -= 1
+
+
+class TestAsyncBot(BotTestCase):
+    """
+    Tests handling messages with the AsyncBot class
+    """
+
+    BLOCKING_SESSIONS = {"async_sessions": False}
+
+    def test_order_per_sender(self):
+        """
+        Tests that messages of a sender are handled in order, and that
+        at most max_pending_messages messages are handled at once
+        :return: None
+        """
+        random.seed(42)
+        bot = self.create_bot(
+            AsyncEchoBot, make_messages(40, 5), self.BLOCKING_SESSIONS
+        )
+        bot.start()
+
+        sent = bot.connection.sent
+        self.assertEqual(len(sent), 40)
+        for offset in range(0, 5):
+            self.assertEqual(
+                [
+                    int(message.body) for message in sent
+                    if message.receiver.address == "user{}".format(offset)
+                ],
+                list(range(offset, 40, 5))
+            )
+        self.assertGreater(bot.max_in_flight, 1)
+        self.assertLessEqual(bot.max_in_flight, 4)
+
+    def test_drains_detached_tasks(self):
+        """
+        Tests that messages handled using on_msg from a handler run as
+        separate tasks, which are done when start() returns
+        :return: None
+        """
+        messages = [
+            TextMessage(Address("user"), Address("bot"), "/echo spawn")
+        ]
+        bot = self.create_bot(AsyncEchoBot, messages, self.BLOCKING_SESSIONS)
+        bot.start()
+        self.assertEqual(
+            sorted(message.body for message in bot.connection.sent),
+            ["spawn", "spawned"]
+        )
+
+    def test_run_threadsafe(self):
+        """
+        Tests that waiting for a coroutine works from other threads, but
+        raises an error on the event loop's thread instead of deadlocking
+        :return: None
+        """
+        bot = self.create_bot(AsyncEchoBot, [], self.BLOCKING_SESSIONS)
+        bot.loop = asyncio.new_event_loop()
+
+        async def double(value: int) -> int:
+            return value * 2
+
+        async def run() -> int:
+            with self.assertRaises(RuntimeError):
+                bot._run_threadsafe(double(1))
+            return await bot.loop.run_in_executor(
+                None, bot._run_threadsafe, double(2)
+            )
+
+        try:
+            self.assertEqual(bot.loop.run_until_complete(run()), 4)
+        finally:
+            bot.loop.close()
+
+    def test_blocking_sessions(self):
+        """
+        Tests that handlers receive blocking sessions if asyncio sessions
+        are disabled
+        :return: None
+        """
+        bot = self.create_bot(
+            AsyncEchoBot, make_messages(1, 1), self.BLOCKING_SESSIONS
+        )
+        bot.start()
+        self.assertIsNone(bot.async_db_engine)
+        self.assertEqual(type(bot.sessions[0]).__name__, "Session")
+
+    @skipUnless(ASYNC_SESSIONS, "Requires SQLAlchemy 1.4 and aiosqlite")
+    def test_async_sessions(self):
+        """
+        Tests that handlers receive asyncio sessions, in which the
+        senders are stored
+        :return: None
+        """
+        messages = [
+            TextMessage(Address(address), Address("bot"), "/echo count")
+            for address in ["a", "b", "a", "c"]
+        ]
+        bot = self.create_bot(AsyncEchoBot, messages)
+        bot.start()
+
+        self.assertTrue(all(
+            isinstance(session, AsyncSession) for session in bot.sessions
+        ))
+        bodies = {}  # type: Dict[str, List[str]]
+        for message in bot.connection.sent:
+            bodies.setdefault(message.receiver.address, [])\
+                .append(message.body)
+        # Every sender is stored before its handler runs
+        self.assertEqual(len(bodies["a"]), 2)
+        self.assertLessEqual(int(bodies["a"][0]), int(bodies["a"][1]))
+        for address in ["a", "b", "c"]:
+            self.assertGreaterEqual(int(bodies[address][0]), 1)
+            self.assertIsNotNone(bot.address_book.cache.get(address))
+
+        db_session = bot.sessionmaker()
+        try:
+            self.assertEqual(db_session.query(DbAddress).count(), 3)
+        finally:
+            db_session.close()
+
+    @skipIf(ASYNC_SESSIONS, "SQLAlchemy asyncio support is available")
+    def test_async_sessions_unavailable(self):
+        """
+        Tests that a missing asyncio driver is reported when the bot is
+        created
+        :return: None
+        """
+        with self.assertRaises(ConfigurationError):
+            self.create_bot(AsyncEchoBot)
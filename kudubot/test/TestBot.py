@@ -0,0 +1,482 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from threading import Event
+from unittest import TestCase
+from typing import List, Dict, Any, Optional, Type
+from sqlalchemy.orm.session import Session
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from kudubot.Bot import Bot
+from kudubot.db.Address import Address as DbAddress
+from kudubot.log.LogQueueHandler import LogQueueHandler
+from kudubot.parsing.Command import Command
+from kudubot.parsing.CommandParser import CommandParser
+from kudubot.test.FakeConnection import FakeConnection
+
+
+class EchoParser(CommandParser):
+    """
+    Parser with an echo command
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the parser
+        """
+        return "echo"
+
+    @classmethod
+    def commands(cls) -> List[Command]:
+        """
+        :return: The commands of the parser
+        """
+        return [Command("echo", [("text", str)])]
+
+
+class EchoBot(Bot):
+    """
+    Bot that echoes the text of echo commands back to the sender
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the bot
+        """
+        return "echo-bot"
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        :return: The version of the bot
+        """
+        return "1.0.0"
+
+    @classmethod
+    def parsers(cls) -> List[CommandParser]:
+        """
+        :return: The parsers of the bot
+        """
+        return [EchoParser()]
+
+    def on_echo(
+            self,
+            sender: DbAddress,
+            args: Dict[str, Any],
+            db_session: Session
+    ):
+        """
+        Echoes the text back to the sender
+        :param sender: The sender
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: None
+        """
+        time.sleep(0.005)
+        self.send_txt(sender, args["text"])
+
+
+class WorkerEchoBot(EchoBot):
+    """
+    EchoBot that handles messages on worker threads
+    """
+
+    @property
+    def message_workers(self) -> int:
+        """
+        :return: The amount of message handling threads
+        """
+        return 4
+
+
+class BackgroundEchoBot(EchoBot):
+    """
+    EchoBot whose background iteration blocks until it is released
+    """
+
+    def init(self):
+        """
+        Initializes the events of the background iteration
+        :return: None
+        """
+        self.bg_started = Event()
+        self.bg_released = Event()
+
+    def on_echo(
+            self,
+            sender: DbAddress,
+            args: Dict[str, Any],
+            db_session: Session
+    ):
+        """
+        Echoes the text once the background iteration started
+        :param sender: The sender
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: None
+        """
+        self.bg_started.wait(5)
+        super().on_echo(sender, args, db_session)
+
+    def bg_iteration(self, iteration: int, db_session: Session):
+        """
+        Blocks until the test releases the iteration
+        :param iteration: The iteration count
+        :param db_session: The database session
+        :return: None
+        """
+        self.bg_started.set()
+        self.bg_released.wait(10)
+
+
+class AuthEchoBot(EchoBot):
+    """
+    EchoBot whose commands require authorization, which is cached
+    """
+
+    def init(self):
+        """
+        Initializes the authorized users
+        :return: None
+        """
+        self.authorized = {"alice"}
+        self.auth_checks = 0
+
+    @property
+    def auth_cache_ttl(self) -> float:
+        """
+        :return: The time for which granted authorizations are cached
+        """
+        return 60
+
+    @property
+    def auth_negative_cache_ttl(self) -> float:
+        """
+        :return: The time for which denied authorizations are cached
+        """
+        return 10
+
+    def is_authorized(
+            self,
+            address: DbAddress,
+            args: Dict[str, Any],
+            db_session: Session
+    ) -> bool:
+        """
+        Counts the authorization checks
+        :param address: The user
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: True if the user is authorized
+        """
+        self.auth_checks += 1
+        return address.address in self.authorized
+
+    @Bot.auth_required
+    def on_echo(
+            self,
+            sender: DbAddress,
+            args: Dict[str, Any],
+            db_session: Session
+    ):
+        """
+        Echoes the text back to authorized senders
+        :param sender: The sender
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: None
+        """
+        self.send_txt(sender, args["text"])
+
+    @Bot.auth_required
+    def handle_shout(
+            self,
+            sender: DbAddress,
+            args: Dict[str, Any],
+            db_session: Session
+    ):
+        """
+        Echoes the text in upper case back to authorized senders
+        :param sender: The sender
+        :param args: The command arguments
+        :param db_session: The database session
+        :return: None
+        """
+        self.send_txt(sender, args["text"].upper())
+
+
+def make_messages(amount: int, senders: int) -> List[Message]:
+    """
+    Generates echo commands from a given amount of senders
+    :param amount: The amount of messages
+    :param senders: The amount of different senders
+    :return: The messages
+    """
+    return [
+        TextMessage(
+            Address("user{}".format(i % senders)),
+            Address("bot"),
+            "/echo {}".format(i)
+        )
+        for i in range(0, amount)
+    ]
+
+
+class BotTestCase(TestCase):
+    """
+    Creates bots in temporary directories and cleans up after them
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary directory for the bots
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.bots = []  # type: List[Bot]
+
+    def tearDown(self):
+        """
+        Stops the logging of the bots and deletes the temporary directory
+        :return: None
+        """
+        for bot in self.bots:
+            bot.stop_logging()
+            bot.db_engine.dispose()
+        shutil.rmtree(self.tempdir)
+
+    def create_bot(
+            self,
+            bot_cls: Type[Bot] = EchoBot,
+            messages: Optional[List[Message]] = None,
+            extras: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Creates a bot that uses a fake connection
+        :param bot_cls: The class of the bot
+        :param messages: The messages the connection delivers
+        :param extras: The contents of the extras.json file
+        :return: The bot
+        """
+        location = os.path.join(self.tempdir, str(len(self.bots)))
+        os.makedirs(location)
+        with open(os.path.join(location, "connection.json"), "w") as f:
+            json.dump({}, f)
+        if extras is not None:
+            with open(os.path.join(location, "extras.json"), "w") as f:
+                json.dump(extras, f)
+        bot = bot_cls(FakeConnection(messages), location)
+        self.bots.append(bot)
+        return bot
+
+
+class TestBot(BotTestCase):
+    """
+    Tests handling messages with the Bot class
+    """
+
+    def test_message_workers_are_drained(self):
+        """
+        Tests that start() only returns once the worker threads handled
+        all received messages, and that the replies to every sender are
+        sent in order
+        :return: None
+        """
+        bot = self.create_bot(WorkerEchoBot, make_messages(40, 3))
+        bot.start()
+
+        sent = bot.connection.sent
+        self.assertEqual(len(sent), 40)
+        for offset in range(0, 3):
+            self.assertEqual(
+                [
+                    int(message.body) for message in sent
+                    if message.receiver.address == "user{}".format(offset)
+                ],
+                list(range(offset, 40, 3))
+            )
+
+    def test_start_stops_scheduler(self):
+        """
+        Tests that start() stops the bot's scheduler without waiting for
+        running background jobs, whose threads are daemon threads
+        :return: None
+        """
+        bot = self.create_bot(BackgroundEchoBot, make_messages(1, 1))
+        started = time.monotonic()
+        try:
+            bot.start()
+            bot.bg_thread.join(5)
+
+            self.assertLess(time.monotonic() - started, 4)
+            self.assertTrue(bot.bg_started.is_set())
+            self.assertFalse(bot.bg_alive())
+            self.assertEqual(len(bot.connection.sent), 1)
+            self.assertTrue(all(
+                thread.daemon for thread in bot.scheduler._threads
+            ))
+        finally:
+            bot.bg_released.set()
+
+    def test_receive_logs_are_immutable(self):
+        """
+        Tests that received and dropped messages are logged using
+        immutable arguments, which the log thread can format later
+        :return: None
+        """
+        message = make_messages(1, 1)[0]
+        setattr(message, "message_id", 1)
+        bot = self.create_bot(EchoBot, [message, message])
+        with self.assertLogs(bot.logger, "DEBUG") as logs:
+            bot.start()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn("Received TextMessage from user0 on FakeConnection",
+                      messages)
+        self.assertIn("Dropping duplicate TextMessage from user0", messages)
+        for record in logs.records:
+            self.assertTrue(LogQueueHandler.is_immutable(record))
+
+    def test_message_identity(self):
+        """
+        Tests that messages are identified by their ID, or by a digest of
+        their content together with their sender and timestamp
+        :return: None
+        """
+        bot = self.create_bot()
+        message = make_messages(1, 1)[0]
+        self.assertIsNone(bot.message_identity(message))
+
+        setattr(message, "timestamp", 1000)
+        identity = bot.message_identity(message)
+        same = TextMessage(Address("user0"), Address("bot"), "/echo 0")
+        setattr(same, "timestamp", 1000)
+        self.assertEqual(bot.message_identity(same), identity)
+        self.assertEqual(identity[0], "user0")
+        self.assertEqual(identity[1], hashlib.sha256(b"/echo 0").digest())
+        self.assertEqual(identity[2], 1000)
+
+        other = TextMessage(Address("user0"), Address("bot"), "/echo 1")
+        setattr(other, "timestamp", 1000)
+        self.assertNotEqual(bot.message_identity(other), identity)
+
+        setattr(message, "message_id", "abc")
+        self.assertEqual(bot.message_identity(message), ("user0", "abc"))
+
+    def test_authorization_cache(self):
+        """
+        Tests that granted and denied authorizations are cached
+        separately by sender and command
+        :return: None
+        """
+        bot = self.create_bot(AuthEchoBot)
+        alice = DbAddress(address="alice")
+        mallory = DbAddress(address="mallory")
+        for sender in [alice, alice, mallory, mallory]:
+            bot.on_echo(sender, {"text": "hi"}, None)
+        bot.handle_shout(alice, {"text": "hi"}, None)
+
+        self.assertEqual(bot.auth_checks, 3)
+        self.assertEqual(
+            [message.body for message in bot.connection.sent],
+            ["hi", "hi", "Unauthorized", "Unauthorized", "HI"]
+        )
+        self.assertEqual(bot.metrics.count("auth_cache_miss"), 3)
+        self.assertEqual(bot.metrics.count("auth_cache_hit", "granted"), 1)
+        self.assertEqual(bot.metrics.count("auth_cache_hit", "denied"), 1)
+        self.assertEqual(len(bot.auth_cache), 2)
+        self.assertEqual(len(bot.auth_negative_cache), 1)
+        self.assertEqual(bot.auth_cache.ttl, 60)
+        self.assertEqual(bot.auth_negative_cache.ttl, 10)
+
+    def test_invalidate_authorization(self):
+        """
+        Tests removing cached authorizations by sender and by command
+        :return: None
+        """
+        bot = self.create_bot(AuthEchoBot)
+        alice = DbAddress(address="alice")
+        mallory = DbAddress(address="mallory")
+        for sender in [alice, mallory]:
+            bot.on_echo(sender, {"text": "hi"}, None)
+            bot.handle_shout(sender, {"text": "hi"}, None)
+        self.assertEqual(bot.auth_checks, 4)
+
+        # The cached denial is used until it is invalidated
+        bot.authorized = {"mallory"}
+        bot.on_echo(mallory, {"text": "hi"}, None)
+        self.assertEqual(bot.connection.sent[-1].body, "Unauthorized")
+        bot.invalidate_authorization(address="mallory")
+        bot.on_echo(mallory, {"text": "hi"}, None)
+        bot.handle_shout(mallory, {"text": "hi"}, None)
+        self.assertEqual(bot.auth_checks, 6)
+        self.assertEqual(
+            [message.body for message in bot.connection.sent[-2:]],
+            ["hi", "HI"]
+        )
+
+        bot.invalidate_authorization(command="echo")
+        bot.on_echo(alice, {"text": "hi"}, None)
+        bot.handle_shout(alice, {"text": "hi"}, None)
+        bot.on_echo(mallory, {"text": "hi"}, None)
+        self.assertEqual(bot.auth_checks, 8)
+        self.assertEqual(
+            [message.body for message in bot.connection.sent[-3:]],
+            ["Unauthorized", "HI", "hi"]
+        )
+
+    def test_flood_protection(self):
+        """
+        Tests that messages of senders exceeding the sender rate limit are
+        dropped and counted, and that the slow down reply is rate limited
+        :return: None
+        """
+        messages = [
+            TextMessage(Address(sender), Address("bot"), "/echo " + sender)
+            for sender in ["spammer"] * 5 + ["user"]
+        ]
+        bot = self.create_bot(EchoBot, messages, {
+            "sender_rate_limit": [0.001, 2],
+            "flood_reply": "Slow down!"
+        })
+        bot.start()
+
+        self.assertEqual(
+            [
+                (message.receiver.address, message.body, message.title)
+                for message in bot.connection.sent
+            ],
+            [
+                ("spammer", "spammer", ""),
+                ("spammer", "spammer", ""),
+                ("spammer", "Slow down!", "Slow down"),
+                ("user", "user", "")
+            ]
+        )
+        self.assertEqual(bot.metrics.count("flood_dropped"), 3)
@@ -0,0 +1,225 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import random
+import tracemalloc
+from unittest import TestCase
+from typing import List
+from kudubot.exceptions import ParseError
+from kudubot.parsing.Command import Command
+from kudubot.parsing.CommandParser import CommandParser
+
+
+def legacy_argumentize(text: str) -> List[str]:
+    """
+    Turns text into a list of arguments the way CommandParser did
+    before the streaming tokenizer existed
+    :param text: The text to
+    :return: The list of arguments
+    """
+    splitted = text.split("\"")
+
+    first_quote = False
+    if splitted[0] == "":
+        first_quote = True
+
+    raw_args = []
+
+    for i, arg in enumerate(splitted):
+
+        is_quote = False
+        if first_quote and (i % 2) == 0:
+            is_quote = True
+        if not first_quote and (i % 2) == 1:
+            is_quote = True
+
+        if is_quote:
+            raw_args.append(arg)
+        else:
+            raw_args += arg.strip().split(" ")
+
+    args = []
+
+    for arg in raw_args:
+        if arg != "":
+            args.append(arg)
+
+    return args
+
+
+def split_argumentize(text: str) -> List[str]:
+    """
+    Turns text into a list of arguments by splitting the whole text at
+    quotes first, including escaped quotes
+    :param text: The text to
+    :return: The list of arguments
+    """
+    segments = text.split("\"")
+    merged = [segments[0]]
+    for segment in segments[1:]:
+        if merged[-1].endswith("\\"):
+            merged[-1] = merged[-1][:-1] + "\"" + segment
+        else:
+            merged.append(segment)
+
+    args = []
+    for index, segment in enumerate(merged):
+        if index % 2 == 1:
+            args.append(segment)
+        else:
+            args += segment.strip().split(" ")
+    return [arg for arg in args if arg != ""]
+
+
+class SampleParser(CommandParser):
+    """
+    Parser used for testing
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        :return: The name of the parser
+        """
+        return "sample"
+
+    @classmethod
+    def commands(cls) -> List[Command]:
+        """
+        :return: The commands of the parser
+        """
+        return [
+            Command("say", [("text", str)]),
+            Command("add", [("a", int), ("b", int)])
+        ]
+
+
+class TestCommandParser(TestCase):
+    """
+    Tests the tokenizer and the command lookup of the CommandParser class
+    """
+
+    def test_equivalence_with_legacy_argumentizer(self):
+        """
+        Compares the tokenizer with the legacy argumentizer on random
+        inputs. Inputs starting with a quote or containing escaped quotes
+        are excluded, the legacy implementation inverted quoting for the
+        former and did not support the latter.
+        :return: None
+        """
+        rng = random.Random(42)
+        alphabet = ["a", "b", "/", " ", " ", "\"", "\t", "\n", "\\", "1", "ä"]
+        checked = 0
+        while checked < 20000:
+            text = "".join(
+                rng.choice(alphabet) for _ in range(0, rng.randint(0, 24))
+            )
+            if text.startswith("\"") or "\\\"" in text:
+                continue
+            self.assertEqual(
+                legacy_argumentize(text),
+                CommandParser._argumentize(text),
+                text
+            )
+            checked += 1
+
+    def test_equivalence_with_split_argumentizer(self):
+        """
+        Compares the incremental tokenizer with splitting the whole text
+        on random inputs, including escaped quotes and unusual whitespace
+        :return: None
+        """
+        rng = random.Random(42)
+        alphabet = ["a", "/", " ", " ", "\"", "\t", "\n", "\\", "\xa0", "1"]
+        for _ in range(0, 20000):
+            text = "".join(
+                rng.choice(alphabet) for _ in range(0, rng.randint(0, 24))
+            )
+            self.assertEqual(
+                split_argumentize(text),
+                CommandParser._argumentize(text),
+                text
+            )
+
+    def test_quoting(self):
+        """
+        Tests that quoted text forms a single argument
+        :return: None
+        """
+        for text, expected in [
+            ("/say hello", ["/say", "hello"]),
+            ("  /say   a  b ", ["/say", "a", "b"]),
+            ("/say \"a b\" c", ["/say", "a b", "c"]),
+            ("/say \" a  b \"", ["/say", " a  b "]),
+            ("/say \"\"", ["/say"]),
+            ("/say \"unterminated quote", ["/say", "unterminated quote"]),
+            ("", [])
+        ]:
+            self.assertEqual(CommandParser._argumentize(text), expected)
+
+    def test_escaped_quotes(self):
+        """
+        Tests that escaped quotes don't start or end quoted arguments
+        :return: None
+        """
+        for text, expected in [
+            ("/say \"a \\\"b\\\" c\" d\\\"e",
+             ["/say", "a \"b\" c", "d\"e"]),
+            ("/say \\\"", ["/say", "\""]),
+            ("/say \"\\\"\"", ["/say", "\""])
+        ]:
+            self.assertEqual(CommandParser._argumentize(text), expected)
+
+    def test_parse(self):
+        """
+        Tests parsing commands
+        :return: None
+        """
+        parser = SampleParser()
+        self.assertEqual(
+            parser.parse("/SAY \"hello world\""),
+            ("say", {"text": "hello world"})
+        )
+        self.assertEqual(
+            parser.parse("/add 1 2"), ("add", {"a": 1, "b": 2})
+        )
+        for text in [
+            "", "say hi", "/unknown", "/add 1", "/add 1 two", "/say a b"
+        ]:
+            with self.assertRaises(ParseError):
+                parser.parse(text)
+
+    def test_tokenizing_stops_early(self):
+        """
+        Tests that long messages are only tokenized until the command's
+        arity is exceeded. The rest of the text is never copied, so the
+        memory used does not depend on the length of the text
+        :return: None
+        """
+        parser = SampleParser()
+        for separator in [" ", "\" \""]:
+            text = "/add " + separator.join(["1"] * 100000)
+
+            tracemalloc.start()
+            with self.assertRaises(ParseError):
+                parser.parse(text)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            self.assertLess(peak, len(text) // 10)
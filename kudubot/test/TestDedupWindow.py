@@ -0,0 +1,77 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+from kudubot.cache.DedupWindow import DedupWindow
+
+
+class TestDedupWindow(TestCase):
+    """
+    Tests detecting duplicates with the DedupWindow class
+    """
+
+    def test_expiry(self):
+        """
+        Tests that keys are forgotten once the time window passed
+        :return: None
+        """
+        window = DedupWindow(10, 60)
+        with patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            self.assertFalse(window.check("a"))
+            monotonic.return_value = 130.0
+            self.assertFalse(window.check("b"))
+            self.assertTrue(window.check("a"))
+
+            # The time window starts when a key is first seen
+            monotonic.return_value = 160.0
+            self.assertFalse(window.check("a"))
+            self.assertTrue(window.check("b"))
+            monotonic.return_value = 190.0
+            self.assertEqual(len(window), 2)
+            self.assertFalse(window.check("b"))
+            self.assertEqual(len(window), 2)
+
+        self.assertEqual((window.hits, window.misses), (2, 4))
+        self.assertAlmostEqual(window.hit_rate, 1 / 3)
+
+    def test_eviction(self):
+        """
+        Tests that the oldest keys are forgotten once the window is full
+        :return: None
+        """
+        window = DedupWindow(3, 60)
+        for key in ["a", "b", "c", "d"]:
+            self.assertFalse(window.check(key))
+        self.assertEqual(len(window), 3)
+
+        self.assertTrue(window.check("b"))
+        self.assertFalse(window.check("a"))
+        # Seeing a duplicate does not make a key more recent
+        self.assertFalse(window.check("b"))
+        self.assertEqual(len(window), 3)
+
+    def test_empty_hit_rate(self):
+        """
+        Tests the hit rate of a window that was never checked
+        :return: None
+        """
+        self.assertEqual(DedupWindow(1, 1).hit_rate, 0.0)
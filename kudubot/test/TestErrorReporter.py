@@ -0,0 +1,162 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import logging
+from threading import Event
+from unittest import TestCase
+from unittest.mock import patch
+from typing import List
+from kudubot.ErrorReporter import ErrorReporter
+
+
+class TestErrorReporter(TestCase):
+    """
+    Tests the deduplication, sampling and rate limiting of exception
+    reports using a fake transport
+    """
+
+    def setUp(self):
+        """
+        Creates a fake transport and a logger that discards its records
+        :return: None
+        """
+        self.reported = []  # type: List[BaseException]
+        self.summaries = []  # type: List[str]
+        self.logger = logging.getLogger("TestErrorReporter")
+        self.logger.disabled = True
+
+    def create_reporter(self, **kwargs) -> ErrorReporter:
+        """
+        Creates an error reporter that uses the fake transports
+        :param kwargs: Additional arguments for the error reporter
+        :return: The error reporter
+        """
+        return ErrorReporter(
+            self.reported.append,
+            self.summaries.append,
+            logger=self.logger,
+            **kwargs
+        )
+
+    @staticmethod
+    def raise_error(text: str) -> Exception:
+        """
+        Raises and catches an exception, always from the same line
+        :param text: The text of the exception
+        :return: The exception
+        """
+        try:
+            raise ValueError(text)
+        except ValueError as e:
+            return e
+
+    def test_deduplication(self):
+        """
+        Tests that repeated exceptions are only reported once and
+        summarized afterwards
+        :return: None
+        """
+        reporter = self.create_reporter()
+        for i in range(0, 5):
+            reporter.report(self.raise_error(str(i)), "During test")
+        reporter.report(self.raise_error("other"), "Elsewhere")
+        reporter.flush()
+
+        self.assertEqual([str(e) for e in self.reported], ["0", "other"])
+        self.assertEqual(reporter.occurred, 6)
+        self.assertEqual(reporter.suppressed, 4)
+        self.assertEqual(
+            reporter.summarize(), ["5x During test: ValueError: 0"]
+        )
+        self.assertEqual(reporter.summarize(), [])
+
+    def test_sampling(self):
+        """
+        Tests that sampled repeated exceptions are reported anyway
+        :return: None
+        """
+        reporter = self.create_reporter(sample_rate=0.5, rate_limit=(0, 100))
+        with patch("kudubot.ErrorReporter.random.random") as rand:
+            rand.side_effect = [0.1, 0.9, 0.4, 0.6]
+            for i in range(0, 5):
+                reporter.report(self.raise_error(str(i)), "During test")
+        reporter.flush()
+
+        self.assertEqual([str(e) for e in self.reported], ["0", "1", "3"])
+        self.assertEqual(reporter.suppressed, 2)
+
+    def test_rate_limit(self):
+        """
+        Tests that reports beyond the rate limit are only logged
+        :return: None
+        """
+        reporter = self.create_reporter(rate_limit=(0.001, 2))
+        for i in range(0, 4):
+            reporter.report(self.raise_error(str(i)), "During {}".format(i))
+        reporter.flush()
+
+        self.assertEqual(len(self.reported), 2)
+        self.assertEqual(reporter.sent, 2)
+        self.assertEqual(reporter.rate_limited, 2)
+
+    def test_non_blocking(self):
+        """
+        Tests that reporting does not wait for a slow transport and that
+        exceptions are dropped if too many are pending
+        :return: None
+        """
+        release = Event()
+
+        def slow_transport(exception: BaseException):
+            release.wait()
+            self.reported.append(exception)
+
+        reporter = ErrorReporter(
+            slow_transport,
+            logger=self.logger,
+            rate_limit=(0, 100),
+            max_pending=3
+        )
+        start = time.monotonic()
+        for i in range(0, 10):
+            reporter.report(self.raise_error(str(i)), "During {}".format(i))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        release.set()
+        reporter.flush()
+        # One exception is being reported while three are pending
+        self.assertGreaterEqual(reporter.dropped, 6)
+        self.assertEqual(len(self.reported), 10 - reporter.dropped)
+
+    def test_failing_transport(self):
+        """
+        Tests that exceptions raised by the transport are not propagated
+        :return: None
+        """
+        def failing_transport(_: BaseException):
+            raise ConnectionError("No connection")
+
+        reporter = ErrorReporter(failing_transport, logger=self.logger)
+        reporter.report(self.raise_error("test"), "During test")
+        reporter.flush()
+        self.assertEqual(reporter.sent, 0)
+        reporter.report(self.raise_error("test"), "After failure")
+        reporter.flush()
+        self.assertEqual(reporter.occurred, 2)
@@ -0,0 +1,74 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+from kudubot.ratelimit.KeyedTokenBuckets import KeyedTokenBuckets
+
+
+class TestKeyedTokenBuckets(TestCase):
+    """
+    Tests rate limiting keys separately with the KeyedTokenBuckets class
+    """
+
+    def test_separate_buckets(self):
+        """
+        Tests that every key has its own bucket
+        :return: None
+        """
+        with patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            buckets = KeyedTokenBuckets(0.5, 2)
+            self.assertTrue(buckets.consume("a"))
+            self.assertTrue(buckets.consume("a"))
+            self.assertFalse(buckets.consume("a"))
+            self.assertEqual(buckets.delay("a"), 2.0)
+            self.assertTrue(buckets.consume("b", 2))
+            self.assertEqual(buckets.delay("c"), 0.0)
+
+            monotonic.return_value = 102.0
+            self.assertTrue(buckets.consume("a"))
+            self.assertFalse(buckets.consume("a"))
+
+    def test_idle_eviction(self):
+        """
+        Tests that buckets which were refilled completely are discarded,
+        while buckets of active keys are kept
+        :return: None
+        """
+        with patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            buckets = KeyedTokenBuckets(0.5, 2)
+            buckets.consume("a")
+            buckets.consume("b")
+
+            monotonic.return_value = 103.0
+            buckets.consume("a")
+            buckets.consume("a")
+            self.assertEqual(len(buckets), 2)
+
+            # Evicts idle buckets at most every time a bucket needs to
+            # refill completely
+            monotonic.return_value = 105.0
+            buckets.consume("c")
+            self.assertEqual(len(buckets), 2)
+            self.assertEqual(buckets.delay("b"), 0.0)
+            self.assertTrue(buckets.consume("a"))
+            self.assertFalse(buckets.consume("a"))
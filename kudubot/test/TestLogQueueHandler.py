@@ -0,0 +1,66 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import logging
+from queue import Queue
+from unittest import TestCase
+from kudubot.log.LogQueueHandler import LogQueueHandler
+
+
+class TestLogQueueHandler(TestCase):
+    """
+    Tests which log messages are formatted before they are queued
+    """
+
+    def log(self, msg: str, *args) -> logging.LogRecord:
+        """
+        Queues a log record
+        :param msg: The message
+        :param args: The message arguments
+        :return: The queued record
+        """
+        queue = Queue()  # type: Queue
+        record = logging.LogRecord(
+            "test", logging.INFO, __file__, 1, msg, args, None
+        )
+        LogQueueHandler(queue).handle(record)
+        return queue.get_nowait()
+
+    def test_deferred_formatting(self):
+        """
+        Tests that messages with immutable arguments are formatted by
+        the listener
+        :return: None
+        """
+        record = self.log("Received message %s from %d", "hi", 1)
+        self.assertEqual(record.msg, "Received message %s from %d")
+        self.assertEqual(record.args, ("hi", 1))
+        self.assertEqual(record.getMessage(), "Received message hi from 1")
+
+    def test_mutable_arguments(self):
+        """
+        Tests that messages with mutable arguments are formatted before
+        they are queued
+        :return: None
+        """
+        args = ["a"]
+        record = self.log("Arguments: %s", args)
+        args.append("b")
+        self.assertIsNone(record.args)
+        self.assertEqual(record.getMessage(), "Arguments: ['a']")
@@ -0,0 +1,77 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from unittest import TestCase
+from kudubot.cache.LruCache import LruCache
+
+
+class TestLruCache(TestCase):
+    """
+    Tests the eviction and statistics of the LruCache class
+    """
+
+    def test_evicts_least_recently_used(self):
+        """
+        Tests that reading an entry keeps it from being evicted
+        :return: None
+        """
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_update_and_remove(self):
+        """
+        Tests that updating an entry does not grow the cache and that
+        removed entries are no longer returned
+        :return: None
+        """
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("a", 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a"), 2)
+
+        cache.remove("a")
+        cache.remove("missing")
+        self.assertEqual(cache.get("a", "default"), "default")
+
+        cache.put("b", 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_hit_rate(self):
+        """
+        Tests that hits and misses are counted
+        :return: None
+        """
+        cache = LruCache(10)
+        self.assertEqual(cache.hit_rate, 0.0)
+        cache.put("a", 1)
+        for key in ["a", "a", "a", "b"]:
+            cache.get(key)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        self.assertEqual(cache.hit_rate, 0.75)
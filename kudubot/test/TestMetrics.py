@@ -0,0 +1,94 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import pickle
+from unittest import TestCase
+from kudubot.metrics.Metrics import Metrics
+
+
+class TestMetrics(TestCase):
+    """
+    Tests handing metrics from one Metrics object to another, as done
+    by the sharded executor's worker processes
+    """
+
+    def test_drain_and_merge(self):
+        """
+        Tests that drained metrics can be pickled and merged
+        :return: None
+        """
+        worker = Metrics()
+        worker.observe("handler", 0.002, "echo")
+        worker.observe("handler", 0.004, "echo")
+        worker.observe("send", 0.001, "FakeConnection")
+        worker.increment("flood_dropped")
+
+        drained = pickle.loads(pickle.dumps(worker.drain()))
+        self.assertEqual(worker.histograms(), [])
+        self.assertEqual(worker.counters(), [])
+
+        parent = Metrics()
+        parent.observe("handler", 0.001, "echo")
+        parent.increment("flood_dropped", amount=2)
+        parent.merge(drained, skip_stages=["send"])
+
+        histograms = parent.histograms()
+        self.assertEqual(len(histograms), 1)
+        stage, label, histogram = histograms[0]
+        self.assertEqual((stage, label), ("handler", "echo"))
+        self.assertEqual(histogram.count, 3)
+        self.assertAlmostEqual(histogram.sum, 0.007)
+        self.assertEqual(histogram.min, 0.001)
+        self.assertEqual(histogram.max, 0.004)
+        self.assertEqual(parent.count("flood_dropped"), 3)
+
+        # Merged metrics keep working after unpickling
+        drained.observe("handler", 0.003, "echo")
+        self.assertEqual(drained.histograms()[0][2].count, 3)
+
+    def test_gauges(self):
+        """
+        Tests that gauges are read when the metrics are reported
+        :return: None
+        """
+        metrics = Metrics()
+        values = [0.25]
+        metrics.gauge("dedup_hit_rate", lambda: values[0])
+        metrics.gauge("send_queue_depth", lambda: 3, "FakeConnection")
+        self.assertEqual(metrics.gauges(), [
+            ("dedup_hit_rate", "", 0.25),
+            ("send_queue_depth", "FakeConnection", 3)
+        ])
+        values[0] = 0.5
+        self.assertIn("dedup_hit_rate: 0.5", metrics.summary())
+        self.assertIn("send_queue_depth FakeConnection: 3", metrics.summary())
+        self.assertIn(
+            "kudubot_gauge{gauge=\"dedup_hit_rate\"} 0.5",
+            metrics.openmetrics()
+        )
+        self.assertIn(
+            "kudubot_gauge{gauge=\"send_queue_depth\","
+            "label=\"FakeConnection\"} 3",
+            metrics.openmetrics()
+        )
+
+        metrics.reset()
+        self.assertEqual(len(metrics.gauges()), 2)
+        drained = pickle.loads(pickle.dumps(metrics.drain()))
+        self.assertEqual(drained.gauges(), [])
@@ -0,0 +1,106 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import time
+import random
+from threading import Event, Thread
+from unittest import TestCase
+from typing import Dict, List
+from kudubot.execution.OrderedExecutor import OrderedExecutor
+
+
+class TestOrderedExecutor(TestCase):
+    """
+    Tests the ordering and the pending task limit of the OrderedExecutor
+    """
+
+    def test_order_per_key(self):
+        """
+        Tests that tasks with the same key are executed in the order they
+        were submitted and never concurrently
+        :return: None
+        """
+        executor = OrderedExecutor(4, 100, "test")
+        rng = random.Random(42)
+        executed = {}  # type: Dict[str, List[int]]
+        running = set()
+        overlaps = []
+
+        def task(key: str, index: int, pause: float):
+            if key in running:
+                overlaps.append(key)
+            running.add(key)
+            time.sleep(pause)
+            executed.setdefault(key, []).append(index)
+            running.discard(key)
+
+        for index in range(0, 60):
+            key = "user{}".format(index % 3)
+            executor.submit(key, task, key, index, rng.random() / 500)
+        executor.shutdown(wait=True)
+
+        self.assertEqual(overlaps, [])
+        self.assertEqual(executor.pending, 0)
+        for offset, key in enumerate(["user0", "user1", "user2"]):
+            self.assertEqual(executed[key], list(range(offset, 60, 3)))
+
+    def test_keys_run_concurrently(self):
+        """
+        Tests that a blocked key does not hold up other keys
+        :return: None
+        """
+        executor = OrderedExecutor(2, 10, "test")
+        release = Event()
+        done = Event()
+        executor.submit("slow", release.wait)
+        executor.submit("fast", done.set)
+        self.assertTrue(done.wait(5))
+        release.set()
+        executor.shutdown(wait=True)
+
+    def test_pending_limit(self):
+        """
+        Tests that submitting blocks while the maximum amount of tasks is
+        queued or running, and that failing tasks free their slot
+        :return: None
+        """
+        executor = OrderedExecutor(1, 2, "test")
+        release = Event()
+        executor.submit("a", release.wait)
+        executor.submit("b", lambda: 1 / 0)
+        self.assertEqual(executor.pending, 2)
+
+        submitted = Event()
+
+        def submit():
+            executor.submit("c", submitted.set)
+
+        thread = Thread(target=submit)
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        self.assertFalse(submitted.is_set())
+
+        with self.assertLogs("OrderedExecutor", "ERROR"):
+            release.set()
+            thread.join(5)
+            self.assertTrue(submitted.wait(5))
+            executor.shutdown(wait=True)
+        self.assertEqual(executor.pending, 0)
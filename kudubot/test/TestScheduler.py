@@ -0,0 +1,122 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import sys
+import time
+import subprocess
+from threading import Thread
+from unittest import TestCase
+from typing import List
+from kudubot.execution.Scheduler import Scheduler, Job
+
+
+class TestScheduler(TestCase):
+    """
+    Tests the intervals and overlap policies of the Scheduler
+    """
+
+    def setUp(self):
+        """
+        Starts a scheduler
+        :return: None
+        """
+        self.scheduler = Scheduler(2, "test")
+        self.thread = Thread(target=self.scheduler.run, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """
+        Stops the scheduler
+        :return: None
+        """
+        self.scheduler.stop(wait=True)
+        self.thread.join()
+
+    def test_invalid_interval(self):
+        """
+        Tests that jobs need a positive interval
+        :return: None
+        """
+        for interval in [0, -1, lambda: 0]:
+            with self.assertRaises(ValueError):
+                self.scheduler.add_job(lambda: None, interval)
+
+    def test_interval_function(self):
+        """
+        Tests that an interval function is called for every execution
+        :return: None
+        """
+        intervals = [0.02]
+        times = []  # type: List[float]
+        job = self.scheduler.add_job(
+            lambda: times.append(time.monotonic()), lambda: intervals[0]
+        )
+        time.sleep(0.09)
+        intervals[0] = 10
+        time.sleep(0.1)
+        executions = job.executions
+
+        self.assertGreaterEqual(executions, 3)
+        self.assertLessEqual(executions, 6)
+        self.assertEqual(job.period, 10)
+
+    def test_overlap_policies(self):
+        """
+        Tests that executions of running jobs are skipped or queued
+        :return: None
+        """
+        skipping = self.scheduler.add_job(
+            lambda: time.sleep(0.1), 0.02, overlap=Job.SKIP
+        )
+        queueing = self.scheduler.add_job(
+            lambda: time.sleep(0.1), 0.02, overlap=Job.QUEUE
+        )
+        time.sleep(0.15)
+
+        self.assertGreater(skipping.skipped, 0)
+        self.assertEqual(queueing.skipped, 0)
+        # The queued execution starts right after the first one
+        self.assertEqual(queueing.executions, 1)
+        self.assertEqual(queueing.running, 1)
+
+    def test_running_job_does_not_block_exit(self):
+        """
+        Tests that the interpreter exits while a job is running
+        :return: None
+        """
+        script = "\n".join([
+            "import time",
+            "from threading import Thread, Event",
+            "from kudubot.execution.Scheduler import Scheduler",
+            "scheduler = Scheduler(1, 'exit')",
+            "started = Event()",
+            "scheduler.add_job(lambda: [started.set(), time.sleep(30)], 60)",
+            "Thread(target=scheduler.run, daemon=True).start()",
+            "print(started.wait(10))"
+        ])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)
+        )))
+        started = time.monotonic()
+        output = subprocess.check_output(
+            [sys.executable, "-c", script], cwd=root, timeout=20
+        )
+        self.assertEqual(output.strip(), b"True")
+        self.assertLess(time.monotonic() - started, 10)
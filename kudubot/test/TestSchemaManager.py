@@ -0,0 +1,186 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from typing import List, Dict, Tuple, Callable
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer
+from sqlalchemy.engine import Connection
+from kudubot.db.Address import Address
+from kudubot.db.SchemaManager import SchemaManager
+from kudubot.db.SchemaVersion import SchemaVersion
+
+
+class TestSchemaManager(TestCase):
+    """
+    Tests stamping schema versions and applying migrations
+    """
+
+    def setUp(self):
+        """
+        Creates an SQLite database in a temporary directory
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.engine = create_engine(
+            "sqlite:///" + os.path.join(self.tempdir, "test.db")
+        )
+        self.applied = []  # type: List[int]
+
+    def tearDown(self):
+        """
+        Disposes the engine and deletes the temporary directory
+        :return: None
+        """
+        self.engine.dispose()
+        shutil.rmtree(self.tempdir)
+        SchemaManager._created_tables.clear()
+
+    @staticmethod
+    def metadata(*tables: str) -> MetaData:
+        """
+        Creates metadata with kudubot's own tables and additional tables
+        :param tables: The names of the additional tables
+        :return: The metadata
+        """
+        metadata = MetaData()
+        for table in [SchemaVersion.__table__, Address.__table__]:
+            copy = getattr(table, "to_metadata", None) or table.tometadata
+            copy(metadata)
+        for name in tables:
+            Table(name, metadata, Column("id", Integer, primary_key=True))
+        return metadata
+
+    def migrations(self, amount: int) -> List[Callable[[Connection], None]]:
+        """
+        Creates migrations that record when they are applied
+        :param amount: The amount of migrations
+        :return: The migrations
+        """
+        def migration(number: int) -> Callable[[Connection], None]:
+            return lambda _: self.applied.append(number)
+        return [migration(number) for number in range(1, amount + 1)]
+
+    def stamps(self) -> Dict[str, Tuple[int, str]]:
+        """
+        :return: The schema version and fingerprint of every component
+        """
+        with self.engine.connect() as connection:
+            return {
+                row[0]: (row[1], row[2]) for row in
+                connection.execute(SchemaVersion.__table__.select())
+            }
+
+    def test_fresh_database(self):
+        """
+        Tests that no migrations run on a new database
+        :return: None
+        """
+        manager = SchemaManager(self.engine, self.metadata("notes"))
+        manager.ensure("bot", self.migrations(2), ["notes"])
+
+        self.assertEqual(self.applied, [])
+        self.assertEqual(self.stamps(), {
+            "kudubot": (0, ""),
+            "bot": (2, manager.fingerprint())
+        })
+
+    def test_legacy_database(self):
+        """
+        Tests that all migrations run on a database created before schema
+        versions were stamped
+        :return: None
+        """
+        metadata = self.metadata("notes")
+        metadata.create_all(self.engine, tables=[
+            metadata.tables["notes"], metadata.tables["addressbook"]
+        ])
+        SchemaManager(self.engine, metadata)\
+            .ensure("bot", self.migrations(2), ["notes"])
+
+        self.assertEqual(self.applied, [1, 2])
+        self.assertEqual(self.stamps()["bot"][0], 2)
+
+    def test_restart(self):
+        """
+        Tests that a current schema is only checked, not updated
+        :return: None
+        """
+        metadata = self.metadata("notes")
+        SchemaManager(self.engine, metadata)\
+            .ensure("bot", self.migrations(2), ["notes"])
+        SchemaManager._created_tables.clear()
+
+        with patch.object(SchemaManager, "_stamp") as stamp:
+            SchemaManager(self.engine, metadata)\
+                .ensure("bot", self.migrations(2), ["notes"])
+            self.assertFalse(stamp.called)
+        self.assertEqual(self.applied, [])
+
+    def test_added_migration(self):
+        """
+        Tests that only migrations added since the last start run
+        :return: None
+        """
+        metadata = self.metadata("notes")
+        SchemaManager(self.engine, metadata)\
+            .ensure("bot", self.migrations(1), ["notes"])
+        SchemaManager._created_tables.clear()
+        SchemaManager(self.engine, metadata)\
+            .ensure("bot", self.migrations(3), ["notes"])
+
+        self.assertEqual(self.applied, [2, 3])
+        self.assertEqual(self.stamps()["bot"][0], 3)
+
+    def test_new_component(self):
+        """
+        Tests that a component added to a stamped database only runs its
+        migrations if its tables existed before. Tables created while
+        another component's schema was checked count as new
+        :return: None
+        """
+        metadata = self.metadata("first_notes", "second_notes")
+        SchemaManager(self.engine, metadata).ensure("first", [], None)
+        SchemaManager(self.engine, metadata).ensure(
+            "second", self.migrations(2), ["second_notes"]
+        )
+        SchemaManager(self.engine, metadata).ensure(
+            "third", self.migrations(1), None
+        )
+        self.assertEqual(self.applied, [])
+        self.assertEqual(self.stamps()["second"][0], 2)
+        self.assertEqual(self.stamps()["third"][0], 1)
+
+        # In a new process, the tables existed before
+        SchemaManager._created_tables.clear()
+        SchemaManager(self.engine, metadata).ensure(
+            "fourth", self.migrations(1), ["second_notes"]
+        )
+        self.assertEqual(self.applied, [1])
+
+        metadata = self.metadata("first_notes", "second_notes", "fifth")
+        SchemaManager(self.engine, metadata).ensure(
+            "fifth", self.migrations(1), ["fifth"]
+        )
+        self.assertEqual(self.applied, [1])
+        self.assertEqual(self.stamps()["fifth"][0], 1)
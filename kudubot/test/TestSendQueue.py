@@ -0,0 +1,232 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from unittest import TestCase
+from typing import List, Tuple
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from kudubot.execution.SendQueue import SendQueue
+from kudubot.metrics.Metrics import Metrics
+from kudubot.test.FakeConnection import FakeConnection
+
+
+class TimedConnection(FakeConnection):
+    """
+    Fake connection that records when messages were sent
+    """
+
+    def __init__(self, fail_on: str = ""):
+        """
+        Initializes the connection
+        :param fail_on: Sending messages with this body raises an exception
+        """
+        super().__init__()
+        self.fail_on = fail_on
+        self.times = []  # type: List[float]
+
+    def send(self, message: Message):
+        """
+        Records a sent message and the time it was sent
+        :param message: The message
+        :return: None
+        """
+        if message.body == self.fail_on:
+            raise ValueError("Sending failed")
+        self.times.append(time.monotonic())
+        super().send(message)
+
+
+class TestSendQueue(TestCase):
+    """
+    Tests the ordering, rate limiting and coalescing of the SendQueue
+    """
+
+    def setUp(self):
+        """
+        Creates a fake connection
+        :return: None
+        """
+        self.connection = TimedConnection(fail_on="fail")
+
+    def start_queue(
+            self,
+            rate_limit: Tuple[float, float] = (1000, 1000),
+            receiver_rate_limit: Tuple[float, float] = (1000, 1000),
+            coalesce_length: int = 0,
+            max_size: int = 100
+    ) -> SendQueue:
+        """
+        Starts a send queue that uses the fake connection
+        :param rate_limit: The global rate limit
+        :param receiver_rate_limit: The rate limit of every receiver
+        :param coalesce_length: The maximum length of combined messages
+        :param max_size: The maximum amount of queued messages
+        :return: The send queue
+        """
+        queue = SendQueue(
+            self.connection,
+            max_size,
+            rate_limit,
+            receiver_rate_limit,
+            coalesce_length
+        )
+        queue.start()
+        return queue
+
+    def wait_for(self, amount: int, timeout: float = 5.0):
+        """
+        Waits until a given amount of messages was sent
+        :param amount: The amount of messages
+        :param timeout: The maximum time to wait in seconds
+        :return: None
+        """
+        deadline = time.monotonic() + timeout
+        while self.connection.sent_count < amount:
+            self.assertLess(time.monotonic(), deadline, "Messages not sent")
+            time.sleep(0.005)
+
+    @staticmethod
+    def message(receiver: str, body: str, title: str = "") -> TextMessage:
+        """
+        Creates a text message
+        :param receiver: The address of the receiver
+        :param body: The body of the message
+        :param title: The title of the message
+        :return: The message
+        """
+        return TextMessage(Address("bot"), Address(receiver), body, title)
+
+    def test_receiver_order(self):
+        """
+        Tests that messages to the same receiver are sent in the order
+        they were queued
+        :return: None
+        """
+        queue = self.start_queue(receiver_rate_limit=(50, 3))
+        for i in range(0, 30):
+            queue.put(self.message("user{}".format(i % 3), str(i)))
+        self.wait_for(30)
+
+        for receiver in ["user0", "user1", "user2"]:
+            bodies = [
+                int(message.body) for message in self.connection.sent
+                if message.receiver.address == receiver
+            ]
+            self.assertEqual(len(bodies), 10)
+            self.assertEqual(bodies, sorted(bodies))
+
+    def test_global_rate_limit(self):
+        """
+        Tests that the global rate limit is respected after the burst
+        :return: None
+        """
+        queue = self.start_queue(rate_limit=(20, 2))
+        for i in range(0, 6):
+            queue.put(self.message("user{}".format(i), "hi"))
+        self.wait_for(6)
+
+        times = self.connection.times
+        # The burst is sent immediately, then one message every 50ms
+        self.assertLess(times[1] - times[0], 0.03)
+        self.assertGreaterEqual(times[5] - times[0], 0.19)
+
+    def test_receiver_rate_limit(self):
+        """
+        Tests that a throttled receiver does not hold up messages to
+        other receivers
+        :return: None
+        """
+        queue = self.start_queue(receiver_rate_limit=(5, 1))
+        queue.put(self.message("slow", "1"))
+        queue.put(self.message("slow", "2"))
+        queue.put(self.message("fast", "3"))
+        self.wait_for(3)
+
+        self.assertEqual(
+            [message.body for message in self.connection.sent],
+            ["1", "3", "2"]
+        )
+        times = self.connection.times
+        self.assertGreaterEqual(times[2] - times[0], 0.15)
+
+    def test_coalescing(self):
+        """
+        Tests that consecutive text messages to a receiver are combined
+        up to the maximum length
+        :return: None
+        """
+        queue = self.start_queue(
+            rate_limit=(0.001, 1), coalesce_length=10
+        )
+        # Blocks the global rate limit, so that the others are queued
+        queue.put(self.message("other", "first"))
+        self.wait_for(1)
+        for body in ["aa", "bb", "cc", "dd"]:
+            queue.put(self.message("user", body))
+        queue.rate_limit.rate = 1000
+        with queue._condition:
+            queue._condition.notify_all()
+        self.wait_for(3)
+
+        self.assertEqual(
+            [message.body for message in self.connection.sent[1:]],
+            ["aa\n\nbb\n\ncc", "dd"]
+        )
+
+    def test_send_errors(self):
+        """
+        Tests that failing to send a message does not stop the queue
+        :return: None
+        """
+        queue = self.start_queue()
+        queue.put(self.message("user", "fail"))
+        queue.put(self.message("user", "ok"))
+        self.wait_for(1)
+        self.assertEqual(self.connection.sent[0].body, "ok")
+        self.assertEqual(queue.sent, 2)
+
+    def test_gauges(self):
+        """
+        Tests that the queue depth and average latency are reported as
+        gauges of the metrics
+        :return: None
+        """
+        metrics = Metrics()
+        queue = SendQueue(
+            self.connection, 100, (0.001, 1), (1000, 1000),
+            metrics=metrics, metrics_label="FakeConnection"
+        )
+        queue.start()
+        for body in ["1", "2", "3"]:
+            queue.put(self.message("user", body))
+        self.wait_for(1)
+
+        gauges = {
+            (name, label): value for name, label, value in metrics.gauges()
+        }
+        self.assertEqual(gauges[("send_queue_depth", "FakeConnection")], 2)
+        self.assertEqual(
+            gauges[("send_queue_latency", "FakeConnection")],
+            queue.average_latency
+        )
+        self.assertIn(
+            "send_queue_depth FakeConnection: 2", metrics.summary()
+        )
@@ -0,0 +1,95 @@
+"""LICENSE
+Copyright 2015 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of kudubot.
+
+kudubot is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kudubot is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kudubot.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from unittest import TestCase
+from unittest.mock import patch
+from kudubot.cache.TtlCache import TtlCache
+
+
+class TestTtlCache(TestCase):
+    """
+    Tests the expiry and size bound of the TtlCache class
+    """
+
+    def test_expiry(self):
+        """
+        Tests that entries expire once their time to live passed
+        :return: None
+        """
+        cache = TtlCache(10, 60)
+        with patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            cache.put("a", 1)
+            monotonic.return_value = 130.0
+            cache.put("b", 2)
+
+            monotonic.return_value = 159.0
+            self.assertEqual(cache.get("a"), 1)
+            # Lookups don't extend the time to live
+            monotonic.return_value = 160.0
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("a", "default"), "default")
+            self.assertEqual(cache.get("b"), 2)
+            self.assertEqual(len(cache), 1)
+
+            # Storing an entry again renews it
+            cache.put("b", 3)
+            monotonic.return_value = 215.0
+            self.assertEqual(cache.get("b"), 3)
+
+        self.assertEqual((cache.hits, cache.misses), (3, 2))
+        self.assertAlmostEqual(cache.hit_rate, 0.6)
+
+    def test_size_bound(self):
+        """
+        Tests that the least recently used entry is evicted once the
+        cache is full
+        :return: None
+        """
+        cache = TtlCache(2, 60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_remove(self):
+        """
+        Tests removing single entries, matching entries and all entries
+        :return: None
+        """
+        cache = TtlCache(10, 60)
+        for key in [("a", "x"), ("a", "y"), ("b", "x"), ("b", "y")]:
+            cache.put(key, True)
+
+        cache.remove(("a", "x"))
+        cache.remove(("c", "x"))
+        self.assertIsNone(cache.get(("a", "x")))
+
+        cache.remove_matching(lambda key: key[1] == "y")
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.get(("b", "x")))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
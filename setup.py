@@ -42,10 +42,18 @@ if __name__ == "__main__":
         install_requires=[
             "typing",
             "bokkichat",
-            "sqlalchemy",
+            "sqlalchemy>=1.3,<2.1",
             "sentry-sdk",
             "puffotter"
         ],
+        extras_require={
+            "async": ["sqlalchemy>=1.4", "aiosqlite"]
+        },
+        entry_points={
+            "console_scripts": [
+                "kudubot-supervisor=kudubot.helper:cli_supervisor_start"
+            ]
+        },
         include_package_data=True,
         zip_safe=False
     )